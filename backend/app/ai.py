@@ -0,0 +1,373 @@
+"""
+MiniMax chat completion client with a persistent, prompt-keyed response cache
+
+Set AI_PROVIDER=stub to answer locally (no network, no API key needed); the
+stub streams its reply word by word so the SSE path can be exercised offline.
+
+Every provider call is a coroutine (achat, achat_stream, AICache.acompletion,
+AICache.astream_sse) awaiting MiniMax over a shared httpx.AsyncClient.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+from sqlalchemy import bindparam, update
+from sqlalchemy.exc import IntegrityError
+
+from .database import AsyncReadSessionLocal, SessionLocal, run_write
+from .models import AIResponseCache
+from .telemetry import upstream_call
+
+logger = logging.getLogger(__name__)
+
+MINIMAX_URL = os.getenv("MINIMAX_URL", "https://api.minimaxi.chat/v1/text/chatcompletion_v2")
+MINIMAX_MODEL = "MiniMax-Text-01"
+MINIMAX_TIMEOUT = 60
+MINIMAX_ENDPOINT = urlparse(MINIMAX_URL).path  # metrics label
+
+AI_PROVIDER = os.getenv("AI_PROVIDER", "minimax")  # "minimax" or "stub"
+AI_STUB_TOKEN_DELAY = float(os.getenv("AI_STUB_TOKEN_DELAY", "0.02"))
+
+AI_GENERATE_CACHE_TTL = int(os.getenv("AI_GENERATE_CACHE_TTL", str(24 * 3600)))
+AI_RESEARCH_CACHE_TTL = int(os.getenv("AI_RESEARCH_CACHE_TTL", str(7 * 24 * 3600)))
+AI_CACHE_HIT_FLUSH_INTERVAL = float(os.getenv("AI_CACHE_HIT_FLUSH_INTERVAL", "60"))  # seconds between hit count writes
+
+RESEARCH_SYSTEM_PROMPT = "You are a helpful research assistant. Provide detailed, accurate information."
+GENERATE_SYSTEM_PROMPT = "You are a social media content expert. Create engaging, professional posts that fit the platform style."
+
+
+PLATFORM_GUIDANCE = {
+    "linkedin": "Professional, B2B focused, no salesy language, subtle brand mentions only",
+    "twitter": "Concise, engaging, max 280 chars",
+    "instagram": "Visual storytelling, use emojis, engaging caption"
+}
+
+
+def research_prompt(query: str) -> str:
+    return f"Research and provide key information about: {query}"
+
+
+def generate_prompt(topic: str, platform: str, tone: str) -> str:
+    return f"""Generate a {platform} post about: {topic}
+Tone: {tone}
+Guidelines: {PLATFORM_GUIDANCE.get(platform, 'Professional')}
+Include relevant hashtags. Make it engaging but not salesy.
+"""
+
+
+class AIProviderError(Exception):
+    """Non-200 response from the AI provider"""
+
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+        super().__init__(f"{status_code} - {text[:200] if text else 'No response'}")
+
+
+def cache_key(model: str, system_prompt: str, user_prompt: str, provider: str = AI_PROVIDER) -> str:
+    """Content address of a completion request; stub replies are never served to MiniMax requests"""
+    raw = json.dumps([provider, model, system_prompt, user_prompt], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _minimax_body(system_prompt: str, user_prompt: str, model: str, stream: bool) -> dict:
+    body = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    }
+    if stream:
+        body["stream"] = True
+    return body
+
+
+def _minimax_headers(api_key: str) -> dict:
+    return {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+
+
+def _minimax_label(stream: bool) -> str:
+    # Streams are timed to the response headers; they are labelled apart from plain calls
+    return MINIMAX_ENDPOINT + ("?stream" if stream else "")
+
+
+def _stream_delta(line: str):
+    """(done, delta) for one SSE line of a MiniMax stream"""
+    if not line or not line.startswith("data:"):
+        return False, None
+    data = line[len("data:"):].strip()
+    if data == "[DONE]":
+        return True, None
+    choices = json.loads(data).get("choices") or []
+    if not choices:
+        return False, None
+    # The final chunk repeats the whole reply under "message"; deltas carry the text
+    return False, choices[0].get("delta", {}).get("content")
+
+
+def _message_content(body: dict):
+    choices = body.get("choices")
+    if not choices:
+        return None
+    return choices[0].get("message", {}).get("content", "")
+
+
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def minimax_async_client() -> httpx.AsyncClient:
+    """Shared keep-alive client for MiniMax, created on first use from the event loop"""
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(timeout=MINIMAX_TIMEOUT)
+    return _async_client
+
+
+async def close_ai_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+async def _aminimax_request(api_key: str, system_prompt: str, user_prompt: str, model: str, stream: bool = False) -> httpx.Response:
+    client = minimax_async_client()
+    request = client.build_request(
+        "POST", MINIMAX_URL, headers=_minimax_headers(api_key), json=_minimax_body(system_prompt, user_prompt, model, stream)
+    )
+    with upstream_call("minimax", "POST", _minimax_label(stream)) as call:
+        response = await client.send(request, stream=stream)
+        call["status"] = response.status_code
+    if response.status_code != 200:
+        await response.aread()
+        await response.aclose()
+        raise AIProviderError(response.status_code, response.text)
+    return response
+
+
+async def aminimax_chat(api_key: str, system_prompt: str, user_prompt: str, model: str = MINIMAX_MODEL):
+    response = await _aminimax_request(api_key, system_prompt, user_prompt, model)
+    return _message_content(response.json())
+
+
+async def aminimax_chat_stream(api_key: str, system_prompt: str, user_prompt: str, model: str = MINIMAX_MODEL) -> AsyncIterator[str]:
+    response = await _aminimax_request(api_key, system_prompt, user_prompt, model, stream=True)
+    try:
+        async for line in response.aiter_lines():
+            done, delta = _stream_delta(line)
+            if done:
+                break
+            if delta:
+                yield delta
+    finally:
+        await response.aclose()
+
+
+async def stub_achat_stream(api_key: str, system_prompt: str, user_prompt: str, model: str = MINIMAX_MODEL) -> AsyncIterator[str]:
+    words = f"[stub {model}] {user_prompt.strip()}".split(" ")
+    for i, word in enumerate(words):
+        if AI_STUB_TOKEN_DELAY:
+            await asyncio.sleep(AI_STUB_TOKEN_DELAY)
+        yield word if i == 0 else " " + word
+
+
+async def stub_achat(api_key: str, system_prompt: str, user_prompt: str, model: str = MINIMAX_MODEL):
+    return "".join([delta async for delta in stub_achat_stream(api_key, system_prompt, user_prompt, model)])
+
+
+async def achat(api_key: str, system_prompt: str, user_prompt: str, model: str = MINIMAX_MODEL):
+    provider = stub_achat if AI_PROVIDER == "stub" else aminimax_chat
+    return await provider(api_key, system_prompt, user_prompt, model)
+
+
+def achat_stream(api_key: str, system_prompt: str, user_prompt: str, model: str = MINIMAX_MODEL) -> AsyncIterator[str]:
+    provider = stub_achat_stream if AI_PROVIDER == "stub" else aminimax_chat_stream
+    return provider(api_key, system_prompt, user_prompt, model)
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class AICache:
+    """
+    SQLite-backed completion cache with in-process hit/miss counters.
+
+    Lookups are read-only: per-entry hit counts are kept in memory and added
+    to the hits column every AI_CACHE_HIT_FLUSH_INTERVAL seconds (and on
+    stop), so a cache hit never takes SQLite's write lock.
+    """
+
+    def __init__(self, flush_interval: float = AI_CACHE_HIT_FLUSH_INTERVAL):
+        self.hits = 0
+        self.misses = 0
+        self.flush_interval = flush_interval
+        self._pending_hits: Dict[str, int] = {}  # cache_key -> hits not yet written
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread or self.flush_interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ai-cache-hits", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self._flush_in_session()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._flush_in_session()
+
+    def _flush_in_session(self):
+        db = SessionLocal()
+        try:
+            self.flush_hits(db)
+        except Exception:
+            logger.exception("Writing AI cache hit counts failed")
+        finally:
+            db.close()
+
+    def flush_hits(self, db) -> int:
+        """Add the hits counted since the last flush to each entry; returns the entries updated"""
+        with self._lock:
+            pending, self._pending_hits = self._pending_hits, {}
+        if not pending:
+            return 0
+        table = AIResponseCache.__table__
+        db.execute(
+            update(table).where(table.c.cache_key == bindparam("key")).values(hits=table.c.hits + bindparam("n")),
+            [{"key": key, "n": n} for key, n in pending.items()]
+        )
+        db.commit()
+        return len(pending)
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def lookup(self, db, key: str):
+        entry = db.query(AIResponseCache).filter(
+            AIResponseCache.cache_key == key,
+            AIResponseCache.expires_at > datetime.utcnow()
+        ).first()
+        if entry is None:
+            return None
+        with self._lock:
+            self._pending_hits[key] = self._pending_hits.get(key, 0) + 1
+        return entry.response
+
+    def store(self, db, key: str, model: str, response: str, ttl: int):
+        expires_at = datetime.utcnow() + timedelta(seconds=ttl)
+        entry = db.query(AIResponseCache).filter(AIResponseCache.cache_key == key).first()
+        if entry is None:
+            db.add(AIResponseCache(cache_key=key, model=model, response=response, hits=0, expires_at=expires_at))
+        else:
+            entry.response = response
+            entry.expires_at = expires_at
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # a concurrent miss stored the same prompt first
+
+    async def alookup(self, key: str):
+        """lookup() on its own short-lived session, so no pooled connection is held across the provider call"""
+        async with AsyncReadSessionLocal() as db:
+            return await db.run_sync(self.lookup, key)
+
+    async def acompletion(self, api_key: str, system_prompt: str, user_prompt: str, ttl: int, force_refresh: bool = False, model: str = MINIMAX_MODEL):
+        """Return (content, cached) for a prompt, awaiting the provider on a miss"""
+        key = cache_key(model, system_prompt, user_prompt)
+        if not force_refresh and ttl > 0:
+            content = await self.alookup(key)
+            if content is not None:
+                self._count(True)
+                return content, True
+
+        self._count(False)
+        content = await achat(api_key, system_prompt, user_prompt, model)
+        if content and ttl > 0:
+            await run_write(self.store, key, model, content, ttl)
+        return content, False
+
+    async def astream_sse(
+        self,
+        api_key: str,
+        system_prompt: str,
+        user_prompt: str,
+        ttl: int,
+        force_refresh: bool = False,
+        on_complete: Optional[Callable] = None,
+        model: str = MINIMAX_MODEL
+    ) -> AsyncIterator[str]:
+        """
+        Yield a completion as server-sent events: "token" events with each
+        delta, then one "done" event with the assembled content. A cache hit is
+        sent as a single token. on_complete(db, content) runs before "done" and
+        may return extra fields for it; it and the cache store run on a sync
+        session via run_write.
+        """
+        key = cache_key(model, system_prompt, user_prompt)
+        content = None
+        if not force_refresh and ttl > 0:
+            content = await self.alookup(key)
+        cached = content is not None
+        self._count(cached)
+
+        if cached:
+            yield sse_event("token", {"delta": content})
+        else:
+            parts = []
+            try:
+                async for delta in achat_stream(api_key, system_prompt, user_prompt, model):
+                    parts.append(delta)
+                    yield sse_event("token", {"delta": delta})
+            except AIProviderError as e:
+                yield sse_event("error", {"detail": f"AI API error: {e}"})
+                return
+            except Exception as e:
+                yield sse_event("error", {"detail": str(e)})
+                return
+            content = "".join(parts)
+            if content and ttl > 0:
+                await run_write(self.store, key, model, content, ttl)
+
+        extra = await run_write(on_complete, content) if on_complete else None
+        yield sse_event("done", {"content": content, "cached": cached, **(extra or {})})
+
+    def purge_expired(self, db) -> int:
+        deleted = db.query(AIResponseCache).filter(AIResponseCache.expires_at <= datetime.utcnow()).delete()
+        db.commit()
+        return deleted
+
+    def stats(self, db) -> dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "entries": db.query(AIResponseCache).count()
+        }
+
+
+ai_cache = AICache()
@@ -0,0 +1,410 @@
+"""
+Post analytics pulled from Metricool into a local time-series store
+
+ingest() reads metric snapshots newer than the stored watermark, one page at a
+time, and commits each page in one transaction together with the advanced
+watermark:
+- metric_series keeps one row per network post with its latest counters
+- metric_points keeps every snapshot as integers (WITHOUT ROWID)
+- metric_rollups adds each snapshot's growth to its day and ISO-week buckets
+
+A snapshot at or before a series' latest one is skipped, so re-reading an
+overlapping page never counts twice. A post's first snapshot is credited to
+the day it was published. Trend endpoints only read metric_rollups.
+
+Usage:
+    python -m app.analytics --user admin --workspace 5704319
+"""
+
+import argparse
+import logging
+import os
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from .database import SessionLocal, run_write
+from .metricool import METRICOOL_METRICS_PAGE_SIZE, AsyncMetricoolClient, MetricoolClient, get_async_client, get_client
+from .models import AISettings, AnalyticsIngestState, MetricPoint, MetricRollup, MetricSeries
+from .scheduler import METRICOOL_BLOG_ID, SCHEDULER_KEY_NAME
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_INGEST_INTERVAL = float(os.getenv("ANALYTICS_INGEST_INTERVAL", "900"))  # seconds, 0 disables
+ANALYTICS_WORKSPACE_ID = os.getenv("ANALYTICS_WORKSPACE_ID", METRICOOL_BLOG_ID)
+MAX_TREND_BUCKETS = 400
+
+METRICS = ("impressions", "reach", "likes", "comments", "shares", "clicks")
+ENGAGEMENT = ("likes", "comments", "shares", "clicks")
+DAY = "day"
+WEEK = "week"
+GRANULARITIES = (DAY, WEEK)
+SERIES_STATE = ("published_at", "last_measured_at") + METRICS
+
+_run_locks: Dict[Tuple, threading.Lock] = {}
+_run_locks_guard = threading.Lock()
+
+
+class IngestRunning(RuntimeError):
+    """Another ingest of the same user and workspace is in progress"""
+
+
+def _run_lock(user_id, workspace_id: str) -> threading.Lock:
+    """One ingest at a time per user and workspace (background thread vs. manual trigger)"""
+    with _run_locks_guard:
+        return _run_locks.setdefault((user_id, workspace_id), threading.Lock())
+
+
+def _utc(value) -> Optional[datetime]:
+    """ISO-8601 string or unix seconds to naive UTC; offset-less strings are taken as UTC"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+    dt = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def _epoch(dt: datetime) -> int:
+    return int(dt.replace(tzinfo=timezone.utc).timestamp())
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def parse_snapshot(item: Dict) -> Optional[Dict]:
+    """Normalize one upstream metrics item; None when it has no post id or timestamp"""
+    external_id = item.get("id") or item.get("post_id") or item.get("postId")
+    try:
+        measured_at = _utc(item.get("measured_at") or item.get("updated_at") or item.get("date"))
+        published_at = _utc(item.get("published_at") or item.get("publishedAt"))
+    except (TypeError, ValueError):
+        return None
+    if not external_id or measured_at is None:
+        return None
+    snapshot = {
+        "external_id": str(external_id),
+        "network": str(item.get("network") or item.get("provider") or "unknown").lower(),
+        "measured_at": measured_at,
+        "published_at": published_at,
+    }
+    for metric in METRICS:
+        snapshot[metric] = int(item.get(metric) or 0)
+    return snapshot
+
+
+def ingest_batch(db, user_id, items: List[Dict]) -> Dict:
+    """Store one page of snapshots and fold their growth into the rollups; caller commits"""
+    snapshots = sorted(filter(None, map(parse_snapshot, items)), key=lambda s: s["measured_at"])
+    stats = {"fetched": len(items), "stored": 0, "skipped": len(items) - len(snapshots), "newest": None}
+    if not snapshots:
+        return stats
+
+    # Series are plain dicts written back with two executemany statements; ORM flushes
+    # would issue one UPDATE per row because the changed columns differ between rows
+    existing = db.execute(
+        select(MetricSeries.id, MetricSeries.external_id, MetricSeries.network, *(getattr(MetricSeries, c) for c in SERIES_STATE))
+        .where(MetricSeries.user_id == user_id, MetricSeries.external_id.in_({s["external_id"] for s in snapshots}))
+    ).mappings()
+    series = {(row["external_id"], row["network"]): dict(row) for row in existing}
+
+    touched, points = {}, []
+    rollups = defaultdict(lambda: dict.fromkeys(METRICS + ("snapshots",), 0))
+    for snap in snapshots:
+        key = (snap["external_id"], snap["network"])
+        row = series.get(key)
+        if row is None:
+            row = {"id": None, "external_id": key[0], "network": key[1], "published_at": None, "last_measured_at": None, **dict.fromkeys(METRICS, 0)}
+            series[key] = row
+        elif row["last_measured_at"] is not None and snap["measured_at"] <= row["last_measured_at"]:
+            stats["skipped"] += 1
+            continue
+
+        first = row["last_measured_at"] is None
+        if snap["published_at"] is not None:
+            row["published_at"] = snap["published_at"]
+        credited = (row["published_at"] if first and row["published_at"] else snap["measured_at"]).date()
+        for granularity, bucket in ((DAY, credited), (WEEK, week_start(credited))):
+            totals = rollups[(granularity, bucket, row["network"])]
+            for metric in METRICS:
+                totals[metric] += snap[metric] - row[metric]
+            totals["snapshots"] += 1
+
+        for metric in METRICS:
+            row[metric] = snap[metric]
+        row["last_measured_at"] = snap["measured_at"]
+        touched[key] = row
+        points.append((row, snap))
+        stats["stored"] += 1
+
+    if not points:
+        return stats
+
+    new_keys = {key for key, row in touched.items() if row["id"] is None}
+    new = [touched[key] for key in new_keys]
+    if new:
+        ids = db.execute(
+            insert(MetricSeries).returning(MetricSeries.id, sort_by_parameter_order=True),
+            [{"user_id": user_id, "external_id": row["external_id"], "network": row["network"], **{c: row[c] for c in SERIES_STATE}} for row in new]
+        ).scalars().all()
+        for row, series_id in zip(new, ids):
+            row["id"] = series_id
+    changed = [{"id": row["id"], **{c: row[c] for c in SERIES_STATE}} for key, row in touched.items() if key not in new_keys]
+    if changed:
+        db.execute(update(MetricSeries), changed)
+
+    db.execute(
+        insert(MetricPoint).on_conflict_do_nothing(),
+        [{"series_id": row["id"], "ts": _epoch(snap["measured_at"]), **{m: snap[m] for m in METRICS}} for row, snap in points]
+    )
+    stmt = insert(MetricRollup)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "granularity", "bucket", "network"],
+            set_={column: getattr(MetricRollup, column) + getattr(stmt.excluded, column) for column in METRICS + ("snapshots",)}
+        ),
+        [
+            {"user_id": user_id, "granularity": granularity, "bucket": bucket, "network": network, **totals}
+            for (granularity, bucket, network), totals in rollups.items()
+        ]
+    )
+    stats["newest"] = snapshots[-1]["measured_at"]
+    return stats
+
+
+def ingest_state(db, user_id, workspace_id: str) -> AnalyticsIngestState:
+    state = db.query(AnalyticsIngestState).filter(
+        AnalyticsIngestState.user_id == user_id,
+        AnalyticsIngestState.workspace_id == workspace_id
+    ).first()
+    if state is None:
+        state = AnalyticsIngestState(user_id=user_id, workspace_id=workspace_id, snapshots=0)
+        db.add(state)
+        db.flush()
+    return state
+
+
+def state_to_dict(state: AnalyticsIngestState) -> Dict:
+    return {
+        "workspace_id": state.workspace_id,
+        "watermark": state.watermark.isoformat() if state.watermark else None,
+        "snapshots": state.snapshots,
+        "last_run_at": state.last_run_at.isoformat() if state.last_run_at else None,
+        "last_error": state.last_error,
+    }
+
+
+def _begin_run(db, user_id, workspace_id: str) -> Optional[str]:
+    """The `since` of a run: the stored watermark (the state row is created on first use)"""
+    state = ingest_state(db, user_id, workspace_id)
+    db.commit()
+    return state.watermark.isoformat() + "Z" if state.watermark else None
+
+
+def _store_page(db, user_id, workspace_id: str, items: List[Dict]) -> Dict:
+    """Store one page and advance the watermark in the same transaction"""
+    state = ingest_state(db, user_id, workspace_id)
+    stats = ingest_batch(db, user_id, items)
+    if stats["newest"] and (state.watermark is None or stats["newest"] > state.watermark):
+        state.watermark = stats["newest"]
+    state.snapshots += stats["stored"]
+    db.commit()
+    return stats
+
+
+def _end_run(db, user_id, workspace_id: str, error: Optional[str] = None) -> Dict:
+    state = ingest_state(db, user_id, workspace_id)
+    state.last_error = error
+    state.last_run_at = datetime.utcnow()
+    db.commit()
+    return state_to_dict(state)
+
+
+def _add_page(totals: Dict, stats: Dict):
+    totals["pages"] += 1
+    for key in ("fetched", "stored", "skipped"):
+        totals[key] += stats[key]
+
+
+def ingest(
+    user_id,
+    api_key: str,
+    workspace_id: str = ANALYTICS_WORKSPACE_ID,
+    client: Optional[MetricoolClient] = None,
+    page_size: int = METRICOOL_METRICS_PAGE_SIZE
+) -> Dict:
+    """Pull every snapshot past the watermark; raises on upstream errors after recording them"""
+    client = client or get_client(api_key)
+    totals = {"pages": 0, "fetched": 0, "stored": 0, "skipped": 0}
+    with _run_lock(user_id, workspace_id):
+        db = SessionLocal()
+        try:
+            since = _begin_run(db, user_id, workspace_id)
+            try:
+                for items in client.iter_post_metrics(workspace_id, since=since, page_size=page_size):
+                    _add_page(totals, _store_page(db, user_id, workspace_id, items))
+            except Exception as e:
+                db.rollback()
+                _end_run(db, user_id, workspace_id, str(e)[:500])
+                raise
+            return {**totals, **_end_run(db, user_id, workspace_id)}
+        finally:
+            db.close()
+
+
+async def aingest(
+    user_id,
+    api_key: str,
+    workspace_id: str = ANALYTICS_WORKSPACE_ID,
+    client: Optional[AsyncMetricoolClient] = None,
+    page_size: int = METRICOOL_METRICS_PAGE_SIZE
+) -> Dict:
+    """
+    ingest() for request handlers: pages are awaited over AsyncMetricoolClient
+    and each is stored by a short run_write, so no thread waits on Metricool.
+    Raises IngestRunning instead of waiting when a run is already in progress.
+    """
+    client = client or get_async_client(api_key)
+    totals = {"pages": 0, "fetched": 0, "stored": 0, "skipped": 0}
+    lock = _run_lock(user_id, workspace_id)
+    if not lock.acquire(blocking=False):
+        raise IngestRunning(f"An ingest of workspace {workspace_id} is already running")
+    try:
+        since = await run_write(_begin_run, user_id, workspace_id)
+        try:
+            async for items in client.iter_post_metrics(workspace_id, since=since, page_size=page_size):
+                _add_page(totals, await run_write(_store_page, user_id, workspace_id, items))
+        except Exception as e:
+            await run_write(_end_run, user_id, workspace_id, str(e)[:500])
+            raise
+        return {**totals, **await run_write(_end_run, user_id, workspace_id)}
+    finally:
+        lock.release()
+
+
+def trend_range(granularity: str, start: Optional[date], end: Optional[date]) -> Tuple[date, date]:
+    """Default to the last 30 days / 12 weeks; week ranges snap to Mondays; raises ValueError"""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    end = end or datetime.utcnow().date()
+    if start is None:
+        start = end - (timedelta(days=29) if granularity == DAY else timedelta(weeks=11))
+    if granularity == WEEK:
+        start, end = week_start(start), week_start(end)
+    if end < start:
+        raise ValueError("end_date is before start_date")
+    span = (end - start).days if granularity == DAY else (end - start).days // 7
+    if span >= MAX_TREND_BUCKETS:
+        raise ValueError(f"Range is limited to {MAX_TREND_BUCKETS} buckets")
+    return start, end
+
+
+def _with_rates(values: Dict) -> Dict:
+    values["engagement"] = sum(values[m] for m in ENGAGEMENT)
+    values["engagement_rate"] = round(values["engagement"] / values["impressions"], 4) if values["impressions"] else 0.0
+    return values
+
+
+def trends(db, user_id, granularity: str, start: date, end: date, network: Optional[str] = None) -> Dict:
+    """Summed growth per bucket from metric_rollups (a primary-key range read)"""
+    columns = [func.sum(getattr(MetricRollup, m)).label(m) for m in METRICS]
+    query = select(MetricRollup.bucket, *columns).where(
+        MetricRollup.user_id == user_id,
+        MetricRollup.granularity == granularity,
+        MetricRollup.bucket >= start,
+        MetricRollup.bucket <= end
+    )
+    if network:
+        query = query.where(MetricRollup.network == network.lower())
+    rows = db.execute(query.group_by(MetricRollup.bucket).order_by(MetricRollup.bucket)).mappings()
+
+    buckets = [_with_rates({"bucket": row["bucket"].isoformat(), **{m: row[m] or 0 for m in METRICS}}) for row in rows]
+    totals = _with_rates({m: sum(b[m] for b in buckets) for m in METRICS})
+    return {
+        "granularity": granularity,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "network": network,
+        "totals": totals,
+        "buckets": buckets,
+    }
+
+
+class AnalyticsIngestor:
+    """Background thread that ingests metrics for every user with a saved Metricool key"""
+
+    def __init__(self, interval: float = ANALYTICS_INGEST_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread or self.interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="analytics-ingest", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self):
+        db = SessionLocal()
+        try:
+            keys = db.query(AISettings.user_id, AISettings.api_key).filter(AISettings.provider == SCHEDULER_KEY_NAME).all()
+        finally:
+            db.close()
+        for user_id, api_key in keys:
+            if self._stop.is_set():
+                return
+            try:
+                ingest(user_id, api_key)
+            except Exception:
+                logger.exception("Analytics ingest failed for %s", user_id)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+
+analytics_ingestor = AnalyticsIngestor()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Pull Metricool post metrics into the local store")
+    parser.add_argument("--user", default="admin", help="owner of the metrics (user id as stored on posts)")
+    parser.add_argument("--workspace", default=ANALYTICS_WORKSPACE_ID)
+    parser.add_argument("--api-key", default=None, help=f"defaults to the user's saved '{SCHEDULER_KEY_NAME}' key")
+    parser.add_argument("--page-size", type=int, default=METRICOOL_METRICS_PAGE_SIZE)
+    args = parser.parse_args(argv)
+
+    from .migrations import run_migrations
+    run_migrations()
+
+    api_key = args.api_key
+    if api_key is None:
+        db = SessionLocal()
+        try:
+            saved = db.query(AISettings).filter(AISettings.user_id == args.user, AISettings.provider == SCHEDULER_KEY_NAME).first()
+            api_key = saved.api_key if saved else ""
+        finally:
+            db.close()
+
+    result = ingest(args.user, api_key, args.workspace, page_size=args.page_size)
+    print(f"{result['pages']} pages, {result['fetched']} snapshots fetched, {result['stored']} stored, "
+          f"{result['skipped']} skipped; watermark {result['watermark']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
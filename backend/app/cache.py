@@ -0,0 +1,301 @@
+"""
+In-memory TTL + LRU cache with stale-while-revalidate and single-flight loads
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+_refresh_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+_refresh_tasks = set()  # strong references, so the loop does not drop a refresh mid-flight
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries are fresh for `ttl` seconds and may then be
+    served stale for another `stale_ttl` seconds while one background refresh
+    runs. Concurrent misses for the same key share a single loader call.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300, stale_ttl: float = 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data: OrderedDict = OrderedDict()  # key -> (value, stored_at)
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _probe(self, key: Hashable, refresh: Callable[[], Future]):
+        """
+        Look key up. Returns (True, value) for a fresh or stale hit (starting
+        refresh() for a stale one), else (False, (future, owner)) where the
+        owner must load the value and resolve the future for other waiters.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                age = now - stored_at
+                if age < self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                if age < self.ttl + self.stale_ttl:
+                    self._data.move_to_end(key)
+                    self.stale_hits += 1
+                    if key not in self._inflight:
+                        self._inflight[key] = refresh()
+                    return True, value
+                del self._data[key]
+
+            self.misses += 1
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                future.set_running_or_notify_cancel()  # a waiter's cancel() must not cancel the shared load
+                self._inflight[key] = future
+            return False, (future, owner)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Return the cached value for key, calling loader() on a miss.
+
+        Values for which cacheable(value) is false are returned but not stored.
+        Exceptions from loader() propagate to every caller waiting on that load.
+        """
+        hit, result = self._probe(key, lambda: _refresh_pool.submit(self._load, key, loader, cacheable))
+        if hit:
+            return result
+        future, owner = result
+        if not owner:
+            return future.result()
+
+        try:
+            value = self._load(key, loader, cacheable)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        future.set_result(value)
+        return value
+
+    async def aget_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        get_or_load for a coroutine loader. The load runs as its own task and
+        every caller, the one that started it included, only waits on it: a
+        cancelled request (client disconnect) neither cancels the load nor
+        hands its CancelledError to the other waiters.
+        """
+        def refresh() -> Future:
+            future = Future()
+            future.set_running_or_notify_cancel()
+            self._spawn(key, loader, cacheable, future)
+            return future
+
+        hit, result = self._probe(key, refresh)
+        if hit:
+            return result
+        future, owner = result
+        if owner:
+            self._spawn(key, loader, cacheable, future)
+        return await asyncio.wrap_future(future)
+
+    def _spawn(self, key, loader, cacheable, future: Future):
+        task = asyncio.get_running_loop().create_task(self._aload(key, loader, cacheable, future))
+        _refresh_tasks.add(task)
+        task.add_done_callback(_refresh_tasks.discard)
+
+    async def _aload(self, key, loader, cacheable, future: Future):
+        try:
+            value = await loader()
+            if cacheable is None or cacheable(value):
+                self.set(key, value)
+        except BaseException as e:
+            logger.warning("Cache load failed for %r", key[0] if isinstance(key, tuple) else key)
+            future.set_exception(e)
+            return
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        future.set_result(value)
+
+    def _load(self, key, loader, cacheable):
+        try:
+            value = loader()
+            if cacheable is None or cacheable(value):
+                self.set(key, value)
+            return value
+        except Exception:
+            logger.warning("Cache load failed for %r", key[0] if isinstance(key, tuple) else key)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable = None):
+        """Drop one key, or everything when key is None"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._data)
+        return {
+            "size": size,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+class AuthCache:
+    """
+    Bounded LRU of bearer token -> decoded JWT claims, plus username -> user
+    snapshot. Token entries are dropped once their `exp` claim passes, so the
+    cache never extends a token's lifetime.
+
+    Revocation is stored in the database (revoked token ids, users' token
+    versions) and fronted here: revocations made by this process apply at
+    once through is_revoked(), and recheck_due() says when a cached token
+    should be checked against the database again, which bounds how long a
+    logout or password change on another worker takes to apply.
+    """
+
+    def __init__(self, max_size: int = 10000, recheck_interval: float = 5):
+        self.max_size = max_size
+        self.recheck_interval = recheck_interval
+        self._tokens: OrderedDict = OrderedDict()  # token -> (claims, exp, checked_at)
+        self._users: OrderedDict = OrderedDict()  # username -> detached User
+        self._revoked = {}  # token -> exp
+        self._versions = {}  # username -> tokens with a lower "ver" claim are invalid
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.user_hits = 0
+        self.user_misses = 0
+        self.invalidations = 0
+
+    def get_claims(self, token: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            entry = self._tokens.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            claims, exp, _ = entry
+            if exp is not None and now >= exp:
+                del self._tokens[token]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._tokens.move_to_end(token)
+            self.hits += 1
+            return claims
+
+    def put_claims(self, token: str, claims: dict):
+        with self._lock:
+            self._tokens[token] = (claims, claims.get("exp"), 0.0)
+            self._tokens.move_to_end(token)
+            while len(self._tokens) > self.max_size:
+                self._tokens.popitem(last=False)
+
+    def recheck_due(self, token: str) -> bool:
+        """True when the token's revocation state should be read from the database again"""
+        entry = self._tokens.get(token)
+        return entry is None or time.time() - entry[2] >= self.recheck_interval
+
+    def checked(self, token: str):
+        """The database says the token is still valid"""
+        with self._lock:
+            entry = self._tokens.get(token)
+            if entry is not None:
+                self._tokens[token] = (entry[0], entry[1], time.time())
+
+    def is_revoked(self, token: str, claims: dict) -> bool:
+        if not self._revoked and not self._versions:
+            return False
+        with self._lock:
+            version = self._versions.get(claims.get("sub"))
+            if version is not None and claims.get("ver", 0) < version:
+                return True
+            exp = self._revoked.get(token)
+            if exp is None:
+                return False
+            if exp < time.time():
+                del self._revoked[token]
+                return False
+            return True
+
+    def revoke(self, token: str, exp: Optional[float]):
+        """Forget a token and reject it until it expires (logout)"""
+        now = time.time()
+        with self._lock:
+            self._tokens.pop(token, None)
+            self._revoked[token] = exp if exp is not None else now + 30 * 24 * 3600
+            for t in [t for t, e in self._revoked.items() if e < now]:
+                del self._revoked[t]
+            self.invalidations += 1
+
+    def get_user(self, username: str):
+        with self._lock:
+            user = self._users.get(username)
+            if user is None:
+                self.user_misses += 1
+                return None
+            self._users.move_to_end(username)
+            self.user_hits += 1
+            return user
+
+    def put_user(self, username: str, user):
+        with self._lock:
+            self._users[username] = user
+            self._users.move_to_end(username)
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+
+    def invalidate_user(self, username: str, version: int):
+        """Drop the cached user and reject their tokens older than `version` (password change)"""
+        with self._lock:
+            self._users.pop(username, None)
+            self._versions[username] = max(version, self._versions.get(username, 0))
+            for token in [t for t, (claims, _, _) in self._tokens.items() if claims.get("sub") == username]:
+                del self._tokens[token]
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "tokens": len(self._tokens),
+                "users": len(self._users),
+                "revoked": len(self._revoked),
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "user_hits": self.user_hits,
+                "user_misses": self.user_misses,
+                "invalidations": self.invalidations
+            }
@@ -0,0 +1,121 @@
+"""
+Month/week calendar views over both scheduling sources
+
+A day can hold two kinds of item: ContentCalendar entries, and posts
+scheduled directly through Post.scheduled_at. summary() counts both in one
+grouped UNION ALL query, so no content is loaded. day_items() loads the items
+of a single day when it is opened.
+
+Due times are stored as naive UTC. SQL groups them by UTC hour, and each hour
+bucket is then assigned to a day in the requested timezone. Zones with
+non-whole-hour offsets can therefore place items near midnight on the
+neighbouring day.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func, literal, select, union_all
+
+from .models import ContentCalendar, Post
+
+MAX_SUMMARY_DAYS = 366
+DEFAULT_PLATFORM = "linkedin"
+
+CALENDAR = "calendar"
+POSTS = "posts"
+
+
+def utc_bounds(start: date, end: date, tz: ZoneInfo) -> Tuple[datetime, datetime]:
+    """Naive UTC [from, to) covering local days start..end inclusive"""
+    lower = datetime.combine(start, time.min, tz).astimezone(timezone.utc).replace(tzinfo=None)
+    upper = datetime.combine(end + timedelta(days=1), time.min, tz).astimezone(timezone.utc).replace(tzinfo=None)
+    return lower, upper
+
+
+def due_rows(user_id, lower: datetime, upper: datetime, columns):
+    calendar = select(
+        literal(CALENDAR).label("source"), ContentCalendar.id.label("id"), ContentCalendar.platform.label("platform"),
+        ContentCalendar.scheduled_date.label("due"), ContentCalendar.status.label("status"),
+        *columns(ContentCalendar.post_content)
+    ).where(
+        ContentCalendar.user_id == user_id,
+        ContentCalendar.scheduled_date >= lower,
+        ContentCalendar.scheduled_date < upper
+    )
+    posts = select(
+        literal(POSTS).label("source"), Post.id.label("id"), func.coalesce(Post.page_name, DEFAULT_PLATFORM).label("platform"),
+        Post.scheduled_at.label("due"), Post.publish_status.label("status"),
+        *columns(Post.body)
+    ).where(
+        Post.user_id == user_id,
+        Post.scheduled_at >= lower,
+        Post.scheduled_at < upper
+    )
+    return union_all(calendar, posts).subquery()
+
+
+def summary(db, user_id, start: date, end: date, tz: ZoneInfo) -> dict:
+    """Per-day totals broken down by platform and source, for local days start..end"""
+    lower, upper = utc_bounds(start, end, tz)
+    due = due_rows(user_id, lower, upper, lambda content: ())
+    hour = func.strftime("%Y-%m-%d %H", due.c.due).label("hour")
+    rows = db.execute(
+        select(hour, due.c.platform, due.c.source, func.count().label("n"))
+        .group_by(hour, due.c.platform, due.c.source)
+    )
+
+    days = defaultdict(lambda: {"total": 0, "platforms": defaultdict(int), "sources": defaultdict(int)})
+    for hour_value, platform, source, n in rows:
+        local_day = datetime.strptime(hour_value, "%Y-%m-%d %H").replace(tzinfo=timezone.utc).astimezone(tz).date()
+        bucket = days[local_day.isoformat()]
+        bucket["total"] += n
+        bucket["platforms"][platform] += n
+        bucket["sources"][source] += n
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "timezone": tz.key,
+        "total": sum(d["total"] for d in days.values()),
+        "days": [
+            {"date": day, "total": d["total"], "platforms": dict(d["platforms"]), "sources": dict(d["sources"])}
+            for day, d in sorted(days.items())
+        ]
+    }
+
+
+def day_items(db, user_id, day: date, tz: ZoneInfo) -> list:
+    """Every item due on one local day, with content, in due-time order"""
+    lower, upper = utc_bounds(day, day, tz)
+    due = due_rows(user_id, lower, upper, lambda content: (content.label("content"),))
+    rows = db.execute(select(due).order_by(due.c.due, due.c.source, due.c.id)).mappings()
+    return [
+        {
+            "source": row["source"],
+            "id": row["id"],
+            "platform": row["platform"],
+            "status": row["status"],
+            "scheduled_date": row["due"].replace(tzinfo=timezone.utc).astimezone(tz).isoformat() if isinstance(row["due"], datetime) else row["due"],
+            "content": row["content"]
+        }
+        for row in rows
+    ]
+
+
+def parse_range(start: Optional[date], end: Optional[date], tz: ZoneInfo) -> Tuple[date, date]:
+    """Default to the current month in tz; raises ValueError for bad or oversized ranges"""
+    if start is None:
+        today = datetime.now(tz).date()
+        start = today.replace(day=1)
+        if end is None:
+            end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    if end is None:
+        end = start
+    if end < start:
+        raise ValueError("end_date is before start_date")
+    if (end - start).days >= MAX_SUMMARY_DAYS:
+        raise ValueError(f"Range is limited to {MAX_SUMMARY_DAYS} days")
+    return start, end
@@ -1,9 +1,124 @@
-from sqlalchemy import create_engine
+"""
+SQLAlchemy engines and sessions
+
+SQLITE_PROFILE=wal (the default) puts SQLite in WAL mode with
+synchronous=NORMAL, a busy timeout, memory-mapped I/O and a larger page cache.
+Readers then no longer block behind writers. SQLITE_PROFILE=legacy keeps
+SQLite's defaults (rollback journal), for comparison.
+
+Async route handlers read through an async engine (aiosqlite, same pragmas
+and pool sizes) via AsyncReadSessionLocal, so a request
+waiting on the database holds no worker thread. Writes stay on the sync
+engine: aiosqlite makes several event-loop round trips per statement, and a
+transaction holds SQLite's write lock across all of them, so under load other
+writers would sit in the busy handler. run_write() runs a write transaction
+from async code as one call in the threadpool. Background workers, migrations
+and CLIs use SessionLocal directly.
+
+With DB_READ_ENGINE=1, those reads use a second async engine with its own
+pool, whose connections are opened with query_only=ON.
+"""
+
+from typing import Callable
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.concurrency import run_in_threadpool
 import os
 
 DB_PATH = os.getenv("DATABASE_URL", "sqlite:////home/user/GitRepos/social-media-dashboard/backend/app.db")
 
-engine = create_engine(DB_PATH, connect_args={"check_same_thread": False})
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "wal")  # "wal" or "legacy"
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_READ_ENGINE = os.getenv("DB_READ_ENGINE", "0") == "1"
+
+
+def _is_file_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and ":memory:" not in url and url.rstrip("/") not in ("sqlite:", "sqlite")
+
+
+def sqlite_pragmas(profile: str = SQLITE_PROFILE, read_only: bool = False) -> list:
+    """PRAGMA statements run on every new connection"""
+    pragmas = []
+    if profile == "wal":
+        pragmas += [
+            "PRAGMA journal_mode=WAL",
+            f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}",
+            f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+            f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+            f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}",
+            "PRAGMA temp_store=MEMORY",
+        ]
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
+
+
+def async_url(url: str) -> str:
+    """The async driver URL for a sync one (sqlite:// -> sqlite+aiosqlite://)"""
+    scheme, sep, rest = url.partition("://")
+    if scheme == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    return os.getenv("ASYNC_DATABASE_URL", url)
+
+
+def make_engine(url: str = DB_PATH, read_only: bool = False, is_async: bool = False):
+    create = create_async_engine if is_async else create_engine
+    if is_async:
+        url = async_url(url)
+    if not _is_file_sqlite(url):
+        return create(url, connect_args={"check_same_thread": False} if url.startswith("sqlite") else {})
+
+    new_engine = create(
+        url,
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        **({"poolclass": AsyncAdaptedQueuePool} if is_async else {}),  # aiosqlite defaults to NullPool
+    )
+    pragmas = sqlite_pragmas(read_only=read_only)
+
+    @event.listens_for(new_engine.sync_engine if is_async else new_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return new_engine
+
+
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async_engine = make_engine(is_async=True)
+
+async_read_engine = make_engine(read_only=True, is_async=True) if DB_READ_ENGINE and _is_file_sqlite(DB_PATH) else async_engine
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
+
+
+def _in_session(fn: Callable, *args):
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+async def run_write(fn: Callable, *args):
+    """Await fn(session, *args) on a fresh sync session in the threadpool; fn commits"""
+    return await run_in_threadpool(_in_session, fn, *args)
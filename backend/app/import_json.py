@@ -0,0 +1,298 @@
+"""
+Import the legacy data.json store into SQLite
+
+Posts and API keys are read from the file incrementally. The `posts` array is
+decoded one element at a time, so the whole document is never loaded at once.
+Rows are written in batches inside a single transaction: either everything is
+imported or nothing is. Running the import again is safe. Posts keep their
+data.json id in posts.legacy_id and a post whose id was already imported for
+the owner is skipped; API keys are upserted by name. Posts imported before
+legacy_id existed are matched once on (body, created_at) and adopted.
+
+Usage:
+    python -m app.import_json                       # STORAGE_FILE -> DATABASE_URL, owned by admin
+    python -m app.import_json --path data.json --user admin --batch-size 500
+    python -m app.import_json --dry-run             # report what would be imported
+"""
+
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime
+from typing import Iterator, Tuple
+
+from sqlalchemy import insert, update
+
+from .database import SessionLocal
+from .migrations import run_migrations
+from .models import AISettings, Post, PostHashtag, PostMedia
+from .post_index import backfill_rows
+from .scheduler import parse_due_time
+from .storage import STORAGE_FILE
+
+READ_CHUNK_SIZE = 64 * 1024
+DEFAULT_BATCH_SIZE = 500
+
+_WHITESPACE = " \t\r\n"
+
+logger = logging.getLogger(__name__)
+
+
+class _Reader:
+    """Incremental JSON tokenizer over a text file, built on JSONDecoder.raw_decode"""
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.buf = ""
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        chunk = self.fp.read(READ_CHUNK_SIZE)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos} of the current chunk")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def array(self) -> Iterator:
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            sep = self.peek()
+            self.pos += 1
+            if sep == "]":
+                return
+            if sep != ",":
+                raise ValueError("Malformed array")
+
+
+def iter_sections(fp) -> Iterator[Tuple[str, object]]:
+    """
+    Yield (key, value) for each top-level member. Array values are yielded as
+    generators and must be consumed before advancing to the next member.
+    """
+    reader = _Reader(fp)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if reader.peek() == "[":
+            items = reader.array()
+            yield key, items
+            for _ in items:  # drain whatever the caller did not consume
+                pass
+        else:
+            yield key, reader.value()
+        sep = reader.peek()
+        reader.pos += 1
+        if sep == "}":
+            return
+        if sep != ",":
+            raise ValueError("Malformed object")
+
+
+def _parse_datetime(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def post_row(item: dict, owner: str) -> dict:
+    """Map a legacy JSON post onto Post columns"""
+    content = item.get("content") or ""
+    status = item.get("status") or "pending"
+    try:
+        scheduled_at = parse_due_time(item.get("scheduled_time"))
+    except ValueError:
+        scheduled_at = None
+    platforms = item.get("platforms") or []
+    return {
+        "user_id": owner,
+        "title": content[:50],
+        "body": content,
+        "hashtags": ",".join(item.get("hashtags") or []),
+        "link_url": ",".join(item.get("media_urls") or []),
+        "page_name": platforms[0] if platforms else None,
+        "scheduled_for": item.get("scheduled_time"),
+        "scheduled_at": scheduled_at,
+        "publish_status": status,
+        "approved": status in ("approved", "published"),
+        "published": status == "published",
+        "legacy_id": item.get("id"),
+        "created_at": _parse_datetime(item.get("created_at")) or datetime.utcnow(),
+    }
+
+
+class Importer:
+    def __init__(self, db, owner: str, batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False):
+        self.db = db
+        self.owner = owner
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.counts = {"posts_read": 0, "posts_inserted": 0, "posts_skipped": 0, "keys_inserted": 0, "keys_updated": 0}
+
+    def _flush_posts(self, batch):
+        # created_at is only known for posts that carry it, so the legacy id is the key;
+        # a post without an id (hand-edited files) falls back to its body
+        imported = {
+            legacy_id
+            for (legacy_id,) in self.db.query(Post.legacy_id).filter(
+                Post.user_id == self.owner,
+                Post.legacy_id.in_([row["legacy_id"] for row in batch if row["legacy_id"] is not None])
+            )
+        }
+        # Rows written before legacy_id existed: adopt them instead of inserting a copy
+        unkeyed = {}
+        for post_id, body, created_at in self.db.query(Post.id, Post.body, Post.created_at).filter(
+            Post.user_id == self.owner,
+            Post.legacy_id.is_(None),
+            Post.body.in_({row["body"] for row in batch})
+        ):
+            unkeyed.setdefault((body, created_at), post_id)
+            unkeyed.setdefault(body, post_id)
+        new_rows, adopted = [], []
+        for row in batch:
+            legacy_id = row["legacy_id"]
+            if legacy_id is None:
+                if row["body"] in unkeyed:
+                    self.counts["posts_skipped"] += 1
+                    continue
+                unkeyed[row["body"]] = None  # duplicates inside the file itself
+            elif legacy_id in imported:
+                self.counts["posts_skipped"] += 1
+                continue
+            else:
+                imported.add(legacy_id)
+                post_id = unkeyed.pop((row["body"], row["created_at"]), None)
+                if post_id is not None:
+                    adopted.append({"id": post_id, "legacy_id": legacy_id})
+                    self.counts["posts_skipped"] += 1
+                    continue
+            new_rows.append(row)
+        if adopted and not self.dry_run:
+            self.db.execute(update(Post), adopted)
+        if new_rows and not self.dry_run:
+            ids = self.db.execute(insert(Post).returning(Post.id, sort_by_parameter_order=True), new_rows).scalars().all()
+            tags, media = [], []
+            for post_id, row in zip(ids, new_rows):
+                post_tags, post_media = backfill_rows(post_id, self.owner, row["hashtags"], row["link_url"])
+                tags.extend(post_tags)
+                media.extend(post_media)
+            if tags:
+                self.db.execute(insert(PostHashtag), tags)
+            if media:
+                self.db.execute(insert(PostMedia), media)
+        self.counts["posts_inserted"] += len(new_rows)
+        logger.info(
+            "posts: %d read, %d inserted, %d already present",
+            self.counts["posts_read"], self.counts["posts_inserted"], self.counts["posts_skipped"]
+        )
+
+    def import_posts(self, items):
+        batch = []
+        for item in items:
+            self.counts["posts_read"] += 1
+            batch.append(post_row(item, self.owner))
+            if len(batch) >= self.batch_size:
+                self._flush_posts(batch)
+                batch = []
+        if batch:
+            self._flush_posts(batch)
+
+    def import_api_keys(self, keys: dict):
+        for name, value in (keys or {}).items():
+            existing = self.db.query(AISettings).filter(
+                AISettings.user_id == self.owner,
+                AISettings.provider == name
+            ).first()
+            if existing:
+                if existing.api_key != value:
+                    if not self.dry_run:
+                        existing.api_key = value
+                    self.counts["keys_updated"] += 1
+            else:
+                if not self.dry_run:
+                    self.db.add(AISettings(user_id=self.owner, provider=name, api_key=value))
+                self.counts["keys_inserted"] += 1
+        logger.info("api_keys: %d inserted, %d updated", self.counts["keys_inserted"], self.counts["keys_updated"])
+
+
+def import_file(path: str, owner: str, batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False) -> dict:
+    """Import data.json in one transaction and return the counters"""
+    db = SessionLocal()
+    importer = Importer(db, owner, batch_size, dry_run)
+    try:
+        with open(path, "r") as fp:
+            for key, value in iter_sections(fp):
+                if key == "posts":
+                    importer.import_posts(value)
+                elif key == "api_keys":
+                    importer.import_api_keys(value)
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    return importer.counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import legacy data.json into SQLite")
+    parser.add_argument("--path", default=STORAGE_FILE)
+    parser.add_argument("--user", default="admin", help="owner of the imported posts and keys")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    run_migrations()
+    counts = import_file(args.path, args.user, args.batch_size, args.dry_run)
+    print(("Dry run: " if args.dry_run else "Imported: ") + ", ".join(f"{k}={v}" for k, v in counts.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,38 +2,54 @@
 Social Media Dashboard API with JWT Authentication + SQLite + AI
 """
 
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse, JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
+from fastapi.security import HTTPBearer
+from pydantic import BaseModel, Field
 from typing import List, Optional
-from datetime import datetime, timedelta
-from passlib.context import CryptContext
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+import hashlib
 import os
 import secrets
+import uuid
 import jwt
-import requests
 import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-from .metricool import MetricoolClient, get_client
-from .database import SessionLocal, engine
-from .models import User, AISettings, ResearchResult, ContentCalendar, Post as DBPost
+from .cache import AuthCache
+from .telemetry import MetricsMiddleware, metrics, mock_fallback, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from .passwords import password_hasher, PasswordQueueFull
+from .metricool import AsyncMetricoolClient, get_async_client, close_transports, build_scheduler_data, asend_scheduler_post, afetch_proxy_channels, lookup_cache, METRICOOL_INTERACTIVE_DEADLINE
+from .resilience import request_deadline
+from .database import SessionLocal, AsyncReadSessionLocal, async_engine, async_read_engine, run_write
+from .migrations import run_migrations
+from .models import User, RevokedToken, AISettings, ResearchResult, ContentCalendar, PublishJob, AnalyticsIngestState, Post as DBPost
+from .publish_queue import publish_workers, enqueue_publish, claim_posts, job_to_dict, apublish_many, PUBLISHABLE_STATUSES, BATCH_PUBLISH_CONCURRENCY
+from .scheduler import scheduler, parse_due_time, set_post_schedule, POST, CALENDAR, SCHEDULER_TIMEZONE, SCHEDULER_KEY_NAME
+from .ai import ai_cache, close_ai_client, AIProviderError, research_prompt, generate_prompt, RESEARCH_SYSTEM_PROMPT, GENERATE_SYSTEM_PROMPT, AI_RESEARCH_CACHE_TTL, AI_GENERATE_CACHE_TTL, AI_PROVIDER
+from .uploads import UPLOAD_DIR, UPLOAD_BASE_URL, store_stream, upload_url
+from .media import media_pipeline, is_image, variant_path, VARIANTS
+from .static import file_stat, serve_file
+from .post_index import set_post_hashtags, set_post_media, post_hashtag_labels, post_media_urls, top_hashtags, posts_with_tag
+from .search import search, SEARCH_TYPES
+from .analytics import analytics_ingestor, aingest as ingest_analytics, IngestRunning, state_to_dict, trends as analytics_trends, trend_range, ANALYTICS_WORKSPACE_ID
+from .calendar_view import summary as calendar_summary, day_items as calendar_day_items, parse_range as parse_calendar_range
+from .pagination import apaginate, astream_ndjson, encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 app = FastAPI(title="Social Media Dashboard API", version="4.0.0")
 
 # Create uploads directory
-UPLOAD_DIR = "/home/user/GitRepos/social-media-dashboard/backend/uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-# Metricool API via IP (bypass DNS)
-METRICOOL_HOST = "63.32.244.140"
-METRICOOL_BASE = f"https://{METRICOOL_HOST}"
-METRICOOL_HEADERS = {"Host": "app.metricool.com"}
-
 # Security
 security = HTTPBearer(auto_error=False)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # JWT Secret - change this in production!
 JWT_SECRET = "social-dashboard-secret-key-2024"
@@ -45,6 +61,10 @@ USERS = {
     "admin": "admin123"
 }
 
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_REVOCATION_RECHECK = float(os.getenv("AUTH_REVOCATION_RECHECK", "5"))  # seconds a cached token skips the revocation query
+auth_cache = AuthCache(max_size=AUTH_CACHE_SIZE, recheck_interval=AUTH_REVOCATION_RECHECK)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -52,42 +72,135 @@ def get_db():
     finally:
         db.close()
 
-def create_token(username: str) -> str:
-    """Create JWT token for user"""
+# Routes that read or wait on an upstream are async, so a slow Metricool/MiniMax
+# call or a page query holds no threadpool thread. A route that awaits an
+# upstream (or bcrypt) reads on a short-lived AsyncReadSessionLocal instead of
+# a dependency, so no pooled connection is held across the wait.
+# Short write transactions stay sync (get_db, or run_write from async code):
+# one uninterrupted thread run holds SQLite's write lock for less time than a
+# chain of awaited driver calls on a busy event loop.
+
+async def get_async_read_db():
+    """AsyncSession for read-only routes (read-only engine when DB_READ_ENGINE=1)"""
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+def create_token(username: str, version: int = 0) -> str:
+    """Create JWT token for user; `version` is the user's token_version"""
+    now = datetime.utcnow()
     payload = {
         "sub": username,
-        "exp": datetime.utcnow() + timedelta(days=30)
+        "jti": uuid.uuid4().hex,
+        "ver": version,
+        "iat": now,
+        "exp": now + timedelta(days=30)
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-def verify_token(credentials = Depends(security)):
-    """Verify JWT token"""
+def token_id(token: str, claims: dict) -> str:
+    """Key of a token in revoked_tokens (tokens issued before jti existed use their hash)"""
+    return claims.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+
+async def revoked_in_db(token: str, claims: dict) -> bool:
+    """Logged out, or issued before the user's last password change (any worker, any restart)"""
+    async with AsyncReadSessionLocal() as db:
+        version = await db.scalar(select(User.token_version).where(User.email == claims["sub"]))
+        if (version or 0) > claims.get("ver", 0):
+            return True
+        return await db.scalar(select(RevokedToken.jti).where(RevokedToken.jti == token_id(token, claims))) is not None
+
+async def verify_token(credentials = Depends(security)):
+    """Verify JWT token (async: a cached check is cheaper than a threadpool hop)"""
     if not credentials:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload["sub"]
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.InvalidTokenError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-
-def get_current_user(username: str = Depends(verify_token), db = Depends(get_db)):
-    """Get current user from database"""
-    user = db.query(User).filter(User.email == username).first()
-    if not user:
+    token = credentials.credentials
+    payload = auth_cache.get_claims(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(status_code=401, detail="Token expired")
+        except jwt.InvalidTokenError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        auth_cache.put_claims(token, payload)
+    
+    if auth_cache.is_revoked(token, payload):
+        raise HTTPException(status_code=401, detail="Token revoked")
+    if auth_cache.recheck_due(token):
+        if await revoked_in_db(token, payload):
+            auth_cache.revoke(token, payload.get("exp"))
+            raise HTTPException(status_code=401, detail="Token revoked")
+        auth_cache.checked(token)
+    return payload["sub"]
+
+async def get_current_user(username: str = Depends(verify_token)) -> Optional[User]:
+    """Detached snapshot of the current user (cached; otherwise read on a short-lived session)"""
+    cached = auth_cache.get_user(username)
+    if cached is not None:
+        return cached
+    
+    async with AsyncReadSessionLocal() as db:
+        user = await db.scalar(select(User).where(User.email == username))
+    if not user and username in USERS:
         # Fallback to creating user from hardcoded list
-        user = db.query(User).filter(User.email == username).first()
-        if not user:
-            # Check if it's a hardcoded user
-            if username in USERS:
-                user = User(email=username, name=username, password_hash=pwd_context.hash(USERS[username]))
-                db.add(user)
-                db.commit()
+        user = await run_write(create_user, username, username, await password_hasher.hash(USERS[username]))
+    if user:
+        user = detached_copy(user)
+        auth_cache.put_user(username, user)
     return user
 
+def create_user(db, email: str, name: str, password_hash: str) -> User:
+    user = User(email=email, name=name, password_hash=password_hash)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+def save_password(db, user_id: int, password_hash: str) -> int:
+    """Store a new hash and return the bumped token_version"""
+    # Bump in SQL: the cached user snapshot may hold a stale version
+    db.execute(update(User).where(User.id == user_id).values(password_hash=password_hash, token_version=User.token_version + 1))
+    db.commit()
+    return db.scalar(select(User.token_version).where(User.id == user_id))
+
+def detached_copy(user: User) -> User:
+    """Snapshot a loaded User into a detached instance safe to share across sessions"""
+    copy = User(id=user.id, email=user.email, name=user.name, password_hash=user.password_hash, token_version=user.token_version, created_at=user.created_at)
+    make_transient_to_detached(copy)
+    return copy
+
+@app.on_event("startup")
+def apply_migrations():
+    """Bring the database schema up to date before serving requests"""
+    run_migrations()
+    db = SessionLocal()
+    try:
+        ai_cache.purge_expired(db)
+        db.query(RevokedToken).filter(RevokedToken.expires_at <= datetime.utcnow()).delete()
+        db.commit()
+    finally:
+        db.close()
+
+@app.on_event("startup")
+def start_background_workers():
+    publish_workers.start()
+    scheduler.start()
+    analytics_ingestor.start()
+    ai_cache.start()
+
+@app.on_event("shutdown")
+async def close_http_pools():
+    analytics_ingestor.stop()
+    ai_cache.stop()
+    scheduler.stop()
+    publish_workers.stop()
+    media_pipeline.shutdown()
+    await close_transports()
+    await close_ai_client()
+    await async_engine.dispose()
+    await async_read_engine.dispose()
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -96,6 +209,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so its timings include CORS and exception handling
+app.add_middleware(MetricsMiddleware)
+
 # ============ Pydantic Models ============
 
 class LoginRequest(BaseModel):
@@ -106,6 +222,10 @@ class LoginResponse(BaseModel):
     token: str
     username: str
 
+class PasswordChangeRequest(BaseModel):
+    current_password: str
+    new_password: str
+
 class RegisterRequest(BaseModel):
     email: str
     password: str
@@ -129,6 +249,15 @@ class PostResponse(BaseModel):
     scheduled_time: Optional[str]
     created_at: str
     published_at: Optional[str] = None
+    thumbnail_urls: List[str] = []  # small variants of uploaded images, same order as media_urls
+
+class BatchPublishRequest(BaseModel):
+    post_ids: Optional[List[int]] = None  # omit to publish every post with `status`
+    status: str = "approved"
+    api_key: str
+    user_id: str = "4421531"
+    blog_id: str = "5704319"
+    concurrency: int = Field(default=BATCH_PUBLISH_CONCURRENCY, ge=1, le=50)
 
 class APIKeyCreate(BaseModel):
     name: str
@@ -141,25 +270,40 @@ class AISettingsCreate(BaseModel):
 
 class AIResearchRequest(BaseModel):
     query: str
+    force_refresh: bool = False
 
 class AIGenerateRequest(BaseModel):
     topic: str
     platform: str = "linkedin"
     tone: str = "professional"
+    force_refresh: bool = False
 
 # ============ Routes ============
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Route and upstream latency/error metrics in Prometheus text format"""
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/")
-def root():
+async def root():
     return {"message": "Social Media Dashboard API", "version": "4.0.0"}
 
 # ============ Authentication ============
 
+@app.exception_handler(PasswordQueueFull)
+async def password_queue_full(request, exc):
+    return JSONResponse(status_code=503, content={"detail": "Too many login attempts in progress, retry shortly"}, headers={"Retry-After": "1"})
+
+# Auth routes are async so password hashing waits on its own bounded executor
+# (app.passwords) instead of holding a threadpool thread for the whole bcrypt round.
+
 @app.post("/api/login", response_model=LoginResponse, tags=["auth"])
-def login(credentials: LoginRequest, db = Depends(get_db)):
+async def login(credentials: LoginRequest):
     """Login and get JWT token"""
-    # Check database first
-    user = db.query(User).filter(User.email == credentials.username).first()
+    # Check database first; the session is closed before bcrypt is awaited
+    async with AsyncReadSessionLocal() as db:
+        user = await db.scalar(select(User).where(User.email == credentials.username))
     
     if not user:
         # Fallback to hardcoded users
@@ -167,32 +311,66 @@ def login(credentials: LoginRequest, db = Depends(get_db)):
         if not user_password or not secrets.compare_digest(credentials.password, user_password):
             raise HTTPException(status_code=401, detail="Invalid credentials")
     else:
-        if not pwd_context.verify(credentials.password, user.password_hash):
+        if not await password_hasher.verify(credentials.password, user.password_hash):
             raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    token = create_token(credentials.username)
+    token = create_token(credentials.username, user.token_version if user else 0)
     return LoginResponse(token=token, username=credentials.username)
 
 @app.post("/api/register", response_model=LoginResponse, tags=["auth"])
-def register(credentials: RegisterRequest, db = Depends(get_db)):
+async def register(credentials: RegisterRequest):
     """Register a new user"""
-    # Check if user exists
-    existing = db.query(User).filter(User.email == credentials.email).first()
+    # Check if user exists; the session is closed before bcrypt is awaited
+    async with AsyncReadSessionLocal() as db:
+        existing = await db.scalar(select(User.id).where(User.email == credentials.email))
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new user
-    user = User(
-        email=credentials.email,
-        name=credentials.name or credentials.email.split('@')[0],
-        password_hash=pwd_context.hash(credentials.password)
-    )
-    db.add(user)
-    db.commit()
+    password_hash = await password_hasher.hash(credentials.password)
+    try:
+        await run_write(create_user, credentials.email, credentials.name or credentials.email.split('@')[0], password_hash)
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     
     token = create_token(credentials.email)
     return LoginResponse(token=token, username=credentials.email)
 
+@app.post("/api/logout", tags=["auth"])
+async def logout(credentials = Depends(security), username: str = Depends(verify_token)):
+    """Revoke the current token (stored, so it stays revoked across restarts and workers)"""
+    token = credentials.credentials
+    claims = auth_cache.get_claims(token) or jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    auth_cache.revoke(token, claims.get("exp"))
+    await run_write(save_revocation, token_id(token, claims), claims.get("exp"))
+    return {"message": "Logged out"}
+
+def save_revocation(db, jti: str, exp: Optional[float]):
+    expires_at = datetime.utcfromtimestamp(exp) if exp is not None else datetime.utcnow() + timedelta(days=30)
+    db.add(RevokedToken(jti=jti, expires_at=expires_at))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()  # already logged out
+
+@app.post("/api/password", response_model=LoginResponse, tags=["auth"])
+async def change_password(request: PasswordChangeRequest, user = Depends(get_current_user)):
+    """Change password; every previously issued token stops working"""
+    if not user or not await password_hasher.verify(request.current_password, user.password_hash):
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    
+    password_hash = await password_hasher.hash(request.new_password)
+    version = await run_write(save_password, user.id, password_hash)
+    auth_cache.invalidate_user(user.email, version)
+    
+    token = create_token(user.email, version)
+    return LoginResponse(token=token, username=user.email)
+
+@app.get("/api/auth/cache/stats", tags=["auth"])
+async def get_auth_cache_stats(username: str = Depends(verify_token)):
+    """Token/user cache and password executor counters"""
+    return {**auth_cache.stats(), "password_executor": password_hasher.stats()}
+
 # ============ AI Settings ============
 
 @app.post("/api/ai/settings", tags=["ai"])
@@ -219,9 +397,9 @@ def save_ai_settings(settings: AISettingsCreate, db = Depends(get_db), username:
     return {"message": "AI settings saved"}
 
 @app.get("/api/ai/settings", tags=["ai"])
-def get_ai_settings(db = Depends(get_db), username: str = Depends(verify_token)):
+async def get_ai_settings(db: AsyncSession = Depends(get_async_read_db), username: str = Depends(verify_token)):
     """Get AI provider settings"""
-    settings = db.query(AISettings).filter(AISettings.user_id == username).all()
+    settings = await db.scalars(select(AISettings).where(AISettings.user_id == username))
     return {"providers": [s.provider for s in settings]}
 
 @app.delete("/api/ai/settings/{provider}", tags=["ai"])
@@ -238,62 +416,82 @@ def delete_ai_settings(provider: str, db = Depends(get_db), username: str = Depe
 
 # ============ AI Research ============
 
-@app.post("/api/ai/research", tags=["ai"])
-def ai_research(request: AIResearchRequest, db = Depends(get_db), username: str = Depends(verify_token)):
-    """Research a topic using AI"""
-    # Get MiniMax settings
-    ai_settings = db.query(AISettings).filter(
-        AISettings.user_id == username,
-        AISettings.provider == "minimax"
-    ).first()
+# Keep proxies (nginx) from buffering token streams
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+async def get_minimax_key(username: str, detail: str = "MiniMax API key not configured") -> str:
+    """The user's MiniMax key, read on a short-lived session (AI routes must not hold a connection across the provider call)"""
+    if AI_PROVIDER == "stub":
+        return ""  # the stub provider answers locally and needs no key
+    async with AsyncReadSessionLocal() as db:
+        ai_settings = await db.scalar(select(AISettings).where(
+            AISettings.user_id == username,
+            AISettings.provider == "minimax"
+        ))
     
     if not ai_settings:
-        raise HTTPException(status_code=400, detail="MiniMax API key not configured. Add it in Settings.")
+        raise HTTPException(status_code=400, detail=detail)
+    return ai_settings.api_key
+
+def save_research(db, username: str, query: str, content: Optional[str]) -> ResearchResult:
+    research = ResearchResult(user_id=username, query=query, result=content or "")
+    db.add(research)
+    db.commit()
+    return research
+
+@app.post("/api/ai/research", tags=["ai"])
+async def ai_research(request: AIResearchRequest, username: str = Depends(verify_token)):
+    """Research a topic using AI (repeat queries are served from the response cache)"""
+    api_key = await get_minimax_key(username, "MiniMax API key not configured. Add it in Settings.")
     
-    # Call MiniMax API
     try:
-        response = requests.post(
-            "https://api.minimaxi.chat/v1/text/chatcompletion_v2",
-            headers={
-                "Authorization": f"Bearer {ai_settings.api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "MiniMax-Text-01",
-                "messages": [
-                    {"role": "system", "content": "You are a helpful research assistant. Provide detailed, accurate information."},
-                    {"role": "user", "content": f"Research and provide key information about: {request.query}"}
-                ]
-            },
-            timeout=60
+        content, cached = await ai_cache.acompletion(
+            api_key, RESEARCH_SYSTEM_PROMPT, research_prompt(request.query),
+            ttl=AI_RESEARCH_CACHE_TTL, force_refresh=request.force_refresh
         )
-        
-        if response.status_code == 200:
-            result = response.json()
-            content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
-            
-            # Save research result
-            research = ResearchResult(
-                user_id=username,
-                query=request.query,
-                result=content
-            )
-            db.add(research)
-            db.commit()
-            
-            return {"result": content, "query": request.query}
-        else:
-            raise HTTPException(status_code=400, detail=f"AI API error: {response.text}")
+    except AIProviderError as e:
+        raise HTTPException(status_code=400, detail=f"AI API error: {e.text}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    await run_write(save_research, username, request.query, content)
+    return {"result": content, "query": request.query, "cached": cached}
+
+@app.post("/api/ai/research/stream", tags=["ai"])
+async def ai_research_stream(request: AIResearchRequest, username: str = Depends(verify_token)):
+    """Research a topic, relaying tokens as server-sent events; the result is saved when the stream ends"""
+    api_key = await get_minimax_key(username, "MiniMax API key not configured. Add it in Settings.")
+    
+    def save_result(session, content):
+        research = save_research(session, username, request.query, content)
+        return {"id": research.id, "query": request.query}
+    
+    return StreamingResponse(
+        ai_cache.astream_sse(
+            api_key, RESEARCH_SYSTEM_PROMPT, research_prompt(request.query),
+            ttl=AI_RESEARCH_CACHE_TTL, force_refresh=request.force_refresh, on_complete=save_result
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+def research_to_dict(r: ResearchResult) -> dict:
+    return {"id": r.id, "query": r.query, "result": r.result, "created_at": r.created_at.isoformat() if r.created_at else None}
 
 @app.get("/api/ai/research", tags=["ai"])
-def get_research_history(db = Depends(get_db), username: str = Depends(verify_token)):
-    """Get research history"""
-    results = db.query(ResearchResult).filter(
-        ResearchResult.user_id == username
-    ).order_by(ResearchResult.created_at.desc()).limit(20).all()
-    return {"results": [{"id": r.id, "query": r.query, "result": r.result, "created_at": r.created_at.isoformat()} for r in results]}
+async def get_research_history(limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, stream: bool = False, db: AsyncSession = Depends(get_async_read_db), username: str = Depends(verify_token)):
+    """Get research history (newest first, cursor-paginated; stream=true returns NDJSON)"""
+    def build_query(session):
+        return session.query(ResearchResult).filter(ResearchResult.user_id == username)
+
+    if stream:
+        return StreamingResponse(
+            astream_ndjson(build_query, research_to_dict, ResearchResult.created_at, ResearchResult.id),
+            media_type="application/x-ndjson"
+        )
+
+    results, next_cursor = await apaginate(db, build_query, ResearchResult.created_at, ResearchResult.id, cursor, limit)
+    return {"results": [research_to_dict(r) for r in results], "next_cursor": next_cursor}
 
 @app.delete("/api/ai/research/{research_id}", tags=["ai"])
 def delete_research(research_id: int, db = Depends(get_db), username: str = Depends(verify_token)):
@@ -313,59 +511,40 @@ def delete_research(research_id: int, db = Depends(get_db), username: str = Depe
 # ============ AI Content Generation ============
 
 @app.post("/api/ai/generate", tags=["ai"])
-def ai_generate(request: AIGenerateRequest, db = Depends(get_db), username: str = Depends(verify_token)):
-    """Generate social media content using AI"""
-    # Get MiniMax settings
-    ai_settings = db.query(AISettings).filter(
-        AISettings.user_id == username,
-        AISettings.provider == "minimax"
-    ).first()
-    
-    if not ai_settings:
-        raise HTTPException(status_code=400, detail="MiniMax API key not configured")
-    
-    # Build prompt based on platform
-    platform_guidance = {
-        "linkedin": "Professional, B2B focused, no salesy language, subtle brand mentions only",
-        "twitter": "Concise, engaging, max 280 chars",
-        "instagram": "Visual storytelling, use emojis, engaging caption"
-    }
-    
-    prompt = f"""Generate a {request.platform} post about: {request.topic}
-Tone: {request.tone}
-Guidelines: {platform_guidance.get(request.platform, 'Professional')}
-Include relevant hashtags. Make it engaging but not salesy.
-"""
+async def ai_generate(request: AIGenerateRequest, username: str = Depends(verify_token)):
+    """Generate social media content using AI (repeat prompts are served from the response cache)"""
+    api_key = await get_minimax_key(username)
     
     try:
-        response = requests.post(
-            "https://api.minimaxi.chat/v1/text/chatcompletion_v2",
-            headers={
-                "Authorization": f"Bearer {ai_settings.api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "MiniMax-Text-01",
-                "messages": [
-                    {"role": "system", "content": "You are a social media content expert. Create engaging, professional posts that fit the platform style."},
-                    {"role": "user", "content": prompt}
-                ]
-            },
-            timeout=60
+        content, cached = await ai_cache.acompletion(
+            api_key, GENERATE_SYSTEM_PROMPT, generate_prompt(request.topic, request.platform, request.tone),
+            ttl=AI_GENERATE_CACHE_TTL, force_refresh=request.force_refresh
         )
-        
-        if response.status_code == 200:
-            result = response.json()
-            choices = result.get("choices")
-            if choices:
-                content = choices[0].get("message", {}).get("content", "")
-            else:
-                content = result.get("choices")
-            return {"content": content, "topic": request.topic, "platform": request.platform}
-        else:
-            raise HTTPException(status_code=400, detail=f"AI API error: {response.status_code} - {response.text[:200] if response.text else 'No response'}")
+    except AIProviderError as e:
+        raise HTTPException(status_code=400, detail=f"AI API error: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return {"content": content, "topic": request.topic, "platform": request.platform, "cached": cached}
+
+@app.post("/api/ai/generate/stream", tags=["ai"])
+async def ai_generate_stream(request: AIGenerateRequest, username: str = Depends(verify_token)):
+    """Generate social media content, relaying tokens as server-sent events"""
+    api_key = await get_minimax_key(username)
+    
+    return StreamingResponse(
+        ai_cache.astream_sse(
+            api_key, GENERATE_SYSTEM_PROMPT, generate_prompt(request.topic, request.platform, request.tone),
+            ttl=AI_GENERATE_CACHE_TTL, force_refresh=request.force_refresh,
+            on_complete=lambda session, content: {"topic": request.topic, "platform": request.platform}
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+@app.get("/api/ai/cache/stats", tags=["ai"])
+async def get_ai_cache_stats(db: AsyncSession = Depends(get_async_read_db), username: str = Depends(verify_token)):
+    """AI response cache hit/miss counters"""
+    return await db.run_sync(ai_cache.stats)
 
 # ============ Content Calendar ============
 
@@ -375,62 +554,122 @@ def schedule_content(content: str, scheduled_date: datetime, platform: str, db =
     calendar_entry = ContentCalendar(
         user_id=username,
         post_content=content,
-        scheduled_date=scheduled_date,
+        scheduled_date=parse_due_time(scheduled_date),
         platform=platform,
         status="scheduled"
     )
     db.add(calendar_entry)
     db.commit()
+    scheduler.notify(CALENDAR, calendar_entry.id, calendar_entry.scheduled_date)
     return {"message": "Content scheduled", "id": calendar_entry.id}
 
-@app.get("/api/calendar", tags=["calendar"])
-def get_calendar(start_date: Optional[datetime] = None, end_date: Optional[datetime] = None, db = Depends(get_db), username: str = Depends(verify_token)):
-    """Get content calendar"""
-    query = db.query(ContentCalendar).filter(ContentCalendar.user_id == username)
-    
-    if start_date:
-        query = query.filter(ContentCalendar.scheduled_date >= start_date)
-    if end_date:
-        query = query.filter(ContentCalendar.scheduled_date <= end_date)
-    
-    entries = query.order_by(ContentCalendar.scheduled_date).all()
-    return {"entries": [{
+def calendar_to_dict(e: ContentCalendar) -> dict:
+    return {
         "id": e.id,
         "content": e.post_content,
         "scheduled_date": e.scheduled_date.isoformat(),
         "platform": e.platform,
         "status": e.status
-    } for e in entries]}
+    }
+
+@app.get("/api/calendar", tags=["calendar"])
+async def get_calendar(start_date: Optional[datetime] = None, end_date: Optional[datetime] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, stream: bool = False, db: AsyncSession = Depends(get_async_read_db), username: str = Depends(verify_token)):
+    """Get content calendar (ordered by date, cursor-paginated; stream=true returns NDJSON)"""
+    def build_query(session):
+        query = session.query(ContentCalendar).filter(ContentCalendar.user_id == username)
+        if start_date:
+            query = query.filter(ContentCalendar.scheduled_date >= start_date)
+        if end_date:
+            query = query.filter(ContentCalendar.scheduled_date <= end_date)
+        return query
+
+    if stream:
+        return StreamingResponse(
+            astream_ndjson(build_query, calendar_to_dict, ContentCalendar.scheduled_date, ContentCalendar.id, descending=False),
+            media_type="application/x-ndjson"
+        )
+
+    entries, next_cursor = await apaginate(db, build_query, ContentCalendar.scheduled_date, ContentCalendar.id, cursor, limit, descending=False)
+    return {"entries": [calendar_to_dict(e) for e in entries], "next_cursor": next_cursor}
+
+def calendar_timezone(tz: Optional[str]) -> ZoneInfo:
+    try:
+        return ZoneInfo(tz or SCHEDULER_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail="Unknown timezone")
+
+@app.get("/api/calendar/summary", tags=["calendar"])
+async def get_calendar_summary(start_date: Optional[date] = None, end_date: Optional[date] = None, tz: Optional[str] = None, db: AsyncSession = Depends(get_async_read_db), username: str = Depends(verify_token)):
+    """Per-day, per-platform counts of calendar entries and scheduled posts (defaults to this month)"""
+    zone = calendar_timezone(tz)
+    try:
+        start, end = parse_calendar_range(start_date, end_date, zone)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await db.run_sync(calendar_summary, username, start, end, zone)
+
+@app.get("/api/calendar/day/{day}", tags=["calendar"])
+async def get_calendar_day(day: date, tz: Optional[str] = None, db: AsyncSession = Depends(get_async_read_db), username: str = Depends(verify_token)):
+    """Calendar entries and scheduled posts due on one day, with content"""
+    items = await db.run_sync(calendar_day_items, username, day, calendar_timezone(tz))
+    return {"date": day.isoformat(), "items": items}
+
+# ============ Search ============
+
+@app.get("/api/search", tags=["search"])
+async def search_content(q: str = Query(..., min_length=1, max_length=200), types: str = ",".join(SEARCH_TYPES), limit: int = Query(20, ge=1, le=100), cursor: Optional[str] = None, username: str = Depends(verify_token), db: AsyncSession = Depends(get_async_read_db)):
+    """Full-text search over posts, drafts and research (ranked, <mark>-highlighted, cursor-paginated)"""
+    wanted = {t.strip() for t in types.split(",") if t.strip()}
+    if not wanted or not wanted <= set(SEARCH_TYPES):
+        raise HTTPException(status_code=400, detail=f"types must be a comma-separated subset of: {', '.join(SEARCH_TYPES)}")
+    after = None
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor)
+        kind, _, score = sort_value.partition(":")
+        try:
+            after = (float(score), kind, last_id)
+        except ValueError:
+            after = None
+        if after is None or kind not in ("post", "research"):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    hits, next_after = await db.run_sync(search, username, q, wanted, after, limit)
+    next_cursor = encode_cursor(f"{next_after[1]}:{next_after[0]!r}", next_after[2]) if next_after else None
+    return {"results": hits, "next_cursor": next_cursor}
 
 # ============ File Upload ============
 
 @app.post("/api/upload", tags=["files"])
 async def upload_file(file: UploadFile = File(...), username: str = Depends(verify_token)):
-    """Upload a media file"""
+    """Upload a media file; identical content is stored once and shares one URL"""
     try:
-        timestamp = datetime.now().timestamp()
-        ext = file.filename.split('.')[-1] if '.' in file.filename else 'jpg'
-        filename = f"{timestamp}_{file.filename}"
-        filepath = os.path.join(UPLOAD_DIR, filename)
-        
-        content = await file.read()
-        with open(filepath, 'wb') as f:
-            f.write(content)
-        
-        file_url = f"http://100.101.67.20:8000/uploads/{filename}"
-        return {"url": file_url, "filename": filename}
+        filename, size, created = await run_in_threadpool(store_stream, file.file, file.filename)
+        if created:
+            media_pipeline.schedule_all(filename)
+        url = upload_url(filename)
+        variants = {name: f"{url}?variant={name}" for name in VARIANTS} if is_image(filename) else {}
+        return {"url": url, "filename": filename, "size": size, "deduplicated": not created, "variants": variants}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/uploads/{filename}")
-async def get_uploaded_file(filename: str):
-    """Serve uploaded files"""
-    filepath = os.path.join(UPLOAD_DIR, filename)
-    if not os.path.exists(filepath):
+@app.api_route("/uploads/{filename}", methods=["GET", "HEAD"])
+async def get_uploaded_file(filename: str, request: Request, variant: Optional[str] = None):
+    """Serve uploaded files (ETag/304, Range); variant=thumb|linkedin|instagram|twitter serves a resized copy"""
+    if variant is not None and variant not in VARIANTS:
+        raise HTTPException(status_code=400, detail=f"Unknown variant, expected one of: {', '.join(VARIANTS)}")
+    if variant:
+        path = variant_path(filename, variant)
+        fstat = file_stat(path, filename, variant)
+        if fstat is None and await media_pipeline.get(filename, variant):
+            fstat = file_stat(path, filename, variant)
+        if fstat is not None:
+            return serve_file(request, path, fstat)
+        # Not an image, or Pillow is missing: fall back to the original
+
+    path = os.path.join(UPLOAD_DIR, filename)
+    fstat = file_stat(path, filename)
+    if fstat is None:
         raise HTTPException(status_code=404, detail="File not found")
-    
-    from fastapi.responses import FileResponse
-    return FileResponse(filepath)
+    return serve_file(request, path, fstat)
 
 # ============ API Key Management ============
 
@@ -456,9 +695,9 @@ def save_api_key(key_data: APIKeyCreate, username: str = Depends(verify_token)):
         db.close()
 
 @app.get("/api/keys", tags=["keys"])
-def list_keys(db = Depends(get_db), username: str = Depends(verify_token)):
+async def list_keys(db: AsyncSession = Depends(get_async_read_db), username: str = Depends(verify_token)):
     """List saved API keys (names only)"""
-    keys = db.query(AISettings).filter(AISettings.user_id == username).all()
+    keys = await db.scalars(select(AISettings).where(AISettings.user_id == username))
     return {"keys": [k.provider for k in keys if k.provider not in ["minimax", "deepseek"]]}
 
 @app.delete("/api/keys/{name}", tags=["keys"])
@@ -487,28 +726,19 @@ def get_mock_channels():
     }
 
 @app.get("/api/metricool/channels")
-def get_metricool_channels(api_key: str, user_id: str = "4421531", blog_id: str = "5704319", username: str = Depends(verify_token)):
+async def get_metricool_channels(api_key: str, user_id: str = "4421531", blog_id: str = "5704319", username: str = Depends(verify_token)):
     """Proxy to Metricool channels API - uses userId/blogId instead of workspaces"""
     try:
-        resp = requests.get(
-            f"{METRICOOL_BASE}/api/v1/channels",
-            headers={**METRICOOL_HEADERS, "X-Mc-Auth": api_key},
-            params={"userId": user_id, "blogId": blog_id},
-            verify=False,
-            timeout=10
-        )
-        if resp.status_code == 200:
-            try:
-                return resp.json()
-            except:
-                return get_mock_channels()
-        else:
-            return get_mock_channels()
+        with mock_fallback(), request_deadline(METRICOOL_INTERACTIVE_DEADLINE):
+            return await lookup_cache.aget_or_load(
+                ("channels", api_key, user_id, blog_id),
+                lambda: afetch_proxy_channels(api_key, user_id, blog_id)
+            )
     except Exception as e:
         return get_mock_channels()
 
 @app.post("/api/metricool/posts")
-def create_metricool_post(post_data: dict = None, api_key: str = "4421531", user_id: str = "4421531", blog_id: str = "5704319", username: str = Depends(verify_token)):
+async def create_metricool_post(post_data: dict = None, api_key: str = "4421531", user_id: str = "4421531", blog_id: str = "5704319", username: str = Depends(verify_token)):
     """Proxy to Metricool create post API"""
     if post_data is None:
         post_data = {}
@@ -516,45 +746,13 @@ def create_metricool_post(post_data: dict = None, api_key: str = "4421531", user
     post_content = post_data.get("content", "")
     platforms = post_data.get("platforms", ["linkedin"])
     
-    providers = []
-    linkedin_data = {}
-    twitter_data = {"type": "POST"}
-    instagram_data = {"autoPublish": True}
-    tiktok_data = {}
-    
-    for p in platforms:
-        providers.append({"network": p})
-        if p == "linkedin":
-            linkedin_data = {"previewIncluded": True, "type": "POST"}
-    
     now = datetime.now()
     pub_date = now.strftime("%Y-%m-%dT%H:00:00")
-    
-    scheduler_data = {
-        "text": post_content,
-        "firstCommentText": "",
-        "providers": providers,
-        "autoPublish": True,
-        "saveExternalMediaFiles": False,
-        "shortener": False,
-        "draft": False,
-        "linkedinData": linkedin_data,
-        "twitterData": twitter_data,
-        "instagramData": instagram_data,
-        "tiktokData": tiktok_data,
-        "hasNotReadNotes": False,
-        "publicationDate": {"dateTime": pub_date, "timezone": "America/Maceio"}
-    }
+    scheduler_data = build_scheduler_data(post_content, platforms, pub_date)
     
     try:
-        resp = requests.post(
-            f"{METRICOOL_BASE}/api/v2/scheduler/posts",
-            headers={**METRICOOL_HEADERS, "X-Mc-Auth": api_key, "Content-Type": "application/json"},
-            params={"userId": user_id, "blogId": blog_id},
-            json=scheduler_data,
-            verify=False,
-            timeout=10
-        )
+        with mock_fallback(http_errors=False):
+            resp = await asend_scheduler_post(api_key, user_id, blog_id, scheduler_data)
         if resp.status_code == 200:
             return resp.json()
         else:
@@ -564,27 +762,33 @@ def create_metricool_post(post_data: dict = None, api_key: str = "4421531", user
 
 # ============ Metricool Integration ============
 
-def get_metricool_client(api_key: str) -> MetricoolClient:
+def get_metricool_client(api_key: str) -> AsyncMetricoolClient:
     if not api_key:
         raise HTTPException(status_code=401, detail="API key required")
-    return get_client(api_key)
+    return get_async_client(api_key)
 
 @app.get("/api/workspaces", tags=["metricool"])
-def get_workspaces(api_key: str, username: str = Depends(verify_token)):
+async def get_workspaces(api_key: str, username: str = Depends(verify_token)):
     """Get all workspaces"""
     client = get_metricool_client(api_key)
     try:
-        workspaces = client.get_workspaces()
+        with request_deadline(METRICOOL_INTERACTIVE_DEADLINE):
+            workspaces = await lookup_cache.aget_or_load(("workspaces", api_key), client.get_workspaces, cacheable=bool)
         return {"workspaces": workspaces}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/api/workspaces/{workspace_id}/channels", tags=["metricool"])
-def get_channels(workspace_id: str, api_key: str, username: str = Depends(verify_token)):
+async def get_channels(workspace_id: str, api_key: str, username: str = Depends(verify_token)):
     """Get channels for a workspace"""
     client = get_metricool_client(api_key)
     try:
-        channels = client.get_channels(workspace_id)
+        with mock_fallback(), request_deadline(METRICOOL_INTERACTIVE_DEADLINE):
+            channels = await lookup_cache.aget_or_load(
+                ("workspace_channels", api_key, workspace_id),
+                lambda: client.get_channels(workspace_id),
+                cacheable=bool
+            )
         return {"channels": channels}
     except Exception as e:
         return {"channels": [
@@ -594,8 +798,42 @@ def get_channels(workspace_id: str, api_key: str, username: str = Depends(verify
             {"id": "twitter_1", "name": "@simplydesserts", "platform": "twitter"}
         ]}
 
+# ============ Analytics ============
+
+@app.get("/api/analytics/trends", tags=["analytics"])
+async def get_analytics_trends(granularity: str = "day", start_date: Optional[date] = None, end_date: Optional[date] = None, network: Optional[str] = None, db: AsyncSession = Depends(get_async_read_db), username: str = Depends(verify_token)):
+    """Engagement growth per day or ISO week, read from the precomputed rollups"""
+    try:
+        start, end = trend_range(granularity, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await db.run_sync(analytics_trends, username, granularity, start, end, network)
+
+@app.get("/api/analytics/status", tags=["analytics"])
+async def get_analytics_status(db: AsyncSession = Depends(get_async_read_db), username: str = Depends(verify_token)):
+    """Ingestion watermark and last run per workspace"""
+    states = await db.scalars(select(AnalyticsIngestState).where(AnalyticsIngestState.user_id == username))
+    return {"workspaces": [state_to_dict(s) for s in states]}
+
+@app.post("/api/analytics/ingest", tags=["analytics"])
+async def run_analytics_ingest(workspace_id: str = ANALYTICS_WORKSPACE_ID, api_key: Optional[str] = None, username: str = Depends(verify_token)):
+    """Pull new Metricool metrics now (otherwise done every ANALYTICS_INGEST_INTERVAL seconds)"""
+    if not api_key:
+        async with AsyncReadSessionLocal() as db:
+            api_key = await db.scalar(select(AISettings.api_key).where(AISettings.user_id == username, AISettings.provider == SCHEDULER_KEY_NAME))
+        if not api_key:
+            raise HTTPException(status_code=400, detail=f"No '{SCHEDULER_KEY_NAME}' API key saved")
+    try:
+        return await ingest_analytics(username, api_key, workspace_id)
+    except IngestRunning as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Metricool metrics fetch failed: {e}")
+
 # ============ Posts Management (Database) ============
 
+MAX_BATCH_PUBLISH = 500
+
 @app.post("/api/posts", response_model=PostResponse, tags=["posts"])
 def create_post(post: PostCreate, api_key: str = None, username: str = Depends(verify_token), db = Depends(get_db)):
     """Create a new post"""
@@ -603,10 +841,10 @@ def create_post(post: PostCreate, api_key: str = None, username: str = Depends(v
         user_id=username,
         title=post.content[:50],
         body=post.content,
-        hashtags=",".join(post.hashtags or []),
-        link_url=",".join(post.media_urls or []),
         publish_status="pending"
     )
+    set_post_hashtags(new_post, post.hashtags)
+    set_post_media(new_post, post.media_urls)
     db.add(new_post)
     db.commit()
     db.refresh(new_post)
@@ -614,53 +852,85 @@ def create_post(post: PostCreate, api_key: str = None, username: str = Depends(v
     return PostResponse(
         id=new_post.id,
         content=new_post.body,
-        hashtags=post.hashtags or [],
-        media_urls=post.media_urls or [],
+        hashtags=post_hashtag_labels(new_post),
+        media_urls=post_media_urls(new_post),
+        thumbnail_urls=[thumbnail_url(url) for url in post_media_urls(new_post)],
         platforms=post.platforms or [],
         status=new_post.publish_status or "pending",
         scheduled_time=post.scheduled_time,
         created_at=new_post.created_at.isoformat() if new_post.created_at else datetime.now().isoformat()
     )
 
-@app.get("/api/posts", tags=["posts"])
-def list_posts(status: Optional[str] = None, username: str = Depends(verify_token), db = Depends(get_db)):
-    """List all posts"""
-    query = db.query(DBPost)
-    if username:
-        query = query.filter(DBPost.user_id == username)
-    if status:
-        query = query.filter(DBPost.publish_status == status)
-    
-    posts = query.order_by(DBPost.created_at.desc()).all()
-    
-    return {"posts": [PostResponse(
+def thumbnail_url(url: str) -> str:
+    """Thumbnail variant for files served from /uploads; other URLs are returned unchanged"""
+    if url.startswith(UPLOAD_BASE_URL + "/") and is_image(url) and "?" not in url:
+        return f"{url}?variant=thumb"
+    return url
+
+def post_to_response(p: DBPost) -> PostResponse:
+    media_urls = post_media_urls(p)
+    return PostResponse(
         id=p.id,
         content=p.body or "",
-        hashtags=p.hashtags.split(",") if p.hashtags else [],
-        media_urls=p.link_url.split(",") if p.link_url else [],
+        hashtags=post_hashtag_labels(p),
+        media_urls=media_urls,
+        thumbnail_urls=[thumbnail_url(url) for url in media_urls],
         platforms=[],
         status=p.publish_status or "draft",
         scheduled_time=p.scheduled_for,
         created_at=p.created_at.isoformat() if p.created_at else ""
-    ) for p in posts]}
+    )
+
+@app.get("/api/posts", tags=["posts"])
+async def list_posts(status: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, stream: bool = False, username: str = Depends(verify_token), db: AsyncSession = Depends(get_async_read_db)):
+    """List posts (newest first, cursor-paginated; stream=true returns NDJSON)"""
+    def build_query(session):
+        query = session.query(DBPost)
+        if username:
+            query = query.filter(DBPost.user_id == username)
+        if status:
+            query = query.filter(DBPost.publish_status == status)
+        return query
+
+    if stream:
+        return StreamingResponse(
+            astream_ndjson(build_query, lambda p: post_to_response(p).model_dump(), DBPost.created_at, DBPost.id),
+            media_type="application/x-ndjson"
+        )
+
+    posts, next_cursor = await apaginate(db, build_query, DBPost.created_at, DBPost.id, cursor, limit)
+    return {"posts": [post_to_response(p) for p in posts], "next_cursor": next_cursor}
+
+@app.get("/api/posts/counts", tags=["posts"])
+async def count_posts(username: str = Depends(verify_token), db: AsyncSession = Depends(get_async_read_db)):
+    """Number of posts per status, so the dashboard does not have to load every post"""
+    rows = await db.execute(
+        select(DBPost.publish_status, func.count()).where(DBPost.user_id == username).group_by(DBPost.publish_status)
+    )
+    by_status = {}
+    for status, count in rows:
+        by_status[status or "draft"] = by_status.get(status or "draft", 0) + count
+    return {"total": sum(by_status.values()), "by_status": by_status}
 
 @app.get("/api/posts/{post_id}", tags=["posts"])
-def get_post(post_id: int, username: str = Depends(verify_token), db = Depends(get_db)):
+async def get_post(post_id: int, username: str = Depends(verify_token), db: AsyncSession = Depends(get_async_read_db)):
     """Get a specific post"""
-    post = db.query(DBPost).filter(DBPost.id == post_id).first()
+    post = await db.get(DBPost, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
-    return PostResponse(
-        id=post.id,
-        content=post.body or "",
-        hashtags=post.hashtags.split(",") if post.hashtags else [],
-        media_urls=post.link_url.split(",") if post.link_url else [],
-        platforms=[],
-        status=post.publish_status or "draft",
-        scheduled_time=post.scheduled_for,
-        created_at=post.created_at.isoformat() if post.created_at else ""
-    )
+    return post_to_response(post)
+
+@app.get("/api/hashtags", tags=["posts"])
+async def list_hashtags(limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE), username: str = Depends(verify_token), db: AsyncSession = Depends(get_async_read_db)):
+    """Most used hashtags with post counts"""
+    return {"hashtags": await db.run_sync(top_hashtags, username, limit)}
+
+@app.get("/api/hashtags/{tag}/posts", tags=["posts"])
+async def list_posts_with_hashtag(tag: str, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, username: str = Depends(verify_token), db: AsyncSession = Depends(get_async_read_db)):
+    """Posts carrying a hashtag (with or without '#', case-insensitive), newest first"""
+    posts, next_cursor = await apaginate(db, lambda session: posts_with_tag(session, username, tag), DBPost.created_at, DBPost.id, cursor, limit)
+    return {"posts": [post_to_response(p) for p in posts], "next_cursor": next_cursor}
 
 @app.patch("/api/posts/{post_id}/approve", tags=["posts"])
 def approve_post(post_id: int, username: str = Depends(verify_token), db = Depends(get_db)):
@@ -687,56 +957,98 @@ def delete_post(post_id: int, username: str = Depends(verify_token), db = Depend
     db.commit()
     return {"message": "Post deleted"}
 
-@app.post("/api/posts/{post_id}/publish", tags=["posts"])
+@app.post("/api/posts/{post_id}/publish", status_code=202, tags=["posts"])
 def publish_post(post_id: int, api_key: str, user_id: str = "4421531", blog_id: str = "5704319", scheduled_time: Optional[str] = None, username: str = Depends(verify_token), db = Depends(get_db)):
-    """Publish a post via Metricool using userId/blogId"""
+    """Queue a post for publishing via Metricool; poll /api/jobs/{job_id} for the outcome"""
     post = db.query(DBPost).filter(DBPost.id == post_id).first()
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
-    if post.publish_status not in ["pending", "approved", "draft"]:
+    # Conditional claim: a concurrent publish or batch may have taken it since the read
+    if post.publish_status not in PUBLISHABLE_STATUSES or not claim_posts(db, [post.id]):
         raise HTTPException(status_code=400, detail="Post cannot be published")
     
-    # Call Metricool
-    platforms = ["linkedin"]
-    providers = [{"network": p} for p in platforms]
-    linkedin_data = {"previewIncluded": True, "type": "POST"} if "linkedin" in platforms else {}
-    
-    scheduler_data = {
-        "text": post.body,
-        "firstCommentText": "",
-        "providers": providers,
-        "autoPublish": True,
-        "saveExternalMediaFiles": False,
-        "shortener": False,
-        "draft": False,
-        "linkedinData": linkedin_data,
-        "twitterData": {"type": "POST"},
-        "instagramData": {"autoPublish": True},
-        "tiktokData": {},
-        "hasNotReadNotes": False,
-    }
+    job = enqueue_publish(db, post, {
+        "api_key": api_key,
+        "user_id": user_id,
+        "blog_id": blog_id,
+        "scheduled_time": scheduled_time,
+        "platforms": ["linkedin"]
+    })
+    db.commit()
+    publish_workers.notify()
+    return {"message": "Post queued for publishing", "job_id": job.id, "status": job.status}
+
+@app.post("/api/posts/publish-batch", tags=["posts"])
+async def publish_batch(request: BatchPublishRequest, username: str = Depends(verify_token)):
+    """Publish many posts at once, sending them to Metricool concurrently (rate-limited posts are queued instead)"""
+    query = select(DBPost).where(DBPost.user_id == username)
+    if request.post_ids is not None:
+        query = query.where(DBPost.id.in_(request.post_ids))
+    else:
+        query = query.where(DBPost.publish_status == request.status)
+    # A short-lived session: its connection goes back to the pool before the sends are awaited
+    async with AsyncReadSessionLocal() as db:
+        posts = (await db.scalars(query.limit(MAX_BATCH_PUBLISH + 1))).all()
+    if len(posts) > MAX_BATCH_PUBLISH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_PUBLISH} posts per batch")
     
-    try:
-        resp = requests.post(
-            f"{METRICOOL_BASE}/api/v2/scheduler/posts",
-            headers={**METRICOOL_HEADERS, "X-Mc-Auth": api_key, "Content-Type": "application/json"},
-            params={"userId": user_id, "blogId": blog_id},
-            json=scheduler_data,
-            verify=False,
-            timeout=10
-        )
-        
-        if resp.status_code == 200:
-            post.publish_status = "published"
-            db.commit()
-            return {"message": "Post published to Metricool!", "result": resp.json()}
+    results = {}
+    publishable = []
+    for post in posts:
+        if post.publish_status in PUBLISHABLE_STATUSES:
+            publishable.append(post)
         else:
-            raise Exception(resp.text[:200])
-    except Exception as e:
-        post.publish_status = "published"
-        db.commit()
-        return {"message": "Post published (mock)", "error": str(e)}
+            results[post.id] = {"post_id": post.id, "ok": False, "status": post.publish_status, "error": "Post cannot be published"}
+    for post_id in set(request.post_ids or []) - {p.id for p in posts}:
+        results[post_id] = {"post_id": post_id, "ok": False, "status": None, "error": "Post not found"}
+    
+    # Claim before sending so a concurrent publish of the same post is refused
+    def claim(session):
+        claimed = claim_posts(session, [p.id for p in publishable])
+        session.commit()
+        return claimed
+
+    claimed = set(await run_write(claim))
+    for post in publishable:
+        if post.id not in claimed:
+            results[post.id] = {"post_id": post.id, "ok": False, "status": "publishing", "error": "Post is already being published"}
+    
+    payload = {"api_key": request.api_key, "user_id": request.user_id, "blog_id": request.blog_id, "platforms": ["linkedin"]}
+    outcomes = await apublish_many([(p.id, p.body) for p in publishable if p.id in claimed], payload, request.concurrency)
+    
+    # Record every outcome in one transaction; posts that certainly were not published go to the publish queue
+    def record_outcomes(session):
+        for post in session.query(DBPost).filter(DBPost.id.in_(list(outcomes))):
+            status, detail = outcomes[post.id]
+            if status == "queued":
+                job = enqueue_publish(session, post, payload, delay=detail)
+                results[post.id] = {"post_id": post.id, "ok": False, "status": "queued", "job_id": job.id}
+            elif status == "published":
+                post.publish_status = "published"
+                post.published = True
+                post.last_error = None
+                results[post.id] = {"post_id": post.id, "ok": True, "status": "published", "result": detail}
+            else:
+                post.publish_status = status
+                post.last_error = detail
+                results[post.id] = {"post_id": post.id, "ok": False, "status": status, "error": detail}
+        session.commit()
+
+    await run_write(record_outcomes)
+    publish_workers.notify()
+    
+    published = sum(1 for r in results.values() if r["ok"])
+    queued = sum(1 for r in results.values() if r["status"] == "queued")
+    return {"published": published, "queued": queued, "failed": len(results) - published - queued, "results": list(results.values())}
+
+@app.get("/api/jobs/{job_id}", tags=["posts"])
+async def get_publish_job(job_id: int, username: str = Depends(verify_token), db: AsyncSession = Depends(get_async_read_db)):
+    """Get the status of a publish job"""
+    job = await db.scalar(select(PublishJob).where(PublishJob.id == job_id, PublishJob.user_id == username))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_dict(job)
 
 # ============ Drafts (Staging) ============
 
@@ -746,38 +1058,55 @@ class DraftCreate(BaseModel):
     hashtags: Optional[str] = ""
     scheduled_date: Optional[str] = None
 
+def apply_schedule(post: DBPost, scheduled_for: Optional[str]):
+    try:
+        set_post_schedule(post, scheduled_for)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid scheduled_date, expected ISO 8601")
+
 @app.post("/api/drafts", tags=["drafts"])
 def save_draft(draft: DraftCreate, username: str = Depends(verify_token), db = Depends(get_db)):
     """Save content as a draft"""
     new_draft = DBPost(
         user_id=username,
         body=draft.content,
-        hashtags=draft.hashtags,
         page_name=draft.platform,
-        publish_status="draft",
-        scheduled_for=draft.scheduled_date
+        publish_status="draft"
     )
+    set_post_hashtags(new_draft, draft.hashtags, raw=draft.hashtags)
+    apply_schedule(new_draft, draft.scheduled_date)
     db.add(new_draft)
     db.commit()
     db.refresh(new_draft)
     return {"message": "Draft saved", "id": new_draft.id, "draft": new_draft}
 
-@app.get("/api/drafts", tags=["drafts"])
-def get_drafts(username: str = Depends(verify_token), db = Depends(get_db)):
-    """Get all drafts"""
-    drafts = db.query(DBPost).filter(
-        DBPost.user_id == username,
-        DBPost.publish_status == "draft"
-    ).order_by(DBPost.created_at.desc()).all()
-    
-    return {"drafts": [{
+def draft_to_dict(d: DBPost) -> dict:
+    return {
         "id": d.id,
         "content": d.body,
         "platform": d.page_name or "linkedin",
         "hashtags": d.hashtags,
         "scheduled_date": d.scheduled_for,
         "created_at": d.created_at.isoformat() if d.created_at else None
-    } for d in drafts]}
+    }
+
+@app.get("/api/drafts", tags=["drafts"])
+async def get_drafts(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, stream: bool = False, username: str = Depends(verify_token), db: AsyncSession = Depends(get_async_read_db)):
+    """Get drafts (newest first, cursor-paginated; stream=true returns NDJSON)"""
+    def build_query(session):
+        return session.query(DBPost).filter(
+            DBPost.user_id == username,
+            DBPost.publish_status == "draft"
+        )
+
+    if stream:
+        return StreamingResponse(
+            astream_ndjson(build_query, draft_to_dict, DBPost.created_at, DBPost.id),
+            media_type="application/x-ndjson"
+        )
+
+    drafts, next_cursor = await apaginate(db, build_query, DBPost.created_at, DBPost.id, cursor, limit)
+    return {"drafts": [draft_to_dict(d) for d in drafts], "next_cursor": next_cursor}
 
 @app.patch("/api/drafts/{draft_id}", tags=["drafts"])
 def update_draft(draft_id: int, draft: DraftCreate, username: str = Depends(verify_token), db = Depends(get_db)):
@@ -793,8 +1122,8 @@ def update_draft(draft_id: int, draft: DraftCreate, username: str = Depends(veri
     
     post.body = draft.content
     post.page_name = draft.platform
-    post.hashtags = draft.hashtags
-    post.scheduled_for = draft.scheduled_date
+    set_post_hashtags(post, draft.hashtags, raw=draft.hashtags)
+    apply_schedule(post, draft.scheduled_date)
     db.commit()
     
     return {"message": "Draft updated", "id": post.id}
@@ -827,8 +1156,11 @@ def schedule_draft(draft_id: int, scheduled_date: str, username: str = Depends(v
     if not post:
         raise HTTPException(status_code=404, detail="Draft not found")
     
+    apply_schedule(post, scheduled_date)
+    if post.scheduled_at is None:
+        raise HTTPException(status_code=400, detail="scheduled_date is required")
     post.publish_status = "scheduled"
-    post.scheduled_for = scheduled_date
     db.commit()
+    scheduler.notify(POST, post.id, post.scheduled_at)
     
     return {"message": "Draft scheduled", "id": post.id, "scheduled_date": scheduled_date}
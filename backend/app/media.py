@@ -0,0 +1,136 @@
+"""
+Resized image variants (thumbnails and per-platform sizes) built in a process pool
+
+Variants are rendered once, after upload or on first request, and cached on
+disk next to the originals under UPLOAD_DIR/variants/<variant>/. Resizing
+runs in MEDIA_WORKERS separate processes, so it never blocks the event loop
+or competes with request threads for the GIL.
+
+Pillow is optional. Without it no variants are built, and `?variant=`
+requests are answered with the original file.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Optional
+
+from .uploads import UPLOAD_DIR
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - optional dependency
+    Image = ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+MEDIA_WORKERS = int(os.getenv("MEDIA_WORKERS", "2"))
+VARIANT_DIR = os.path.join(UPLOAD_DIR, "variants")
+VARIANT_QUALITY = 85
+
+# name -> (width, height, mode); "fit" keeps the aspect ratio inside the box, "crop" fills it
+VARIANTS = {
+    "thumb": (320, 320, "fit"),
+    "linkedin": (1200, 627, "crop"),
+    "instagram": (1080, 1080, "crop"),
+    "twitter": (1600, 900, "fit"),
+}
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def is_image(filename: str) -> bool:
+    return os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS
+
+
+def variant_path(filename: str, variant: str) -> str:
+    return os.path.join(VARIANT_DIR, variant, filename)
+
+
+def render_variant(source: str, target: str, variant: str) -> str:
+    """Resize source into target; runs inside a worker process"""
+    width, height, mode = VARIANTS[variant]
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        if mode == "crop":
+            img = ImageOps.fit(img, (width, height), Image.LANCZOS)
+        else:
+            img.thumbnail((width, height), Image.LANCZOS)
+        ext = os.path.splitext(target)[1].lower()
+        if ext in (".jpg", ".jpeg") and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.part"
+        img.save(tmp, format=Image.registered_extensions()[ext], quality=VARIANT_QUALITY, optimize=True)
+    os.replace(tmp, target)
+    return target
+
+
+class MediaPipeline:
+    """Deduplicates variant renders and runs them on a process pool"""
+
+    def __init__(self, workers: int = MEDIA_WORKERS):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn, not fork: the parent has scheduler and worker threads running
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def submit(self, filename: str, variant: str) -> Future:
+        """Start (or join) the render of one variant"""
+        key = (filename, variant)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._executor().submit(
+                    render_variant, os.path.join(UPLOAD_DIR, filename), variant_path(filename, variant), variant
+                )
+                self._inflight[key] = future
+                future.add_done_callback(lambda f: self._done(key, f))
+            return future
+
+    def _done(self, key, future: Future):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if future.exception() is not None:
+            logger.warning("Building %s variant of %s failed: %s", key[1], key[0], future.exception())
+
+    def schedule_all(self, filename: str):
+        """Queue every variant of a freshly uploaded image in the background"""
+        if not self.available or not is_image(filename):
+            return
+        for variant in VARIANTS:
+            if not os.path.exists(variant_path(filename, variant)):
+                self.submit(filename, variant)
+
+    async def get(self, filename: str, variant: str) -> Optional[str]:
+        """Path of the variant, rendering it if needed; None when it cannot be built"""
+        path = variant_path(filename, variant)
+        if os.path.exists(path):
+            return path
+        if not self.available or not is_image(filename):
+            return None
+        try:
+            return await asyncio.wrap_future(self.submit(filename, variant))
+        except Exception:
+            return None
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+media_pipeline = MediaPipeline()
@@ -2,38 +2,286 @@
 Metricool API Client for Social Media Dashboard
 """
 
+import asyncio
 import os
-import requests
-from typing import Dict, List, Optional
+import threading
+import time
+import httpx
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .cache import TTLCache
+from .ratelimit import RateLimitedError, RateLimiter, TokenBucket, parse_limits, parse_retry_after
+from .resilience import IDEMPOTENT_METHODS, CircuitOpenError, RetryPolicy, current_deadline, get_breaker, remaining
+from .telemetry import metrics, upstream_call
+
+METRICOOL_API_BASE = os.getenv("METRICOOL_API_BASE", "https://api.metricool.com")
+
+# Metricool app API via IP (bypass DNS)
+METRICOOL_HOST = "63.32.244.140"
+METRICOOL_BASE = os.getenv("METRICOOL_BASE", f"https://{METRICOOL_HOST}")
+METRICOOL_HEADERS = {"Host": "app.metricool.com"}
+METRICOOL_TIMEZONE = "America/Maceio"
+
+# Connection pool settings shared by every Metricool call
+METRICOOL_MAX_CONNECTIONS = int(os.getenv("METRICOOL_MAX_CONNECTIONS", "20"))
+METRICOOL_MAX_KEEPALIVE = int(os.getenv("METRICOOL_MAX_KEEPALIVE", "10"))
+METRICOOL_KEEPALIVE_EXPIRY = float(os.getenv("METRICOOL_KEEPALIVE_EXPIRY", "30"))
+METRICOOL_TIMEOUT = float(os.getenv("METRICOOL_TIMEOUT", "10"))  # per attempt
+
+# Failure handling: a call (all attempts) must finish within METRICOOL_DEADLINE
+# unless the caller set a tighter request_deadline(). Idempotent calls are retried
+# with jittered backoff; each host's breaker opens after consecutive failures.
+METRICOOL_DEADLINE = float(os.getenv("METRICOOL_DEADLINE", "15"))
+METRICOOL_INTERACTIVE_DEADLINE = float(os.getenv("METRICOOL_INTERACTIVE_DEADLINE", "3"))  # routes with a mock fallback
+METRICOOL_RETRIES = int(os.getenv("METRICOOL_RETRIES", "2"))
+METRICOOL_RETRY_BASE = float(os.getenv("METRICOOL_RETRY_BASE", "0.2"))
+METRICOOL_RETRY_MAX = float(os.getenv("METRICOOL_RETRY_MAX", "2"))
+METRICOOL_BREAKER_THRESHOLD = int(os.getenv("METRICOOL_BREAKER_THRESHOLD", "5"))
+METRICOOL_BREAKER_RESET = float(os.getenv("METRICOOL_BREAKER_RESET", "30"))
+
+retry_policy = RetryPolicy(METRICOOL_RETRIES, METRICOOL_RETRY_BASE, METRICOOL_RETRY_MAX)
+
+# Outbound rate limits per API key and endpoint class: class=requests per second/burst.
+# Sync callers wait at most METRICOOL_RATE_MAX_WAIT for a token (async ones up to the
+# deadline), then get RateLimitedError; the publish queue defers such jobs.
+METRICOOL_RATE_LIMITS = parse_limits(os.getenv("METRICOOL_RATE_LIMITS", "read=10/20,write=2/5,analytics=5/10"))
+METRICOOL_RATE_MAX_WAIT = float(os.getenv("METRICOOL_RATE_MAX_WAIT", "2"))
+
+rate_limiter = RateLimiter(METRICOOL_RATE_LIMITS, default=METRICOOL_RATE_LIMITS.get("write", (2, 5)))
+
+# Failures that happen before the request is sent; safe to retry for any method
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# Channel/workspace lookups rarely change; serve them from memory
+METRICOOL_CACHE_TTL = float(os.getenv("METRICOOL_CACHE_TTL", "300"))
+METRICOOL_CACHE_STALE_TTL = float(os.getenv("METRICOOL_CACHE_STALE_TTL", "3600"))
+METRICOOL_CACHE_SIZE = int(os.getenv("METRICOOL_CACHE_SIZE", "1024"))
+
+lookup_cache = TTLCache(max_size=METRICOOL_CACHE_SIZE, ttl=METRICOOL_CACHE_TTL, stale_ttl=METRICOOL_CACHE_STALE_TTL)
+
+METRICOOL_METRICS_PAGE_SIZE = int(os.getenv("METRICOOL_METRICS_PAGE_SIZE", "200"))
+
+
+class MetricoolTransport:
+    """
+    Pooled keep-alive HTTP transport for one Metricool base URL.
+
+    The sync client is shared across request threads; the async client is
+    created lazily on first use from the event loop. Both reuse connections,
+    so only the first call to a host pays for the TCP+TLS handshake.
+
+    Every call takes a token from its API key's rate limit bucket, goes
+    through the host's circuit breaker, is bounded by the current deadline
+    and is retried (idempotent methods, connection failures and 5xx; any
+    method after a 429) while the retry policy and the deadline allow.
+    """
+
+    def __init__(self, base_url: str, verify: bool = True, headers: Optional[Dict] = None, name: str = "metricool"):
+        self.base_url = base_url
+        self.name = name  # upstream label on call metrics
+        self.verify = verify
+        self.headers = headers or {}
+        self.limits = httpx.Limits(
+            max_connections=METRICOOL_MAX_CONNECTIONS,
+            max_keepalive_connections=METRICOOL_MAX_KEEPALIVE,
+            keepalive_expiry=METRICOOL_KEEPALIVE_EXPIRY
+        )
+        self.breaker = get_breaker(urlparse(base_url).netloc, METRICOOL_BREAKER_THRESHOLD, METRICOOL_BREAKER_RESET)
+        self.retry = retry_policy
+        self._client = None
+        self._async_client = None
+        self._lock = threading.Lock()
+
+    def _client_kwargs(self) -> Dict:
+        return {
+            "base_url": self.base_url,
+            "verify": self.verify,
+            "headers": self.headers,
+            "limits": self.limits,
+            "timeout": METRICOOL_TIMEOUT
+        }
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(**self._client_kwargs())
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(**self._client_kwargs())
+        return self._async_client
+
+    def _bucket(self, method: str, endpoint: str, kwargs: Dict) -> Tuple[TokenBucket, str]:
+        api_key = (kwargs.get("headers") or {}).get("X-Mc-Auth") or self.headers.get("X-Mc-Auth", "")
+        endpoint_class = classify_endpoint(method, endpoint)
+        return rate_limiter.bucket(api_key, endpoint_class), endpoint_class
+
+    def _reserve(self, bucket: TokenBucket, endpoint_class: str, max_wait: float) -> float:
+        """Take a token; returns the seconds to wait for it or raises RateLimitedError"""
+        granted, wait = bucket.reserve(max_wait)
+        if not granted:
+            metrics.rate_limited.inc((self.name, endpoint_class, "local"))
+            raise RateLimitedError(f"{self.name} {endpoint_class}", wait)
+        metrics.rate_limit_wait.observe((self.name, endpoint_class), wait)
+        return wait
+
+    def _settle(self, method: str, endpoint: str, attempt: int, deadline: float, bucket: TokenBucket, endpoint_class: str, reserved_at: float, response: Optional[httpx.Response] = None, error: Optional[Exception] = None) -> Optional[float]:
+        """Report one attempt to the breaker and bucket; returns the delay before retrying it, or None"""
+        if response is not None and response.status_code == 429:
+            # Throttled, not down: the request was not processed and the bucket provides the wait
+            self.breaker.release()
+            bucket.throttled(parse_retry_after(response.headers.get("Retry-After")), reserved_at)
+            metrics.rate_limited.inc((self.name, endpoint_class, "upstream"))
+            if attempt > self.retry.retries:
+                return None
+            metrics.upstream_retries.inc((self.name, method, endpoint))
+            return 0.0
+        if error is None and response.status_code < 500:
+            self.breaker.record_success()
+            bucket.accepted()
+            return None
+        self.breaker.record_failure()
+        retryable = method in IDEMPOTENT_METHODS or isinstance(error, NOT_SENT_ERRORS)
+        delay = self.retry.delay(attempt, deadline, retryable)
+        if delay is not None:
+            metrics.upstream_retries.inc((self.name, method, endpoint))
+        return delay
+
+    def request(self, method: str, path: str, endpoint: Optional[str] = None, **kwargs) -> httpx.Response:
+        """
+        Send one request; `endpoint` is the path template used as the metrics
+        label. Raises CircuitOpenError without calling out while the host's
+        breaker is open, DeadlineExceeded once the budget is spent and
+        RateLimitedError when no token frees up within METRICOOL_RATE_MAX_WAIT.
+        """
+        endpoint = endpoint or path
+        deadline = current_deadline(METRICOOL_DEADLINE)
+        bucket, endpoint_class = self._bucket(method, endpoint, kwargs)
+        attempt = 1
+        while True:
+            reserved_at = time.monotonic()
+            wait = self._reserve(bucket, endpoint_class, min(METRICOOL_RATE_MAX_WAIT, remaining(deadline)))
+            if wait:
+                time.sleep(wait)
+            timeout = min(METRICOOL_TIMEOUT, remaining(deadline))
+            try:
+                with upstream_call(self.name, method, endpoint) as call:
+                    self.breaker.before_call()
+                    response = self.client.request(method, path, timeout=timeout, **kwargs)
+                    call["status"] = response.status_code
+            except httpx.TransportError as e:
+                delay = self._settle(method, endpoint, attempt, deadline, bucket, endpoint_class, reserved_at, error=e)
+                if delay is None:
+                    raise
+            except CircuitOpenError:
+                raise
+            except BaseException:
+                self.breaker.release()
+                raise
+            else:
+                delay = self._settle(method, endpoint, attempt, deadline, bucket, endpoint_class, reserved_at, response=response)
+                if delay is None:
+                    return response
+                response.close()
+            if delay:
+                time.sleep(delay)
+            attempt += 1
+
+    async def arequest(self, method: str, path: str, endpoint: Optional[str] = None, **kwargs) -> httpx.Response:
+        endpoint = endpoint or path
+        deadline = current_deadline(METRICOOL_DEADLINE)
+        bucket, endpoint_class = self._bucket(method, endpoint, kwargs)
+        attempt = 1
+        while True:
+            reserved_at = time.monotonic()
+            wait = self._reserve(bucket, endpoint_class, remaining(deadline))
+            if wait:
+                await asyncio.sleep(wait)
+            timeout = min(METRICOOL_TIMEOUT, remaining(deadline))
+            try:
+                with upstream_call(self.name, method, endpoint) as call:
+                    self.breaker.before_call()
+                    response = await self.async_client.request(method, path, timeout=timeout, **kwargs)
+                    call["status"] = response.status_code
+            except httpx.TransportError as e:
+                delay = self._settle(method, endpoint, attempt, deadline, bucket, endpoint_class, reserved_at, error=e)
+                if delay is None:
+                    raise
+            except CircuitOpenError:
+                raise
+            except BaseException:
+                self.breaker.release()
+                raise
+            else:
+                delay = self._settle(method, endpoint, attempt, deadline, bucket, endpoint_class, reserved_at, response=response)
+                if delay is None:
+                    return response
+                await response.aclose()
+            if delay:
+                await asyncio.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self):
+        self.close()
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+
+_transports: Dict = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(base_url: str = METRICOOL_API_BASE, verify: bool = True, headers: Optional[Dict] = None, name: str = "metricool") -> MetricoolTransport:
+    """Get the shared transport for a base URL, creating it on first use"""
+    key = (base_url, verify, tuple(sorted((headers or {}).items())))
+    transport = _transports.get(key)
+    if transport is None:
+        with _transports_lock:
+            transport = _transports.get(key)
+            if transport is None:
+                transport = MetricoolTransport(base_url, verify=verify, headers=headers, name=name)
+                _transports[key] = transport
+    return transport
+
+
+async def close_transports():
+    """Close every pooled connection (called on app shutdown)"""
+    for transport in list(_transports.values()):
+        await transport.aclose()
 
-METRICOOL_API_BASE = "https://api.metricool.com"
 
 class MetricoolClient:
     """Client for interacting with Metricool API"""
-    
-    def __init__(self, api_key: str):
+
+    def __init__(self, api_key: str, transport: Optional[MetricoolTransport] = None):
         self.api_key = api_key
+        self.transport = transport or get_transport()
         self.headers = {
             "X-Mc-Auth": api_key,
             "Content-Type": "application/json"
         }
-    
+
     def get_workspaces(self) -> List[Dict]:
         """Get all workspaces/brands"""
-        response = requests.get(
-            f"{METRICOOL_API_BASE}/workspaces",
-            headers=self.headers
-        )
+        response = self.transport.request("GET", "/workspaces", headers=self.headers)
         return response.json().get("data", [])
-    
+
     def get_channels(self, workspace_id: str) -> List[Dict]:
         """Get all social channels in a workspace"""
-        response = requests.get(
-            f"{METRICOOL_API_BASE}/workspaces/{workspace_id}/channels",
-            headers=self.headers
-        )
+        response = self.transport.request("GET", f"/workspaces/{workspace_id}/channels", endpoint="/workspaces/{workspace_id}/channels", headers=self.headers)
         return response.json().get("data", [])
-    
+
     def create_post(
         self,
         workspace_id: str,
@@ -43,58 +291,245 @@ class MetricoolClient:
         media_urls: Optional[List[str]] = None
     ) -> Dict:
         """Create and optionally schedule a post"""
-        
-        post_data = {
-            "content": content,
-            "channels": channel_ids
-        }
-        
-        if scheduled_time:
-            post_data["scheduled_time"] = scheduled_time
-        
-        if media_urls:
-            post_data["media"] = [{"url": url} for url in media_urls]
-        
-        response = requests.post(
-            f"{METRICOOL_API_BASE}/workspaces/{workspace_id}/posts",
+        response = self.transport.request(
+            "POST",
+            f"/workspaces/{workspace_id}/posts",
+            endpoint="/workspaces/{workspace_id}/posts",
             headers=self.headers,
-            json=post_data
+            json=build_post_data(content, channel_ids, scheduled_time, media_urls)
         )
-        
         return response.json()
-    
+
     def get_posts(self, workspace_id: str, status: Optional[str] = None) -> List[Dict]:
         """Get posts for a workspace"""
         params = {}
         if status:
             params["status"] = status
-            
-        response = requests.get(
-            f"{METRICOOL_API_BASE}/workspaces/{workspace_id}/posts",
+
+        response = self.transport.request(
+            "GET",
+            f"/workspaces/{workspace_id}/posts",
+            endpoint="/workspaces/{workspace_id}/posts",
             headers=self.headers,
             params=params
         )
         return response.json().get("data", [])
-    
+
     def publish_post(self, workspace_id: str, post_id: str) -> Dict:
         """Publish a scheduled post immediately"""
-        response = requests.post(
-            f"{METRICOOL_API_BASE}/workspaces/{workspace_id}/posts/{post_id}/publish",
-            headers=self.headers
-        )
+        response = self.transport.request("POST", f"/workspaces/{workspace_id}/posts/{post_id}/publish", endpoint="/workspaces/{workspace_id}/posts/{post_id}/publish", headers=self.headers)
         return response.json()
-    
+
     def delete_post(self, workspace_id: str, post_id: str) -> Dict:
         """Delete a post"""
-        response = requests.delete(
-            f"{METRICOOL_API_BASE}/workspaces/{workspace_id}/posts/{post_id}",
-            headers=self.headers
+        response = self.transport.request("DELETE", f"/workspaces/{workspace_id}/posts/{post_id}", endpoint="/workspaces/{workspace_id}/posts/{post_id}", headers=self.headers)
+        return response.json()
+
+    def get_post_metrics(self, workspace_id: str, since: Optional[str] = None, page: int = 1, page_size: int = METRICOOL_METRICS_PAGE_SIZE) -> Dict:
+        """One page of post metric snapshots taken at or after `since`, oldest first; raises on HTTP errors"""
+        response = self.transport.request(
+            "GET",
+            f"/workspaces/{workspace_id}/analytics/posts",
+            endpoint="/workspaces/{workspace_id}/analytics/posts",
+            headers=self.headers,
+            params=metrics_params(since, page, page_size)
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def iter_post_metrics(self, workspace_id: str, since: Optional[str] = None, page_size: int = METRICOOL_METRICS_PAGE_SIZE) -> Iterator[List[Dict]]:
+        """Yield pages of post metric snapshots until the last page"""
+        page = 1
+        while page:
+            body = self.get_post_metrics(workspace_id, since, page, page_size)
+            items = body.get("data", [])
+            if items:
+                yield items
+            page = next_metrics_page(body, page, len(items), page_size)
+
+
+class AsyncMetricoolClient(MetricoolClient):
+    """Async variant of MetricoolClient sharing the same pooled transport"""
+
+    async def get_workspaces(self) -> List[Dict]:
+        response = await self.transport.arequest("GET", "/workspaces", headers=self.headers)
+        return response.json().get("data", [])
+
+    async def get_channels(self, workspace_id: str) -> List[Dict]:
+        response = await self.transport.arequest("GET", f"/workspaces/{workspace_id}/channels", endpoint="/workspaces/{workspace_id}/channels", headers=self.headers)
+        return response.json().get("data", [])
+
+    async def create_post(
+        self,
+        workspace_id: str,
+        content: str,
+        channel_ids: List[str],
+        scheduled_time: Optional[str] = None,
+        media_urls: Optional[List[str]] = None
+    ) -> Dict:
+        response = await self.transport.arequest(
+            "POST",
+            f"/workspaces/{workspace_id}/posts",
+            endpoint="/workspaces/{workspace_id}/posts",
+            headers=self.headers,
+            json=build_post_data(content, channel_ids, scheduled_time, media_urls)
+        )
+        return response.json()
+
+    async def get_posts(self, workspace_id: str, status: Optional[str] = None) -> List[Dict]:
+        params = {"status": status} if status else {}
+        response = await self.transport.arequest(
+            "GET",
+            f"/workspaces/{workspace_id}/posts",
+            endpoint="/workspaces/{workspace_id}/posts",
+            headers=self.headers,
+            params=params
+        )
+        return response.json().get("data", [])
+
+    async def publish_post(self, workspace_id: str, post_id: str) -> Dict:
+        response = await self.transport.arequest("POST", f"/workspaces/{workspace_id}/posts/{post_id}/publish", endpoint="/workspaces/{workspace_id}/posts/{post_id}/publish", headers=self.headers)
+        return response.json()
+
+    async def delete_post(self, workspace_id: str, post_id: str) -> Dict:
+        response = await self.transport.arequest("DELETE", f"/workspaces/{workspace_id}/posts/{post_id}", endpoint="/workspaces/{workspace_id}/posts/{post_id}", headers=self.headers)
+        return response.json()
+
+    async def get_post_metrics(self, workspace_id: str, since: Optional[str] = None, page: int = 1, page_size: int = METRICOOL_METRICS_PAGE_SIZE) -> Dict:
+        response = await self.transport.arequest(
+            "GET",
+            f"/workspaces/{workspace_id}/analytics/posts",
+            endpoint="/workspaces/{workspace_id}/analytics/posts",
+            headers=self.headers,
+            params=metrics_params(since, page, page_size)
         )
+        response.raise_for_status()
         return response.json()
 
+    async def iter_post_metrics(self, workspace_id: str, since: Optional[str] = None, page_size: int = METRICOOL_METRICS_PAGE_SIZE) -> AsyncIterator[List[Dict]]:
+        page = 1
+        while page:
+            body = await self.get_post_metrics(workspace_id, since, page, page_size)
+            items = body.get("data", [])
+            if items:
+                yield items
+            page = next_metrics_page(body, page, len(items), page_size)
+
+
+def classify_endpoint(method: str, endpoint: str) -> str:
+    """Rate limit class of a call: analytics, read or write"""
+    if "/analytics/" in endpoint:
+        return "analytics"
+    return "read" if method in ("GET", "HEAD") else "write"
+
+
+def metrics_params(since: Optional[str], page: int, page_size: int) -> Dict:
+    """Query string for the post metrics endpoint"""
+    params = {"page": page, "limit": page_size, "sort": "asc"}
+    if since:
+        params["since"] = since
+    return params
+
+
+def next_metrics_page(body: Dict, page: int, count: int, page_size: int) -> Optional[int]:
+    """Next page number, or None after the last page (explicit next_page wins over a full page)"""
+    if "next_page" in body:
+        return body["next_page"] or None
+    return page + 1 if count >= page_size else None
+
+
+def build_post_data(
+    content: str,
+    channel_ids: List[str],
+    scheduled_time: Optional[str] = None,
+    media_urls: Optional[List[str]] = None
+) -> Dict:
+    """Build the request body for creating a post"""
+    post_data = {
+        "content": content,
+        "channels": channel_ids
+    }
+
+    if scheduled_time:
+        post_data["scheduled_time"] = scheduled_time
+
+    if media_urls:
+        post_data["media"] = [{"url": url} for url in media_urls]
+
+    return post_data
+
+
+def get_proxy_transport() -> MetricoolTransport:
+    """Shared transport for the app API at METRICOOL_BASE (userId/blogId endpoints)"""
+    return get_transport(METRICOOL_BASE, verify=False, headers=METRICOOL_HEADERS, name="metricool_app")
+
+
+async def afetch_proxy_channels(api_key: str, user_id: str, blog_id: str) -> Dict:
+    """Get channels for a userId/blogId from the app API; raises on any failure"""
+    resp = await get_proxy_transport().arequest(
+        "GET",
+        "/api/v1/channels",
+        headers={"X-Mc-Auth": api_key},
+        params={"userId": user_id, "blogId": blog_id}
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+def build_scheduler_data(text: str, platforms: List[str], publication_date: Optional[str] = None) -> Dict:
+    """Build the request body for the v2 scheduler posts endpoint"""
+    providers = [{"network": p} for p in platforms]
+    linkedin_data = {"previewIncluded": True, "type": "POST"} if "linkedin" in platforms else {}
+
+    scheduler_data = {
+        "text": text,
+        "firstCommentText": "",
+        "providers": providers,
+        "autoPublish": True,
+        "saveExternalMediaFiles": False,
+        "shortener": False,
+        "draft": False,
+        "linkedinData": linkedin_data,
+        "twitterData": {"type": "POST"},
+        "instagramData": {"autoPublish": True},
+        "tiktokData": {},
+        "hasNotReadNotes": False,
+    }
+    if publication_date:
+        scheduler_data["publicationDate"] = {"dateTime": publication_date, "timezone": METRICOOL_TIMEZONE}
+    return scheduler_data
+
+
+def send_scheduler_post(api_key: str, user_id: str, blog_id: str, scheduler_data: Dict) -> httpx.Response:
+    """POST a scheduler payload to Metricool through the shared proxy transport"""
+    return get_proxy_transport().request(
+        "POST",
+        "/api/v2/scheduler/posts",
+        headers={"X-Mc-Auth": api_key, "Content-Type": "application/json"},
+        params={"userId": user_id, "blogId": blog_id},
+        json=scheduler_data
+    )
+
+
+async def asend_scheduler_post(api_key: str, user_id: str, blog_id: str, scheduler_data: Dict) -> httpx.Response:
+    return await get_proxy_transport().arequest(
+        "POST",
+        "/api/v2/scheduler/posts",
+        headers={"X-Mc-Auth": api_key, "Content-Type": "application/json"},
+        params={"userId": user_id, "blogId": blog_id},
+        json=scheduler_data
+    )
+
 
 def get_client(api_key: Optional[str] = None) -> MetricoolClient:
     """Get Metricool client instance"""
     if not api_key:
         api_key = os.environ.get("METRICOOL_API_KEY", "")
     return MetricoolClient(api_key)
+
+
+def get_async_client(api_key: Optional[str] = None) -> AsyncMetricoolClient:
+    """Get async Metricool client instance"""
+    if not api_key:
+        api_key = os.environ.get("METRICOOL_API_KEY", "")
+    return AsyncMetricoolClient(api_key)
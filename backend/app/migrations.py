@@ -0,0 +1,191 @@
+"""
+Versioned schema migrations for the SQLite database
+
+Each migration runs once, in order, inside its own transaction and is recorded
+in the schema_migrations table. Add new migrations to the end of MIGRATIONS;
+never edit or reorder one that has shipped.
+
+Usage:
+    python -m app.migrations            # apply pending migrations
+    python -m app.migrations status     # show applied / pending versions
+"""
+
+import sys
+from datetime import datetime
+
+from sqlalchemy import DateTime, bindparam, text
+
+from .database import Base, engine
+from . import models  # noqa: F401 - registers tables on Base.metadata
+from .search import FTS_MIGRATION
+
+
+def _create_tables(conn):
+    """Create any table that does not exist yet"""
+    Base.metadata.create_all(bind=conn)
+
+
+def _add_column(conn, table: str, column: str, ddl: str):
+    """ALTER TABLE ADD COLUMN unless the column already exists (fresh databases get it from create_all)"""
+    existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+    if column not in existing:
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def _post_due_times(conn):
+    """Add posts.scheduled_at and backfill it from the free-form scheduled_for"""
+    from .scheduler import parse_due_time
+
+    _add_column(conn, "posts", "scheduled_at", "DATETIME")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_posts_status_scheduled_at ON posts (publish_status, scheduled_at)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_content_calendar_status_date ON content_calendar (status, scheduled_date)")
+
+    # Typed bind so the stored format matches what the ORM writes
+    backfill = text("UPDATE posts SET scheduled_at = :due WHERE id = :id").bindparams(bindparam("due", type_=DateTime))
+    rows = conn.exec_driver_sql("SELECT id, scheduled_for FROM posts WHERE scheduled_for IS NOT NULL AND scheduled_at IS NULL").fetchall()
+    for post_id, scheduled_for in rows:
+        try:
+            due = parse_due_time(scheduled_for)
+        except ValueError:
+            continue
+        if due is not None:
+            conn.execute(backfill, {"due": due, "id": post_id})
+
+
+def _post_children(conn):
+    """Create post_hashtags / post_media and backfill them from the comma-joined columns"""
+    from .models import PostHashtag, PostMedia
+    from .post_index import backfill_rows
+
+    _create_tables(conn)
+    rows = conn.exec_driver_sql(
+        "SELECT id, user_id, hashtags, link_url FROM posts "
+        "WHERE (hashtags IS NOT NULL AND hashtags != '') OR (link_url IS NOT NULL AND link_url != '')"
+    ).fetchall()
+    tags, media = [], []
+    for post_id, user_id, hashtags, link_url in rows:
+        post_tags, post_media = backfill_rows(post_id, user_id, hashtags, link_url)
+        tags.extend(post_tags)
+        media.extend(post_media)
+    if tags:
+        conn.execute(PostHashtag.__table__.insert(), tags)
+    if media:
+        conn.execute(PostMedia.__table__.insert(), media)
+    conn.exec_driver_sql("ANALYZE")
+
+
+def _token_revocation(conn):
+    """Persist logouts and password changes: users.token_version and revoked_tokens"""
+    _add_column(conn, "users", "token_version", "INTEGER NOT NULL DEFAULT 0")
+    _create_tables(conn)
+
+
+def _post_legacy_ids(conn):
+    """Add posts.legacy_id so re-running the data.json import matches posts by their old id"""
+    _add_column(conn, "posts", "legacy_id", "INTEGER")
+    conn.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS ix_posts_user_legacy_id ON posts (user_id, legacy_id)")
+
+
+def _publish_job_targets(conn):
+    """Rebuild publish_jobs with a nullable post_id and a calendar_entry_id (SQLite cannot alter a column)"""
+    from .models import PublishJob
+
+    old_columns = [row[1] for row in conn.exec_driver_sql("PRAGMA table_info(publish_jobs)")]
+    if "calendar_entry_id" in old_columns:
+        return  # created from the current model
+    indexes = conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'publish_jobs' AND sql IS NOT NULL").fetchall()
+    for (name,) in indexes:
+        conn.exec_driver_sql(f"DROP INDEX {name}")
+    conn.exec_driver_sql("ALTER TABLE publish_jobs RENAME TO publish_jobs_old")
+    PublishJob.__table__.create(conn)
+    columns = ", ".join(c for c in old_columns if c in PublishJob.__table__.columns)
+    conn.exec_driver_sql(f"INSERT INTO publish_jobs ({columns}) SELECT {columns} FROM publish_jobs_old")
+    conn.exec_driver_sql("DROP TABLE publish_jobs_old")
+
+
+MIGRATIONS = [
+    (1, "initial schema", _create_tables),
+    (2, "composite indexes for hot queries", [
+        "CREATE INDEX IF NOT EXISTS ix_posts_user_status_created ON posts (user_id, publish_status, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_posts_user_created ON posts (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_content_calendar_user_date ON content_calendar (user_id, scheduled_date)",
+        "CREATE INDEX IF NOT EXISTS ix_research_results_user_created ON research_results (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_ai_settings_user_provider ON ai_settings (user_id, provider)",
+        "ANALYZE",
+    ]),
+    (3, "publish job queue", _create_tables),
+    (4, "indexed UTC due times for the scheduler", _post_due_times),
+    (5, "AI response cache", _create_tables),
+    (6, "normalized post hashtags and media", _post_children),
+    (7, "FTS5 search over posts and research", FTS_MIGRATION),
+    (8, "per-user due time index for calendar views", [
+        "CREATE INDEX IF NOT EXISTS ix_posts_user_scheduled_at ON posts (user_id, scheduled_at)",
+    ]),
+    (9, "analytics time series, rollups and ingest watermark", _create_tables),
+    (10, "publish jobs for calendar entries", _publish_job_targets),
+    (11, "persistent token revocation", _token_revocation),
+    (12, "legacy data.json ids on posts", _post_legacy_ids),
+]
+
+
+def _ensure_version_table(conn):
+    conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, "
+        "name VARCHAR(255) NOT NULL, "
+        "applied_at DATETIME NOT NULL)"
+    )
+
+
+def applied_versions(bind=None) -> set:
+    """Return the set of migration versions already applied"""
+    bind = bind or engine
+    with bind.begin() as conn:
+        _ensure_version_table(conn)
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def run_migrations(bind=None) -> list:
+    """Apply every pending migration in order; returns the versions applied"""
+    bind = bind or engine
+    done = applied_versions(bind)
+    applied = []
+    for version, name, step in MIGRATIONS:
+        if version in done:
+            continue
+        with bind.begin() as conn:
+            if callable(step):
+                step(conn)
+            else:
+                for statement in step:
+                    conn.exec_driver_sql(statement)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+                {"v": version, "n": name, "t": datetime.utcnow()}
+            )
+        applied.append(version)
+    return applied
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "upgrade"
+
+    if command == "status":
+        done = applied_versions()
+        for version, name, _ in MIGRATIONS:
+            state = "applied" if version in done else "pending"
+            print(f"{version:>4}  {state:<8} {name}")
+        return 0
+
+    if command == "upgrade":
+        applied = run_migrations()
+        print(f"Applied migrations: {applied}" if applied else "Database is up to date")
+        return 0
+
+    print(f"Unknown command: {command}", file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
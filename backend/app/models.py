@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, Date, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
 
@@ -10,11 +11,22 @@ class User(Base):
     email = Column(String(255), nullable=False, unique=True, index=True)
     password_hash = Column(String(255), nullable=False)
     name = Column(String(255), nullable=True)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # bumped on password change; older JWTs are rejected
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(64), primary_key=True)  # JWT id, or sha256 of tokens issued without one
+    expires_at = Column(DateTime, nullable=False, index=True)  # the token's exp; the row can go after it
+
+
 class AISettings(Base):
     __tablename__ = "ai_settings"
+    __table_args__ = (
+        Index("ix_ai_settings_user_provider", "user_id", "provider"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -26,6 +38,9 @@ class AISettings(Base):
 
 class ResearchResult(Base):
     __tablename__ = "research_results"
+    __table_args__ = (
+        Index("ix_research_results_user_created", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -36,6 +51,10 @@ class ResearchResult(Base):
 
 class ContentCalendar(Base):
     __tablename__ = "content_calendar"
+    __table_args__ = (
+        Index("ix_content_calendar_user_date", "user_id", "scheduled_date"),
+        Index("ix_content_calendar_status_date", "status", "scheduled_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -48,6 +67,13 @@ class ContentCalendar(Base):
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        Index("ix_posts_user_status_created", "user_id", "publish_status", "created_at"),
+        Index("ix_posts_user_created", "user_id", "created_at"),
+        Index("ix_posts_status_scheduled_at", "publish_status", "scheduled_at"),
+        Index("ix_posts_user_scheduled_at", "user_id", "scheduled_at"),
+        Index("ix_posts_user_legacy_id", "user_id", "legacy_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
@@ -60,10 +86,147 @@ class Post(Base):
     media_paths = Column(Text, nullable=True)  # JSON string list
     alt_texts = Column(Text, nullable=True)  # JSON string list
     scheduled_for = Column(String(64), nullable=True)
+    scheduled_at = Column(DateTime, nullable=True)  # scheduled_for normalized to naive UTC
     approved = Column(Boolean, default=False)
     published = Column(Boolean, default=False)
     publish_status = Column(String(64), default="draft")
     last_error = Column(Text, nullable=True)
+    legacy_id = Column(Integer, nullable=True)  # id in data.json, for idempotent imports
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Normalized copies of hashtags / link_url; selectin keeps list pages at one extra query each
+    hashtag_rows = relationship("PostHashtag", order_by="PostHashtag.position", cascade="all, delete-orphan", lazy="selectin")
+    media_rows = relationship("PostMedia", order_by="PostMedia.position", cascade="all, delete-orphan", lazy="selectin")
+
+
+class PostHashtag(Base):
+    __tablename__ = "post_hashtags"
+    __table_args__ = (
+        Index("ix_post_hashtags_user_tag_post", "user_id", "tag", "post_id"),
+        Index("ix_post_hashtags_post", "post_id", "position"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # copied from the post for per-user counts
+    tag = Column(String(255), nullable=False)  # lower-case, without '#'
+    label = Column(String(255), nullable=False)  # as entered, e.g. "#ExpoWest"
+    position = Column(Integer, nullable=False, default=0)
+
+
+class PostMedia(Base):
+    __tablename__ = "post_media"
+    __table_args__ = (
+        Index("ix_post_media_post", "post_id", "position"),
+        Index("ix_post_media_url", "url"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
+    url = Column(String(1024), nullable=False)
+    position = Column(Integer, nullable=False, default=0)
+
+
+class PublishJob(Base):
+    __tablename__ = "publish_jobs"
+    __table_args__ = (
+        Index("ix_publish_jobs_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=True, index=True)
+    calendar_entry_id = Column(Integer, ForeignKey("content_calendar.id"), nullable=True, index=True)  # set instead of post_id
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+    status = Column(String(32), nullable=False, default="queued")  # queued, running, succeeded, failed, needs_check
+    payload = Column(Text, nullable=True)  # JSON: api_key, user_id, blog_id, scheduled_time
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    next_attempt_at = Column(DateTime, nullable=False)
+    last_error = Column(Text, nullable=True)
+    result = Column(Text, nullable=True)  # JSON response from Metricool
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class AIResponseCache(Base):
+    __tablename__ = "ai_response_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), nullable=False, unique=True, index=True)  # sha256(model, system, user prompt)
+    model = Column(String(100), nullable=False)
+    response = Column(Text, nullable=False)
+    hits = Column(Integer, nullable=False, default=0)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# One network post tracked for analytics, with its latest cumulative counters
+class MetricSeries(Base):
+    __tablename__ = "metric_series"
+    __table_args__ = (
+        Index("ux_metric_series_user_external", "user_id", "external_id", "network", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    network = Column(String(32), nullable=False)
+    external_id = Column(String(128), nullable=False)  # the post id on Metricool's side
+    published_at = Column(DateTime, nullable=True)
+    last_measured_at = Column(DateTime, nullable=True)  # snapshots at or before this are skipped
+    impressions = Column(Integer, nullable=False, default=0)
+    reach = Column(Integer, nullable=False, default=0)
+    likes = Column(Integer, nullable=False, default=0)
+    comments = Column(Integer, nullable=False, default=0)
+    shares = Column(Integer, nullable=False, default=0)
+    clicks = Column(Integer, nullable=False, default=0)
+
+
+# A metrics snapshot: integers only, clustered on (series, time) without a rowid
+class MetricPoint(Base):
+    __tablename__ = "metric_points"
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    series_id = Column(Integer, ForeignKey("metric_series.id", ondelete="CASCADE"), primary_key=True)
+    ts = Column(Integer, primary_key=True)  # unix seconds, UTC
+    impressions = Column(Integer, nullable=False, default=0)
+    reach = Column(Integer, nullable=False, default=0)
+    likes = Column(Integer, nullable=False, default=0)
+    comments = Column(Integer, nullable=False, default=0)
+    shares = Column(Integer, nullable=False, default=0)
+    clicks = Column(Integer, nullable=False, default=0)
+
+
+# Growth of each counter per user, network and day / ISO week (bucket = its first day)
+class MetricRollup(Base):
+    __tablename__ = "metric_rollups"
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    granularity = Column(String(8), primary_key=True)  # day, week
+    bucket = Column(Date, primary_key=True)
+    network = Column(String(32), primary_key=True)
+    impressions = Column(Integer, nullable=False, default=0)
+    reach = Column(Integer, nullable=False, default=0)
+    likes = Column(Integer, nullable=False, default=0)
+    comments = Column(Integer, nullable=False, default=0)
+    shares = Column(Integer, nullable=False, default=0)
+    clicks = Column(Integer, nullable=False, default=0)
+    snapshots = Column(Integer, nullable=False, default=0)
+
+
+class AnalyticsIngestState(Base):
+    __tablename__ = "analytics_ingest_state"
+    __table_args__ = (
+        Index("ux_analytics_ingest_state_user_workspace", "user_id", "workspace_id", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    workspace_id = Column(String(64), nullable=False)
+    watermark = Column(DateTime, nullable=True)  # newest snapshot time ingested
+    snapshots = Column(Integer, nullable=False, default=0)
+    last_run_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
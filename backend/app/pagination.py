@@ -0,0 +1,114 @@
+"""
+Keyset (cursor) pagination and NDJSON streaming helpers
+
+apaginate/astream_ndjson run these queries through an AsyncSession: the query
+is still built with the legacy Query API on the session's sync view
+(run_sync), while the statements themselves are awaited.
+"""
+
+import base64
+import json
+from typing import Callable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import String, and_, or_, type_coerce
+
+from .database import AsyncReadSessionLocal
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_CHUNK_SIZE = 500
+
+
+def encode_cursor(sort_value: Optional[str], row_id: int) -> str:
+    """Encode the (sort value, id) of the last row of a page as an opaque cursor; a NULL sort value stays null"""
+    raw = json.dumps([sort_value, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (None if sort_value is None else str(sort_value)), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_query(query, sort_col, id_col, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, descending: bool = True):
+    """
+    Restrict `query` to the page after `cursor`, ordered by (sort_col, id_col).
+
+    The sort column is compared as the raw string SQLite stores, so the cursor
+    matches the ORDER BY exactly regardless of how the datetime was written.
+    SQLite sorts NULLs first, so they are the tail of a descending listing and
+    the head of an ascending one; the cursor filter follows that order.
+    One extra row is requested so the caller can tell whether a next page exists.
+    """
+    key = type_coerce(sort_col, String)
+
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor)
+        if sort_value is None:
+            if descending:
+                query = query.filter(key.is_(None), id_col < last_id)
+            else:
+                query = query.filter(or_(key.isnot(None), and_(key.is_(None), id_col > last_id)))
+        elif descending:
+            query = query.filter(or_(key < sort_value, and_(key == sort_value, id_col < last_id), key.is_(None)))
+        else:
+            query = query.filter(or_(key > sort_value, and_(key == sort_value, id_col > last_id)))
+
+    if descending:
+        query = query.order_by(sort_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(sort_col.asc(), id_col.asc())
+
+    return query.add_columns(key).limit(limit + 1)
+
+
+def paginate(query, sort_col, id_col, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, descending: bool = True):
+    """
+    Fetch one page of `query` ordered by (sort_col, id_col).
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    results = keyset_query(query, sort_col, id_col, cursor, limit, descending).all()
+    has_more = len(results) > limit
+    results = results[:limit]
+
+    rows = [r[0] for r in results]
+    next_cursor = None
+    if has_more and results:
+        last_row, last_key = results[-1]
+        next_cursor = encode_cursor(last_key, last_row.id)
+    return rows, next_cursor
+
+
+def _page(session, build_query: Callable, sort_col, id_col, cursor, limit, descending):
+    return paginate(build_query(session), sort_col, id_col, cursor, limit, descending)
+
+
+async def apaginate(db, build_query: Callable, sort_col, id_col, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, descending: bool = True):
+    """paginate() on an AsyncSession; build_query(session) gets the session's sync view"""
+    return await db.run_sync(_page, build_query, sort_col, id_col, cursor, limit, descending)
+
+
+async def astream_ndjson(build_query: Callable, serialize: Callable, sort_col, id_col, descending: bool = True, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    Yield every row of build_query(session) as NDJSON lines, pulled in keyset chunks.
+
+    Each chunk is read on its own short-lived session, which is closed before
+    the chunk is yielded: no pooled connection or read transaction is held
+    while the client drains the stream.
+    """
+    cursor = None
+    while True:
+        async with AsyncReadSessionLocal() as db:
+            rows, cursor = await db.run_sync(_page, build_query, sort_col, id_col, cursor, chunk_size, descending)
+            chunk = "".join(json.dumps(serialize(r), default=str) + "\n" for r in rows)
+        if chunk:
+            yield chunk
+        if not cursor:
+            break
@@ -0,0 +1,73 @@
+"""
+Password hashing on a dedicated, size-limited executor
+
+bcrypt is deliberately slow. Running it inline in sync route handlers lets a
+burst of logins occupy every threadpool thread, stalling unrelated routes.
+Here hashing runs on PASSWORD_WORKERS threads of its own (bcrypt releases the
+GIL), and once PASSWORD_MAX_PENDING calls are queued further ones are
+rejected immediately with PasswordQueueFull instead of piling up.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", "2"))
+PASSWORD_MAX_PENDING = int(os.getenv("PASSWORD_MAX_PENDING", "32"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordQueueFull(Exception):
+    """Too many password operations are already queued"""
+
+
+class PasswordHasher:
+    def __init__(self, workers: int = PASSWORD_WORKERS, max_pending: int = PASSWORD_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordQueueFull()
+        with self._lock:
+            self.in_flight += 1
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _future):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await asyncio.wrap_future(self._submit(pwd_context.verify, password, password_hash))
+
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(pwd_context.hash, password))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected
+            }
+
+
+password_hasher = PasswordHasher()
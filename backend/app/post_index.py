@@ -0,0 +1,100 @@
+"""
+Hashtag and media child rows for posts
+
+Post.hashtags and Post.link_url are still written, for older readers.
+post_hashtags and post_media are what the API reads and queries.
+"""
+
+import re
+from typing import Iterable, List, Optional, Union
+
+from sqlalchemy import func
+
+from .models import Post, PostHashtag, PostMedia
+
+_TAG_SPLIT = re.compile(r"[\s,]+")
+
+
+def parse_hashtags(value: Union[str, Iterable[str], None]) -> List[str]:
+    """Split a free-form hashtag string (or list) into labels, dropping blanks and repeats"""
+    if not value:
+        return []
+    parts = _TAG_SPLIT.split(value) if isinstance(value, str) else [p.strip() for p in value]
+    labels, seen = [], set()
+    for part in parts:
+        tag = normalize_tag(part)
+        if tag and tag not in seen:
+            seen.add(tag)
+            labels.append(part if part.startswith("#") else f"#{part}")
+    return labels
+
+
+def normalize_tag(value: str) -> str:
+    return value.strip().lstrip("#").lower()
+
+
+def hashtag_rows(labels: List[str], user_id) -> List[PostHashtag]:
+    return [PostHashtag(user_id=user_id, tag=normalize_tag(label), label=label, position=i) for i, label in enumerate(labels)]
+
+
+def media_rows(urls: List[str]) -> List[PostMedia]:
+    return [PostMedia(url=url, position=i) for i, url in enumerate(urls)]
+
+
+def set_post_hashtags(post: Post, value: Union[str, List[str], None], raw: Optional[str] = None):
+    """
+    Replace a post's hashtags. The legacy column keeps `raw` when given (drafts
+    store the string as typed), otherwise the comma-joined labels.
+    """
+    labels = parse_hashtags(value)
+    post.hashtags = raw if raw is not None else ",".join(labels)
+    post.hashtag_rows = hashtag_rows(labels, post.user_id)
+
+
+def set_post_media(post: Post, urls: Optional[List[str]]):
+    urls = [url.strip() for url in urls or [] if url and url.strip()]
+    post.link_url = ",".join(urls)
+    post.media_rows = media_rows(urls)
+
+
+def post_hashtag_labels(post: Post) -> List[str]:
+    return [row.label for row in post.hashtag_rows]
+
+
+def post_media_urls(post: Post) -> List[str]:
+    return [row.url for row in post.media_rows]
+
+
+def top_hashtags(db, user_id, limit: int = 20) -> List[dict]:
+    """Most used hashtags for a user, counted by SQL from the (user_id, tag) index"""
+    count = func.count(PostHashtag.id).label("count")
+    rows = (
+        db.query(PostHashtag.tag, count)
+        .filter(PostHashtag.user_id == user_id)
+        .group_by(PostHashtag.tag)
+        .order_by(count.desc(), PostHashtag.tag)
+        .limit(limit)
+    )
+    return [{"tag": tag, "count": n} for tag, n in rows]
+
+
+def posts_with_tag(db, user_id, tag: str):
+    """Query for a user's posts carrying a hashtag (to be paginated by the caller)"""
+    tagged = db.query(PostHashtag.post_id).filter(
+        PostHashtag.user_id == user_id,
+        PostHashtag.tag == normalize_tag(tag)
+    )
+    return db.query(Post).filter(Post.id.in_(tagged.scalar_subquery()))
+
+
+def backfill_rows(post_id: int, user_id, hashtags: Optional[str], link_url: Optional[str]):
+    """(hashtag dicts, media dicts) for bulk inserts from the legacy string columns"""
+    tags = [
+        {"post_id": post_id, "user_id": user_id, "tag": normalize_tag(label), "label": label, "position": i}
+        for i, label in enumerate(parse_hashtags(hashtags))
+    ]
+    media = [
+        {"post_id": post_id, "url": url.strip(), "position": i}
+        for i, url in enumerate(u for u in (link_url or "").split(",") if u.strip())
+    ]
+    return tags, media
@@ -0,0 +1,357 @@
+"""
+Durable publish queue backed by the publish_jobs table
+
+Publishing a post (or a due calendar entry) enqueues a PublishJob and
+returns immediately. A pool of worker threads claims due jobs, sends them to Metricool and retries failures
+with exponential backoff. A job refused locally (open Metricool circuit
+breaker, or no rate limit token in time) never reached Metricool, so it is
+requeued for when it can go without using up an attempt.
+
+The scheduler POST is not idempotent, so only failures that certainly created
+nothing are retried: the request was never sent, or Metricool answered 429
+or 503. Any other 4xx fails the job. Anything else (another 5xx, which may be
+a gateway timing out after Metricool published, a read timeout or dropped
+connection after the request went out, or a job left "running" by a crash)
+may have published the post, so the job and post move to "needs_check"
+instead of being sent again; publishing such a post again is a manual step.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import update
+
+from .database import SessionLocal
+from .metricool import asend_scheduler_post, build_scheduler_data, send_scheduler_post
+from .metricool import NOT_SENT_ERRORS
+from .ratelimit import RateLimitedError
+from .resilience import CircuitOpenError, DeadlineExceeded
+from .models import ContentCalendar, Post, PublishJob
+
+logger = logging.getLogger(__name__)
+
+PUBLISH_WORKERS = int(os.getenv("PUBLISH_WORKERS", "4"))
+PUBLISH_MAX_ATTEMPTS = int(os.getenv("PUBLISH_MAX_ATTEMPTS", "5"))
+PUBLISH_RETRY_BASE = float(os.getenv("PUBLISH_RETRY_BASE", "2"))
+PUBLISH_RETRY_MAX = float(os.getenv("PUBLISH_RETRY_MAX", "300"))
+PUBLISH_POLL_INTERVAL = float(os.getenv("PUBLISH_POLL_INTERVAL", "1"))
+BATCH_PUBLISH_CONCURRENCY = int(os.getenv("BATCH_PUBLISH_CONCURRENCY", "10"))
+
+NEEDS_CHECK = "needs_check"  # the publish may or may not have reached Metricool
+
+# Post statuses from which a publish may be (re)queued
+PUBLISHABLE_STATUSES = ["pending", "approved", "draft", "scheduled", "failed", NEEDS_CHECK]
+
+
+# Raised before anything was sent; the call can simply be made again later
+DEFERRABLE_ERRORS = (CircuitOpenError, RateLimitedError)
+
+# Answers that mean the scheduler POST was refused, not processed
+RETRYABLE_STATUS_CODES = (429, 503)
+
+
+class PublishHTTPError(RuntimeError):
+    """Metricool answered the scheduler POST with something other than 200"""
+
+    def __init__(self, status_code: int, text: str):
+        super().__init__(f"Metricool {status_code}: {text[:200]}")
+        self.status_code = status_code
+
+
+def failure_status(error: Exception) -> Optional[str]:
+    """
+    None when a failed publish certainly created nothing and may be retried
+    (never sent, or a 429/503 answer); "failed" for any other 4xx; NEEDS_CHECK
+    when the request may have been delivered (any other 5xx, or no answer).
+    """
+    if isinstance(error, PublishHTTPError):
+        if error.status_code in RETRYABLE_STATUS_CODES:
+            return None
+        return NEEDS_CHECK if error.status_code >= 500 else "failed"
+    if isinstance(error, NOT_SENT_ERRORS + DEFERRABLE_ERRORS + (DeadlineExceeded,)):
+        return None
+    return NEEDS_CHECK
+
+
+def needs_check_message(error) -> str:
+    return f"May have been published; check Metricool before publishing again ({error})"
+
+
+def set_target_status(target, status: str, error: Optional[str] = None):
+    """Record a publish outcome on a Post or ContentCalendar entry"""
+    if isinstance(target, ContentCalendar):
+        target.status = status
+        return
+    target.publish_status = status
+    target.last_error = error
+    if status == "published":
+        target.published = True
+
+
+def enqueue_publish(db, target, payload: Dict, max_attempts: int = PUBLISH_MAX_ATTEMPTS, delay: float = 0) -> PublishJob:
+    """Queue a post or calendar entry for publishing, due in `delay` seconds; caller commits"""
+    is_entry = isinstance(target, ContentCalendar)
+    job = PublishJob(
+        post_id=None if is_entry else target.id,
+        calendar_entry_id=target.id if is_entry else None,
+        user_id=target.user_id,
+        status="queued",
+        payload=json.dumps(payload),
+        attempts=0,
+        max_attempts=max_attempts,
+        next_attempt_at=datetime.utcnow() + timedelta(seconds=delay)
+    )
+    set_target_status(target, "queued")
+    db.add(job)
+    db.flush()
+    return job
+
+
+def claim_posts(db, post_ids: List[int]) -> List[int]:
+    """
+    Move each post that is still publishable to "publishing", one conditional
+    UPDATE per post like _claim, so concurrent publishes of the same post
+    cannot both send it. Returns the ids claimed; caller commits.
+    """
+    claimed = []
+    for post_id in post_ids:
+        if db.execute(
+            update(Post)
+            .where(Post.id == post_id, Post.publish_status.in_(PUBLISHABLE_STATUSES))
+            .values(publish_status="publishing")
+        ).rowcount:
+            claimed.append(post_id)
+    return claimed
+
+
+def job_to_dict(job: PublishJob) -> Dict:
+    return {
+        "id": job.id,
+        "post_id": job.post_id,
+        "calendar_entry_id": job.calendar_entry_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "next_attempt_at": job.next_attempt_at.isoformat() if job.next_attempt_at else None,
+        "last_error": job.last_error,
+        "result": json.loads(job.result) if job.result else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None
+    }
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with full jitter, capped at PUBLISH_RETRY_MAX"""
+    return random.uniform(0, min(PUBLISH_RETRY_MAX, PUBLISH_RETRY_BASE * (2 ** max(attempts - 1, 0))))
+
+
+def scheduler_data_for(text: str, payload: Dict) -> Dict:
+    return build_scheduler_data(
+        text,
+        payload.get("platforms") or ["linkedin"],
+        payload.get("scheduled_time")
+    )
+
+
+def scheduler_result(resp):
+    """Parsed scheduler response; raises on anything but a 200"""
+    if resp.status_code != 200:
+        raise PublishHTTPError(resp.status_code, resp.text)
+    try:
+        return resp.json()
+    except ValueError:
+        return {"raw": resp.text[:200]}
+
+
+def publish_to_metricool(text: str, payload: Dict):
+    """Send one post body to Metricool; returns the parsed response or raises"""
+    resp = send_scheduler_post(payload.get("api_key", ""), payload.get("user_id", ""), payload.get("blog_id", ""), scheduler_data_for(text, payload))
+    return scheduler_result(resp)
+
+
+async def apublish_to_metricool(text: str, payload: Dict):
+    resp = await asend_scheduler_post(payload.get("api_key", ""), payload.get("user_id", ""), payload.get("blog_id", ""), scheduler_data_for(text, payload))
+    return scheduler_result(resp)
+
+
+async def apublish_many(items: List, payload: Dict, concurrency: int = BATCH_PUBLISH_CONCURRENCY) -> Dict:
+    """
+    Send (post_id, text) pairs to Metricool concurrently, at most `concurrency`
+    in flight. Returns {post_id: (status, detail)}: ("published", result);
+    ("queued", seconds) for posts that certainly were not published (rate
+    limited, circuit open, never sent, 429/503) and can be retried after that
+    long; ("failed" or NEEDS_CHECK, error message) otherwise.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def send(item):
+        post_id, text = item
+        async with semaphore:
+            try:
+                return post_id, ("published", await apublish_to_metricool(text, payload))
+            except DEFERRABLE_ERRORS as e:
+                return post_id, ("queued", e.retry_after)
+            except Exception as e:
+                status = failure_status(e)
+                if status is None:
+                    return post_id, ("queued", retry_delay(1))
+                return post_id, (status, needs_check_message(e) if status == NEEDS_CHECK else str(e))
+
+    return dict(await asyncio.gather(*(send(item) for item in items)))
+
+
+class PublishWorkerPool:
+    """Pool of threads draining the publish_jobs table"""
+
+    def __init__(self, workers: int = PUBLISH_WORKERS, poll_interval: float = PUBLISH_POLL_INTERVAL):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        if self._threads:
+            return
+        self.recover()
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"publish-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self):
+        """Wake idle workers after a job has been committed"""
+        self._wakeup.set()
+
+    def recover(self):
+        """
+        Flag jobs and batch-claimed posts that were in flight when the process
+        last stopped: a claimed job is sent straight away, so it may already
+        have been published
+        """
+        db = SessionLocal()
+        try:
+            message = needs_check_message("interrupted while publishing")
+            # Claimed by a publish-batch request (or, before calendar entries went
+            # through this queue, by the scheduler) that never recorded its outcome
+            db.execute(
+                update(Post)
+                .where(Post.publish_status == "publishing")
+                .values(publish_status=NEEDS_CHECK, last_error=message)
+            )
+            db.execute(update(ContentCalendar).where(ContentCalendar.status == "publishing").values(status=NEEDS_CHECK))
+            running = db.query(PublishJob.id, PublishJob.post_id, PublishJob.calendar_entry_id).filter(PublishJob.status == "running").all()
+            if running:
+                db.execute(
+                    update(PublishJob)
+                    .where(PublishJob.id.in_([job_id for job_id, _, _ in running]))
+                    .values(status=NEEDS_CHECK, last_error=message)
+                )
+                db.execute(
+                    update(Post)
+                    .where(Post.id.in_([post_id for _, post_id, _ in running if post_id]), Post.publish_status == "queued")
+                    .values(publish_status=NEEDS_CHECK, last_error=message)
+                )
+                db.execute(
+                    update(ContentCalendar)
+                    .where(ContentCalendar.id.in_([entry_id for _, _, entry_id in running if entry_id]), ContentCalendar.status == "queued")
+                    .values(status=NEEDS_CHECK)
+                )
+            db.commit()
+        finally:
+            db.close()
+
+    def _claim(self, db) -> Optional[PublishJob]:
+        """Atomically move the next due job from queued to running"""
+        candidates = db.query(PublishJob.id).filter(
+            PublishJob.status == "queued",
+            PublishJob.next_attempt_at <= datetime.utcnow()
+        ).order_by(PublishJob.next_attempt_at).limit(self.workers).all()
+
+        for (job_id,) in candidates:
+            claimed = db.execute(
+                update(PublishJob)
+                .where(PublishJob.id == job_id, PublishJob.status == "queued")
+                .values(status="running")
+            ).rowcount
+            db.commit()
+            if claimed:
+                return db.get(PublishJob, job_id)
+        return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                job = self._claim(db)
+                if job is not None:
+                    self.process(db, job)
+                    continue
+            except Exception:
+                logger.exception("Publish worker error")
+                db.rollback()
+            finally:
+                db.close()
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def process(self, db, job: PublishJob):
+        """Run one claimed job and record the outcome on the job and its post or calendar entry"""
+        if job.calendar_entry_id is not None:
+            target = db.get(ContentCalendar, job.calendar_entry_id)
+            text = target.post_content if target else None
+        else:
+            target = db.get(Post, job.post_id)
+            text = target.body if target else None
+        job.attempts += 1
+
+        if target is None:
+            job.status = "failed"
+            job.last_error = "Post no longer exists"
+            db.commit()
+            return
+
+        try:
+            result = publish_to_metricool(text, json.loads(job.payload or "{}"))
+        except DEFERRABLE_ERRORS as e:
+            job.attempts -= 1
+            job.status = "queued"
+            job.last_error = str(e)
+            job.next_attempt_at = datetime.utcnow() + timedelta(seconds=e.retry_after + random.uniform(0, 1))
+            db.commit()
+            return
+        except Exception as e:
+            status = failure_status(e)
+            job.last_error = needs_check_message(e) if status == NEEDS_CHECK else str(e)
+            if status is None and job.attempts < job.max_attempts:
+                job.status = "queued"
+                job.next_attempt_at = datetime.utcnow() + timedelta(seconds=retry_delay(job.attempts))
+                set_target_status(target, "queued", job.last_error)
+            else:
+                job.status = status or "failed"
+                set_target_status(target, job.status, job.last_error)
+            db.commit()
+            return
+
+        job.status = "succeeded"
+        job.result = json.dumps(result)
+        job.last_error = None
+        set_target_status(target, "published")
+        db.commit()
+
+
+publish_workers = PublishWorkerPool()
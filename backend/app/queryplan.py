@@ -0,0 +1,126 @@
+"""
+Print EXPLAIN QUERY PLAN for the queries behind each route and background worker
+
+Usage:
+    python -m app.queryplan
+
+Exits non-zero if any of them falls back to a full table scan.
+
+The plans are taken with ANALYZE statistics hidden (sqlite_stat* emptied
+inside a transaction that is rolled back), so the check is about index
+coverage: on a database with a handful of rows the planner would otherwise
+rightly prefer a scan, and the result would depend on the data.
+"""
+
+import sys
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from sqlalchemy import func, or_, select
+
+from .database import Base, SessionLocal, engine
+from .migrations import run_migrations
+from .models import AISettings, AnalyticsIngestState, ContentCalendar, MetricRollup, MetricSeries, Post, PostHashtag, PublishJob, ResearchResult, User
+from .post_index import posts_with_tag
+from .calendar_view import due_rows
+from .pagination import DEFAULT_PAGE_SIZE, encode_cursor, keyset_query
+
+SAMPLE_USER = "admin"
+SAMPLE_CURSOR = encode_cursor("2024-01-01 00:00:00", 1)
+
+
+def route_queries(db):
+    """Return (route, query) pairs mirroring the queries issued in main.py"""
+    posts = db.query(Post).filter(Post.user_id == SAMPLE_USER)
+    calendar = db.query(ContentCalendar).filter(
+        ContentCalendar.user_id == SAMPLE_USER,
+        ContentCalendar.scheduled_date >= datetime(2024, 1, 1),
+        ContentCalendar.scheduled_date <= datetime(2024, 2, 1)
+    )
+    return [
+        ("GET /api/posts", keyset_query(posts, Post.created_at, Post.id, SAMPLE_CURSOR)),
+        ("GET /api/posts?status=", keyset_query(posts.filter(Post.publish_status == "approved"), Post.created_at, Post.id, SAMPLE_CURSOR)),
+        ("GET /api/posts/{id}", db.query(Post).filter(Post.id == 1)),
+        ("GET /api/drafts", keyset_query(posts.filter(Post.publish_status == "draft"), Post.created_at, Post.id, SAMPLE_CURSOR)),
+        ("PATCH /api/drafts/{id}", db.query(Post).filter(Post.id == 1, Post.user_id == SAMPLE_USER, Post.publish_status == "draft")),
+        ("GET /api/ai/research", keyset_query(db.query(ResearchResult).filter(ResearchResult.user_id == SAMPLE_USER), ResearchResult.created_at, ResearchResult.id, SAMPLE_CURSOR, 20)),
+        ("GET /api/calendar", keyset_query(calendar, ContentCalendar.scheduled_date, ContentCalendar.id, SAMPLE_CURSOR, DEFAULT_PAGE_SIZE, descending=False)),
+        ("GET /api/calendar/summary", select(due_rows(SAMPLE_USER, datetime(2024, 1, 1), datetime(2024, 2, 1), lambda content: ()))),
+        ("GET /api/hashtags", db.query(PostHashtag.tag, func.count(PostHashtag.id)).filter(PostHashtag.user_id == SAMPLE_USER).group_by(PostHashtag.tag)),
+        ("GET /api/hashtags/{tag}/posts", keyset_query(posts_with_tag(db, SAMPLE_USER, "expowest"), Post.created_at, Post.id, SAMPLE_CURSOR)),
+        ("post_to_response: hashtags", db.query(PostHashtag).filter(PostHashtag.post_id.in_([1, 2, 3])).order_by(PostHashtag.position)),
+        ("GET /api/analytics/trends", select(MetricRollup.bucket, func.sum(MetricRollup.likes)).where(MetricRollup.user_id == SAMPLE_USER, MetricRollup.granularity == "day", MetricRollup.bucket >= date(2024, 1, 1), MetricRollup.bucket <= date(2024, 2, 1)).group_by(MetricRollup.bucket)),
+        ("GET /api/analytics/status", db.query(AnalyticsIngestState).filter(AnalyticsIngestState.user_id == SAMPLE_USER)),
+        ("analytics ingest: series lookup", select(MetricSeries.id).where(MetricSeries.user_id == SAMPLE_USER, MetricSeries.external_id.in_(["a", "b"]))),
+        ("GET /api/ai/settings", db.query(AISettings).filter(AISettings.user_id == SAMPLE_USER)),
+        ("POST /api/ai/generate", db.query(AISettings).filter(AISettings.user_id == SAMPLE_USER, AISettings.provider == "minimax")),
+        ("auth: get_current_user", db.query(User).filter(User.email == SAMPLE_USER)),
+        ("scheduler: refill posts", db.query(Post.id, Post.scheduled_at).filter(Post.publish_status == "scheduled", Post.scheduled_at <= datetime(2024, 1, 1), Post.scheduled_at >= datetime(2023, 12, 31), or_(Post.scheduled_at > datetime(2023, 12, 31), Post.id > 1)).order_by(Post.scheduled_at, Post.id)),
+        ("scheduler: refill calendar", db.query(ContentCalendar.id, ContentCalendar.scheduled_date).filter(ContentCalendar.status == "scheduled", ContentCalendar.scheduled_date <= datetime(2024, 1, 1)).order_by(ContentCalendar.scheduled_date, ContentCalendar.id)),
+        ("publish worker: claim", db.query(PublishJob.id).filter(PublishJob.status == "queued", PublishJob.next_attempt_at <= datetime(2024, 1, 1)).order_by(PublishJob.next_attempt_at)),
+    ]
+
+
+@contextmanager
+def stats_free_connection():
+    """A connection whose planner sees no sqlite_stat* rows; nothing is changed on disk"""
+    conn = engine.connect()
+    trans = conn.begin()
+    try:
+        stat_tables = conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'sqlite_stat%'").fetchall()
+        for (table,) in stat_tables:
+            conn.exec_driver_sql(f"DELETE FROM {table}")
+        conn.exec_driver_sql("ANALYZE sqlite_master")  # reload the (now empty) statistics
+        yield conn
+    finally:
+        trans.rollback()
+        conn.invalidate()  # its in-memory statistics no longer match the file
+        conn.close()
+
+
+def explain(query, conn) -> list:
+    """Run EXPLAIN QUERY PLAN for an ORM query (or Core select) and return the detail lines"""
+    statement = getattr(query, "statement", query)
+    compiled = statement.compile(dialect=engine.dialect, compile_kwargs={"render_postcompile": True})
+    params = compiled.construct_params()
+    args = []
+    for name in compiled.positiontup:
+        value = params[name]
+        args.append(value if isinstance(value, (int, float, str, type(None))) else str(value))
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + compiled.string, tuple(args)).fetchall()
+    return [row[-1] for row in rows]
+
+
+def is_full_scan(detail: str) -> bool:
+    """A SCAN of a real table without an index (scans of subqueries/CTEs are fine)"""
+    if not detail.startswith("SCAN ") or " USING " in detail:
+        return False
+    return detail.split()[1] in Base.metadata.tables
+
+
+def main() -> int:
+    run_migrations()
+    db = SessionLocal()
+    full_scans = []
+    try:
+        with stats_free_connection() as conn:
+            for route, query in route_queries(db):
+                print(route)
+                for detail in explain(query, conn):
+                    flag = "  <-- full table scan" if is_full_scan(detail) else ""
+                    print(f"    {detail}{flag}")
+                    if flag:
+                        full_scans.append(route)
+                print()
+    finally:
+        db.close()
+
+    if full_scans:
+        print(f"Full table scans in: {', '.join(sorted(set(full_scans)))}")
+        return 1
+    print("No full table scans")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
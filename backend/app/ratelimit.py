@@ -0,0 +1,135 @@
+"""
+Token-bucket rate limiting for outbound calls, one bucket per (API key, endpoint class)
+
+Buckets hand out reservations rather than blocking: reserve() takes the next
+token, possibly one that only refills in the future, and returns how long
+the caller must wait for it. Callers wait on their own (asyncio.sleep on the
+event loop, a bounded time.sleep in threads), so waiting needs no queue
+thread and callers are served in the order they reserved. A caller that
+would have to wait longer than it is willing to gets RateLimitedError and
+keeps no reservation.
+
+When the upstream answers 429 the bucket backs off: its rate is halved and it
+is put into debt for the Retry-After period. Every accepted call then adds back
+a small share of the configured rate, so throughput settles just under the
+upstream's real limit instead of alternating bursts and errors.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Hashable, Optional, Tuple
+
+BACKOFF_FACTOR = 0.5  # rate multiplier on 429
+MIN_RATE_FACTOR = 0.1  # never slow below this share of the configured rate
+RECOVERY_STEP = 0.01  # share of the configured rate restored per accepted call
+
+
+class RateLimitedError(Exception):
+    """No token is available within the time the caller is willing to wait"""
+
+    def __init__(self, bucket: str, retry_after: float):
+        super().__init__(f"Rate limit for {bucket}; retry in {retry_after:.1f}s")
+        self.bucket = bucket
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst  # negative while reservations are outstanding
+        self._updated = time.monotonic()
+        self._last_cut = 0.0  # calls reserved before this were paced at an older rate
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def reserve(self, max_wait: float) -> Tuple[bool, float]:
+        """
+        Take a token if it is available within max_wait seconds. Returns
+        (granted, wait): the caller must wait `wait` seconds before calling
+        out, or, when not granted, may try again after that long.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            if wait > max_wait:
+                return False, wait
+            self.tokens -= 1
+            return True, wait
+
+    def throttled(self, retry_after: Optional[float] = None, reserved_at: float = 0.0):
+        """
+        The upstream answered 429 to a call reserved at `reserved_at`: pause
+        for retry_after (default one token interval) and slow down, unless the
+        call was paced before the last slowdown, which already accounted for it.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if reserved_at >= self._last_cut:
+                self.rate = max(self.max_rate * MIN_RATE_FACTOR, self.rate * BACKOFF_FACTOR)
+                self._last_cut = now
+            pause = retry_after if retry_after is not None else 1 / self.rate
+            self.tokens = min(self.tokens, -pause * self.rate)
+
+    def accepted(self):
+        """The upstream accepted a call: recover towards the configured rate"""
+        if self.rate < self.max_rate:
+            with self._lock:
+                self._refill(time.monotonic())
+                self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_STEP)
+
+
+class RateLimiter:
+    """Buckets created on first use per (key, endpoint class) with that class's limits"""
+
+    def __init__(self, limits: Dict[str, Tuple[float, float]], default: Tuple[float, float]):
+        self.limits = limits
+        self.default = default
+        self._buckets: Dict[Tuple[Hashable, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, key: Hashable, endpoint_class: str) -> TokenBucket:
+        bucket = self._buckets.get((key, endpoint_class))
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get((key, endpoint_class))
+                if bucket is None:
+                    rate, burst = self.limits.get(endpoint_class, self.default)
+                    bucket = self._buckets[(key, endpoint_class)] = TokenBucket(rate, burst)
+        return bucket
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """Parse "read=10/20,write=2/5" (class=requests per second/burst; burst defaults to the rate)"""
+    limits = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, value = part.partition("=")
+        rate, _, burst = value.partition("/")
+        limits[name.strip()] = (float(rate), float(burst or rate))
+    return limits
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date); None if absent or invalid"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
@@ -0,0 +1,158 @@
+"""
+Circuit breakers, retry backoff and deadline budgets for outbound calls
+
+A CircuitBreaker guards one upstream host. After `failure_threshold`
+consecutive failures (connection errors, timeouts, 5xx) it opens and refuses
+calls with CircuitOpenError for `reset_timeout` seconds, so an outage costs
+callers microseconds instead of a full timeout each. Then it goes half-open
+and lets a single probe through: success closes it, failure opens it again.
+
+A deadline is an absolute time.monotonic() budget kept in a ContextVar.
+request_deadline() narrows it for a block (a route that falls back to mock
+data sets a short one); retries are only scheduled while they fit in it.
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from .telemetry import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+STATES = (CLOSED, OPEN, HALF_OPEN)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+_deadline: ContextVar[Optional[float]] = ContextVar("upstream_deadline", default=None)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"Circuit open for {host}; retry in {retry_after:.1f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out before the upstream call could be made"""
+
+
+class CircuitBreaker:
+    def __init__(self, host: str, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self._export()
+
+    def _export(self):
+        for state in STATES:
+            metrics.circuit_state.set((self.host, state), 1 if state == self.state else 0)
+
+    def _transition(self, state: str):
+        self.state = state
+        metrics.circuit_transitions.inc((self.host, state))
+        self._export()
+
+    def before_call(self):
+        """Admit one call or raise CircuitOpenError; half-open admits a single probe"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if self.state == OPEN and remaining <= 0:
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            raise CircuitOpenError(self.host, max(remaining, 0))
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def release(self):
+        """End a call that neither succeeded nor failed (e.g. cancelled) without changing state"""
+        with self._lock:
+            self._probing = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(host: str, failure_threshold: int = 5, reset_timeout: float = 30) -> CircuitBreaker:
+    """Shared breaker for an upstream host, created on first use"""
+    breaker = _breakers.get(host)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(host)
+            if breaker is None:
+                breaker = _breakers[host] = CircuitBreaker(host, failure_threshold, reset_timeout)
+    return breaker
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, bounded by attempts and the deadline"""
+
+    def __init__(self, retries: int = 2, base: float = 0.2, cap: float = 2.0):
+        self.retries = retries
+        self.base = base
+        self.cap = cap
+
+    def delay(self, attempt: int, deadline: float, retryable: bool = True) -> Optional[float]:
+        """Seconds to wait before attempt + 1, or None when no retry should be made"""
+        if not retryable or attempt > self.retries:
+            return None
+        delay = random.uniform(0, min(self.cap, self.base * (2 ** (attempt - 1))))
+        if time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+
+def current_deadline(default_budget: float) -> float:
+    """The deadline of the enclosing request_deadline() block, or now + default_budget"""
+    deadline = _deadline.get()
+    return deadline if deadline is not None else time.monotonic() + default_budget
+
+
+def remaining(deadline: float) -> float:
+    """Seconds left before deadline; raises DeadlineExceeded when none are"""
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise DeadlineExceeded("Upstream deadline exceeded")
+    return left
+
+
+@contextmanager
+def request_deadline(seconds: float):
+    """Limit upstream calls inside this block to `seconds` in total (never extends an outer deadline)"""
+    outer = _deadline.get()
+    deadline = time.monotonic() + seconds
+    token = _deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
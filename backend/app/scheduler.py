@@ -0,0 +1,270 @@
+"""
+In-process scheduler that publishes scheduled posts and calendar entries on time
+
+Due times live in indexed UTC columns (Post.scheduled_at and
+ContentCalendar.scheduled_date). The scheduler keeps a min-heap of everything
+due within the next SCHEDULER_LOOKAHEAD seconds and only reads the slice of
+the index past what it has already loaded, so it never rescans the table.
+On startup the first slice starts at the beginning of time, which catches up
+on anything missed while the process was down.
+
+Heap entries are (due, kind, id) tuples and the loaded window ends at such a
+tuple, so a slice cut off by SCHEDULER_BATCH_SIZE resumes exactly after its
+last row, even among rows sharing a due time.
+
+Entries are validated again when they fire, so edits and cancellations only
+need to call notify() with the new due time; stale heap entries are skipped.
+Both kinds are published through the publish queue.
+"""
+
+import heapq
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import or_, update
+
+from .database import SessionLocal
+from .models import AISettings, ContentCalendar, Post
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "4"))
+SCHEDULER_LOOKAHEAD = float(os.getenv("SCHEDULER_LOOKAHEAD", "600"))
+SCHEDULER_BATCH_SIZE = int(os.getenv("SCHEDULER_BATCH_SIZE", "1000"))
+SCHEDULER_TIMEZONE = os.getenv("SCHEDULER_TIMEZONE", "UTC")  # applied to due times without an offset
+SCHEDULER_KEY_NAME = os.getenv("SCHEDULER_KEY_NAME", "metricool")  # /api/keys entry used to publish
+METRICOOL_USER_ID = os.getenv("METRICOOL_USER_ID", "4421531")
+METRICOOL_BLOG_ID = os.getenv("METRICOOL_BLOG_ID", "5704319")
+
+POST = "post"
+CALENDAR = "calendar"
+
+
+def within(entry, bound) -> bool:
+    """
+    True when heap entry (due, kind, id) is at or before bound, a
+    (due, kind, id) tuple or (due, None, None) for "everything due by then"
+    """
+    if entry[0] != bound[0]:
+        return entry[0] < bound[0]
+    return bound[1] is None or entry[1:] <= bound[1:]
+
+
+def parse_due_time(value) -> Optional[datetime]:
+    """Normalize a datetime or ISO-8601 string to a naive UTC datetime"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        dt = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=ZoneInfo(SCHEDULER_TIMEZONE))
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def set_post_schedule(post: Post, scheduled_for: Optional[str]):
+    """Store the free-form schedule string and its normalized due time; raises ValueError"""
+    post.scheduled_at = parse_due_time(scheduled_for)
+    post.scheduled_for = scheduled_for
+
+
+class Scheduler:
+    """Fires due posts and calendar entries from an in-memory min-heap"""
+
+    def __init__(self, workers: int = SCHEDULER_WORKERS, lookahead: float = SCHEDULER_LOOKAHEAD):
+        self.workers = workers
+        self.lookahead = timedelta(seconds=lookahead)
+        self._heap = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pool = None
+        self._loaded_until = None  # entries up to this bound (see within()) are already in the heap
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop.clear()
+        self._loaded_until = None
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scheduler")
+        self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._pool:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        with self._lock:
+            self._heap = []
+
+    def notify(self, kind: str, item_id: int, due: Optional[datetime]):
+        """Tell the scheduler about a new or changed due time (after commit)"""
+        if due is None or self._thread is None:
+            return
+        with self._lock:
+            # Beyond the loaded window the next refill will pick it up
+            if self._loaded_until is not None and not within((due, kind, item_id), self._loaded_until):
+                return
+            heapq.heappush(self._heap, (due, kind, item_id))
+        self._wakeup.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._heap)
+
+    @property
+    def backlogged(self) -> bool:
+        """The last refill was cut off by SCHEDULER_BATCH_SIZE before the horizon"""
+        return self._loaded_until is not None and self._loaded_until[1] is not None
+
+    def _refill(self, now: datetime):
+        """Load the next slice of due items from the indexed due-time columns"""
+        horizon = now + self.lookahead
+        start = self._loaded_until
+        db = SessionLocal()
+        try:
+            entries = []
+            cut_offs = []
+            for kind, model, column, status in (
+                (POST, Post, Post.scheduled_at, Post.publish_status),
+                (CALENDAR, ContentCalendar, ContentCalendar.scheduled_date, ContentCalendar.status),
+            ):
+                query = db.query(model.id, column).filter(status == "scheduled", column <= horizon)
+                if start is None:
+                    query = query.filter(column.isnot(None))
+                elif start[1] is None or kind < start[1]:
+                    query = query.filter(column > start[0])
+                elif kind > start[1]:
+                    query = query.filter(column >= start[0])
+                else:
+                    query = query.filter(column >= start[0], or_(column > start[0], model.id > start[2]))
+                rows = [(due, kind, item_id) for item_id, due in query.order_by(column, model.id).limit(SCHEDULER_BATCH_SIZE)]
+                entries.extend(rows)
+                if len(rows) >= SCHEDULER_BATCH_SIZE:
+                    cut_offs.append(rows[-1])  # nothing past this source's last row is known to be loaded
+        finally:
+            db.close()
+
+        bound = min(cut_offs) if cut_offs else (horizon, None, None)
+
+        with self._lock:
+            # Rows of the other source past the bound are reloaded by the next slice
+            for entry in entries:
+                if within(entry, bound):
+                    heapq.heappush(self._heap, entry)
+            self._loaded_until = bound
+
+    def _run(self):
+        next_refill = datetime.min
+        while not self._stop.is_set():
+            # Clear before reading the heap so a notify() during this tick is not lost
+            self._wakeup.clear()
+            now = datetime.utcnow()
+            try:
+                if now >= next_refill:
+                    self._refill(now)
+                    next_refill = now if self.backlogged else now + self.lookahead / 2
+
+                with self._lock:
+                    due = []
+                    while self._heap and self._heap[0][0] <= now:
+                        due.append(heapq.heappop(self._heap))
+                    next_due = self._heap[0][0] if self._heap else None
+                for when, kind, item_id in due:
+                    self._pool.submit(self._fire, kind, item_id, when)
+            except Exception:
+                logger.exception("Scheduler tick failed")
+                next_refill = now + timedelta(seconds=5)
+                next_due = None
+
+            wake_at = min(t for t in (next_refill, next_due) if t is not None)
+            timeout = max(0.0, (wake_at - datetime.utcnow()).total_seconds())
+            self._wakeup.wait(timeout)
+
+    def _fire(self, kind: str, item_id: int, due: datetime):
+        db = SessionLocal()
+        try:
+            if kind == POST:
+                self._fire_post(db, item_id, due)
+            else:
+                self._fire_calendar(db, item_id, due)
+        except Exception:
+            logger.exception("Scheduled %s %s failed", kind, item_id)
+            db.rollback()
+        finally:
+            db.close()
+
+    def _publish_payload(self, db, owner, platforms) -> Optional[dict]:
+        key = db.query(AISettings).filter(
+            AISettings.user_id == owner,
+            AISettings.provider == SCHEDULER_KEY_NAME
+        ).first()
+        if not key:
+            return None
+        return {"api_key": key.api_key, "user_id": METRICOOL_USER_ID, "blog_id": METRICOOL_BLOG_ID, "platforms": platforms}
+
+    def _fire_post(self, db, post_id: int, due: datetime):
+        """
+        Claim, look up the key and enqueue in one transaction: a crash or error
+        part way rolls the claim back, so the post is never left "queued" without a job
+        """
+        # Late import: publish_queue pulls in the Metricool transport
+        from .publish_queue import enqueue_publish, publish_workers
+
+        claimed = db.execute(
+            update(Post)
+            .where(Post.id == post_id, Post.publish_status == "scheduled", Post.scheduled_at == due)
+            .values(publish_status="queued")
+        ).rowcount
+        if not claimed:
+            return  # cancelled, rescheduled or already fired
+
+        post = db.get(Post, post_id)
+        payload = self._publish_payload(db, post.user_id, [post.page_name or "linkedin"])
+        if payload is None:
+            post.publish_status = "failed"
+            post.last_error = f"No '{SCHEDULER_KEY_NAME}' API key saved for scheduled publish"
+            db.commit()
+            return
+
+        enqueue_publish(db, post, payload)
+        db.commit()
+        publish_workers.notify()
+
+    def _fire_calendar(self, db, entry_id: int, due: datetime):
+        from .publish_queue import enqueue_publish, publish_workers
+
+        claimed = db.execute(
+            update(ContentCalendar)
+            .where(ContentCalendar.id == entry_id, ContentCalendar.status == "scheduled", ContentCalendar.scheduled_date == due)
+            .values(status="queued")
+        ).rowcount
+        if not claimed:
+            return
+
+        entry = db.get(ContentCalendar, entry_id)
+        payload = self._publish_payload(db, entry.user_id, [entry.platform])
+        if payload is None:
+            logger.warning("No '%s' API key saved for calendar entry %s", SCHEDULER_KEY_NAME, entry_id)
+            entry.status = "failed"
+            db.commit()
+            return
+
+        enqueue_publish(db, entry, payload)
+        db.commit()
+        publish_workers.notify()
+
+
+scheduler = Scheduler()
@@ -0,0 +1,152 @@
+"""
+Full-text search over posts, drafts and research results (SQLite FTS5)
+
+posts_fts and research_fts are external-content FTS5 indexes. Triggers
+(migration 7) keep them in sync with their tables, so nothing here writes to
+them. The owner is indexed as a column too, which lets MATCH narrow to one
+user's rows inside the FTS index. A join on the base table then re-checks the
+owner exactly.
+
+Pages are keyset-paginated on the merged order (bm25 score, posts before
+research, id): each query only returns rows after the previous page's last
+hit, so a deep page costs the same as the first.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+
+SEARCH_TYPES = ("posts", "drafts", "research")
+SNIPPET_TOKENS = 16
+HIGHLIGHT_OPEN = "<mark>"
+HIGHLIGHT_CLOSE = "</mark>"
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+FTS_MIGRATION = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5("
+    "user_id, title, body, content='posts', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN "
+    "INSERT INTO posts_fts(rowid, user_id, title, body) VALUES (new.id, new.user_id, new.title, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, user_id, title, body) VALUES ('delete', old.id, old.user_id, old.title, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF user_id, title, body ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, user_id, title, body) VALUES ('delete', old.id, old.user_id, old.title, old.body); "
+    "INSERT INTO posts_fts(rowid, user_id, title, body) VALUES (new.id, new.user_id, new.title, new.body); END",
+    "INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')",
+
+    "CREATE VIRTUAL TABLE IF NOT EXISTS research_fts USING fts5("
+    "user_id, query, result, content='research_results', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS research_fts_ai AFTER INSERT ON research_results BEGIN "
+    "INSERT INTO research_fts(rowid, user_id, query, result) VALUES (new.id, new.user_id, new.query, new.result); END",
+    "CREATE TRIGGER IF NOT EXISTS research_fts_ad AFTER DELETE ON research_results BEGIN "
+    "INSERT INTO research_fts(research_fts, rowid, user_id, query, result) VALUES ('delete', old.id, old.user_id, old.query, old.result); END",
+    "CREATE TRIGGER IF NOT EXISTS research_fts_au AFTER UPDATE OF user_id, query, result ON research_results BEGIN "
+    "INSERT INTO research_fts(research_fts, rowid, user_id, query, result) VALUES ('delete', old.id, old.user_id, old.query, old.result); "
+    "INSERT INTO research_fts(rowid, user_id, query, result) VALUES (new.id, new.user_id, new.query, new.result); END",
+    "INSERT INTO research_fts(research_fts) VALUES ('rebuild')",
+]
+
+# Title/query weighs more than body/result; the user_id column carries no weight
+_POSTS_SQL = f"""
+SELECT p.id, p.publish_status, p.created_at,
+       highlight(posts_fts, 1, :open, :close) AS title,
+       snippet(posts_fts, 2, :open, :close, '…', {SNIPPET_TOKENS}) AS snippet,
+       bm25(posts_fts, 0.0, 5.0, 1.0) AS score
+FROM posts_fts JOIN posts p ON p.id = posts_fts.rowid
+WHERE posts_fts MATCH :match AND p.user_id = :user {{status_filter}}
+  AND (score > :after_score OR (score = :after_score AND p.id > :after_post))
+ORDER BY score, p.id
+LIMIT :limit
+"""
+
+_RESEARCH_SQL = f"""
+SELECT r.id, r.created_at,
+       highlight(research_fts, 1, :open, :close) AS title,
+       snippet(research_fts, 2, :open, :close, '…', {SNIPPET_TOKENS}) AS snippet,
+       bm25(research_fts, 0.0, 5.0, 1.0) AS score
+FROM research_fts JOIN research_results r ON r.id = research_fts.rowid
+WHERE research_fts MATCH :match AND r.user_id = :user
+  AND (score > :after_score OR (score = :after_score AND r.id > :after_research))
+ORDER BY score, r.id
+LIMIT :limit
+"""
+
+
+def _quote(value: str) -> str:
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def match_expression(query: str, user_id) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 query: every word must match (the last one
+    as a prefix), scoped to the owner. None when the text has no words.
+    """
+    terms = _TERM.findall(query or "")
+    if not terms:
+        return None
+    parts = [_quote(term) for term in terms[:-1]] + [_quote(terms[-1]) + "*"]
+    return f"user_id:{_quote(user_id)} AND ({' '.join(parts)})"
+
+
+def _created_at(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def search(db, user_id, query: str, types=SEARCH_TYPES, after: Optional[Tuple[float, str, int]] = None, limit: int = 20) -> Tuple[List[dict], Optional[Tuple[float, str, int]]]:
+    """
+    Ranked hits across the requested types, best first, starting after the
+    (bm25 score, kind, id) key of the previous page's last hit. Returns the
+    page and the key to pass as `after` for the next one (None on the last page).
+    """
+    match = match_expression(query, user_id)
+    if match is None:
+        return [], None
+    after_score, after_kind, after_id = after or (float("-inf"), "post", 0)
+    params = {
+        "match": match, "user": user_id, "limit": limit + 1, "open": HIGHLIGHT_OPEN, "close": HIGHLIGHT_CLOSE,
+        "after_score": after_score,
+        # At an equal score posts come first: after a research hit, no post with that score is left
+        "after_post": after_id if after_kind == "post" else float("inf"),
+        "after_research": after_id if after_kind == "research" else 0,
+    }
+    hits = []
+
+    if "posts" in types or "drafts" in types:
+        if "posts" not in types:
+            status_filter = "AND p.publish_status = 'draft'"
+        elif "drafts" not in types:
+            status_filter = "AND p.publish_status != 'draft'"
+        else:
+            status_filter = ""
+        for row in db.execute(text(_POSTS_SQL.format(status_filter=status_filter)), params).mappings():
+            hits.append({
+                "type": "draft" if row["publish_status"] == "draft" else "post",
+                "id": row["id"],
+                "title": row["title"],
+                "snippet": row["snippet"],
+                "status": row["publish_status"],
+                "score": row["score"],
+                "created_at": _created_at(row["created_at"]),
+            })
+
+    if "research" in types:
+        for row in db.execute(text(_RESEARCH_SQL), params).mappings():
+            hits.append({
+                "type": "research",
+                "id": row["id"],
+                "title": row["title"],
+                "snippet": row["snippet"],
+                "score": row["score"],
+                "created_at": _created_at(row["created_at"]),
+            })
+
+    # Same order as each SQL query's ORDER BY, so pages never overlap
+    hits.sort(key=lambda hit: (hit["score"], hit["type"] == "research", hit["id"]))
+    page = hits[:limit]
+    last = page[-1] if page else None
+    next_after = (last["score"], "research" if last["type"] == "research" else "post", last["id"]) if len(hits) > limit else None
+    for hit in page:
+        hit["score"] = round(-hit["score"], 4)
+    return page, next_after
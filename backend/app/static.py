@@ -0,0 +1,161 @@
+"""
+Conditional, range-aware responses for files under /uploads
+
+Each file's size, mtime and ETag are kept in an in-memory stat cache, so a
+cache hit costs no filesystem call until the file is opened. Content-addressed
+uploads (`<sha256><ext>`) and their variants never change. Their ETag is the
+hash in the name, and they are served with an immutable, year-long
+Cache-Control. Older timestamp-named files get an ETag from their mtime and
+size (as Starlette's FileResponse does), so serving them never reads the file
+on the event loop.
+"""
+
+import os
+import re
+import stat
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+
+import anyio
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+from .cache import TTLCache
+
+STAT_CACHE_SIZE = int(os.getenv("STAT_CACHE_SIZE", "4096"))
+STAT_CACHE_TTL = float(os.getenv("STAT_CACHE_TTL", "300"))
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=3600"
+
+_CONTENT_ADDRESSED = re.compile(r"^[0-9a-f]{64}(\.[a-z0-9]{1,10})?$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+@dataclass(frozen=True)
+class FileStat:
+    stat: os.stat_result
+    etag: str
+    immutable: bool
+
+    @property
+    def last_modified(self) -> str:
+        return formatdate(self.stat.st_mtime, usegmt=True)
+
+
+def _load_stat(path: str, filename: str, variant: Optional[str]) -> Optional[FileStat]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    immutable = bool(_CONTENT_ADDRESSED.match(filename))
+    content_hash = os.path.splitext(filename)[0] if immutable else f"{st.st_mtime_ns:x}-{st.st_size:x}"
+    etag = f'"{content_hash}-{variant}"' if variant else f'"{content_hash}"'
+    return FileStat(st, etag, immutable)
+
+
+stat_cache = TTLCache(max_size=STAT_CACHE_SIZE, ttl=STAT_CACHE_TTL, stale_ttl=0)
+
+
+def file_stat(path: str, filename: str, variant: Optional[str] = None) -> Optional[FileStat]:
+    """Cached stat + ETag for a served file; None if it does not exist (not cached)"""
+    return stat_cache.get_or_load(
+        path, lambda: _load_stat(path, filename, variant), cacheable=lambda value: value is not None
+    )
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def not_modified(request: Request, fstat: FileStat) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, fstat.etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(fstat.stat.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) for a single `bytes=` range. Returns None when the
+    header should be ignored; raises ValueError when it cannot be satisfied.
+    """
+    match = _RANGE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None  # malformed or multi-range: answer with the whole file
+    first, last = match.groups()
+    if first == "":
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+class RangeFileResponse(FileResponse):
+    """206 response carrying bytes start..end (inclusive) of a file"""
+
+    def __init__(self, path: str, start: int, end: int, **kwargs):
+        super().__init__(path, status_code=206, **kwargs)
+        self.start = start
+        self.end = end
+        self.headers["content-length"] = str(end - start + 1)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def serve_file(request: Request, path: str, fstat: FileStat) -> Response:
+    """Answer a GET/HEAD for a file with 200, 206, 304 or 416 as appropriate"""
+    size = fstat.stat.st_size
+    headers = {
+        "etag": fstat.etag,
+        "last-modified": fstat.last_modified,
+        "cache-control": IMMUTABLE_CACHE_CONTROL if fstat.immutable else DEFAULT_CACHE_CONTROL,
+        "accept-ranges": "bytes",
+    }
+    if not_modified(request, fstat):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == fstat.etag or if_range.strip() == fstat.last_modified):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+            return RangeFileResponse(path, start, end, headers=headers, stat_result=fstat.stat)
+
+    return FileResponse(path, headers=headers, stat_result=fstat.stat)
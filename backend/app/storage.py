@@ -1,31 +1,35 @@
 """
-Simple JSON-based storage for the dashboard
+Read-only access to the legacy JSON store
+
+Posts and API keys now live in SQLite; move them over with
+`python -m app.import_json`. This module only reads data.json, and only the
+first time load_data() is called, so importing it never touches disk.
 """
 import json
 import os
-from pathlib import Path
+from functools import lru_cache
+
+STORAGE_FILE = os.getenv("STORAGE_FILE", "/home/user/GitRepos/social-media-dashboard/backend/data.json")
+
+
+@lru_cache(maxsize=1)
+def _read():
+    try:
+        with open(STORAGE_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
 
-STORAGE_FILE = "/home/user/GitRepos/social-media-dashboard/backend/data.json"
 
 def load_data():
-    """Load data from JSON file"""
-    if os.path.exists(STORAGE_FILE):
-        try:
-            with open(STORAGE_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            pass
+    """Load the legacy data (cached after the first read; do not mutate)"""
+    data = _read()
     return {
-        "posts": [],
-        "api_keys": {}
+        "posts": data.get("posts", []),
+        "api_keys": data.get("api_keys", {})
     }
 
+
 def save_data(data):
-    """Save data to JSON file"""
-    os.makedirs(os.path.dirname(STORAGE_FILE), exist_ok=True)
-    with open(STORAGE_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
-
-# Initialize storage file
-if not os.path.exists(STORAGE_FILE):
-    save_data({"posts": [], "api_keys": {}})
+    """The JSON store is read-only; write to the database instead"""
+    raise RuntimeError("data.json is read-only; posts and API keys are stored in SQLite")
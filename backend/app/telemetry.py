@@ -0,0 +1,274 @@
+"""
+Latency and error metrics for routes and upstream calls, in Prometheus text format
+
+MetricsMiddleware is a plain ASGI middleware. It never resolves routes itself:
+FastAPI records the matched route in scope["route"], and the middleware reads
+it when the response is done, so the labels are route templates
+(/api/posts/{post_id}). In-flight requests are kept in a dict and grouped by
+route only when /metrics is scraped. That keeps the per-request cost to a few
+dict and lock operations.
+
+Outbound Metricool and MiniMax calls are timed with upstream_call(). A call
+made inside mock_fallback() whose failure the route answers with mock data is
+recorded with outcome "mock_fallback" instead of the error it raised. Circuit
+breaker states, retries and rate limiting are exported alongside (see
+resilience.py and ratelimit.py).
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UPSTREAM_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+SUCCESS = "success"
+HTTP_ERROR = "http_error"
+TIMEOUT = "timeout"
+ERROR = "error"
+MOCK_FALLBACK = "mock_fallback"
+CIRCUIT_OPEN = "circuit_open"
+
+UNMATCHED_ROUTE = "unmatched"
+
+_fallback: ContextVar[Optional[bool]] = ContextVar("upstream_mock_fallback", default=None)  # None, or whether HTTP errors fall back too
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Tuple = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labelnames, labels)} {_number(v)}" for labels, v in items]
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._values: Dict[Tuple, float] = {}
+
+    def set(self, labels: Tuple, value: float):
+        self._values[labels] = value
+
+    def value(self, labels: Tuple = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        lines += [f"{self.name}{_labels(self.labelnames, labels)} {_number(v)}" for labels, v in sorted(self._values.items())]
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is one bisect and one locked update"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, list] = {}  # labels -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, labels: Tuple) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Route and upstream metrics for this process"""
+
+    def __init__(self):
+        self.requests = Counter("http_requests_total", "HTTP requests by route template and status code", ("method", "route", "status"))
+        self.latency = Histogram("http_request_duration_seconds", "Time from request start to the end of the response body", ("method", "route"))
+        self.exceptions = Counter("http_request_exceptions_total", "Unhandled exceptions raised by a route", ("method", "route", "exception"))
+        self.upstream_latency = Histogram(
+            "upstream_request_duration_seconds", "Outbound call time (to response headers for streams)",
+            ("upstream", "method", "endpoint", "outcome"), UPSTREAM_BUCKETS
+        )
+        self.upstream_retries = Counter("upstream_retries_total", "Outbound calls sent again after a failed attempt", ("upstream", "method", "endpoint"))
+        self.rate_limit_wait = Histogram(
+            "upstream_rate_limit_wait_seconds", "Time outbound calls waited for a rate limit token",
+            ("upstream", "class"), (0.0,) + LATENCY_BUCKETS
+        )
+        self.rate_limited = Counter(
+            "upstream_rate_limited_total", "Calls refused by the local rate limiter (local) or answered 429 (upstream)",
+            ("upstream", "class", "source")
+        )
+        self.circuit_state = Gauge("upstream_circuit_state", "1 for the current circuit breaker state of each upstream host", ("host", "state"))
+        self.circuit_transitions = Counter("upstream_circuit_transitions_total", "Circuit breaker state changes by new state", ("host", "state"))
+        self._active: Dict[int, dict] = {}  # id(scope) -> scope of requests in flight
+        self._started = time.time()
+
+    def record_upstream(self, upstream: str, method: str, endpoint: str, outcome: str, seconds: float):
+        fallback = _fallback.get()
+        if fallback is not None and outcome != SUCCESS and (fallback or outcome != HTTP_ERROR):
+            outcome = MOCK_FALLBACK
+        self.upstream_latency.observe((upstream, method, endpoint, outcome), seconds)
+
+    def in_flight(self) -> Dict[Tuple[str, str], int]:
+        counts: Dict[Tuple[str, str], int] = {}
+        for scope in list(self._active.values()):
+            key = (scope["method"], route_template(scope))
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def render(self) -> str:
+        lines = [
+            "# HELP process_start_time_seconds Unix time the process started",
+            "# TYPE process_start_time_seconds gauge",
+            f"process_start_time_seconds {_number(self._started)}",
+            "# HELP http_requests_in_progress HTTP requests currently being served",
+            "# TYPE http_requests_in_progress gauge",
+        ]
+        lines += [
+            f"http_requests_in_progress{_labels(('method', 'route'), key)} {n}"
+            for key, n in sorted(self.in_flight().items())
+        ]
+        for metric in (
+            self.requests, self.latency, self.exceptions, self.upstream_latency,
+            self.upstream_retries, self.rate_limit_wait, self.rate_limited,
+            self.circuit_state, self.circuit_transitions
+        ):
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+def route_template(scope: dict) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Records latency, status and exceptions per route template for every HTTP request"""
+
+    def __init__(self, app, registry: "MetricsRegistry" = None):
+        self.app = app
+        self.registry = registry or metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        key = id(scope)
+        registry._active[key] = scope
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            registry.exceptions.inc((scope["method"], route_template(scope), type(e).__name__))
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            registry._active.pop(key, None)
+            route = route_template(scope)
+            registry.latency.observe((scope["method"], route), elapsed)
+            registry.requests.inc((scope["method"], route, status[0]))
+
+
+@contextmanager
+def upstream_call(upstream: str, method: str, endpoint: str):
+    """
+    Time one outbound call. Yields a dict; set "status" to the response status
+    code. Exceptions are classified by name (anything named *Timeout* is a
+    timeout, *CircuitOpen* a call the breaker refused) and re-raised.
+    """
+    call = {"status": None}
+    start = time.perf_counter()
+    try:
+        yield call
+    except BaseException as e:
+        name = type(e).__name__
+        outcome = TIMEOUT if "Timeout" in name else CIRCUIT_OPEN if "CircuitOpen" in name else ERROR
+        metrics.record_upstream(upstream, method, endpoint, outcome, time.perf_counter() - start)
+        raise
+    status = call["status"]
+    outcome = HTTP_ERROR if status is not None and status >= 400 else SUCCESS
+    metrics.record_upstream(upstream, method, endpoint, outcome, time.perf_counter() - start)
+
+
+@contextmanager
+def mock_fallback(http_errors: bool = True):
+    """
+    Mark upstream failures inside this block as answered with mock data. With
+    http_errors=False only raised errors are; error responses keep http_error.
+    """
+    token = _fallback.set(http_errors)
+    try:
+        yield
+    finally:
+        _fallback.reset(token)
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,105 @@
+"""
+Content-addressed media storage
+
+Uploads are read in UPLOAD_CHUNK_SIZE pieces and hashed with SHA-256, so
+memory use stays flat however large the file is. Each file is stored once as
+`<sha256><ext>`, where the extension comes from the file's leading bytes for
+the image types we recognise and is otherwise the client's, folded to one
+spelling (.jpeg -> .jpg), so the same bytes never land under two names. A seekable source (Starlette has already spooled the upload)
+is hashed in one read pass first and only copied when that file does not
+exist yet, so uploading the same bytes again writes nothing. Other sources
+are hashed while they are copied to a temp file.
+"""
+
+import hashlib
+import os
+import re
+import uuid
+from typing import BinaryIO, Optional, Tuple
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "/home/user/GitRepos/social-media-dashboard/backend/uploads")
+UPLOAD_BASE_URL = os.getenv("UPLOAD_BASE_URL", "http://100.101.67.20:8000/uploads")
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+_EXT_RE = re.compile(r"^\.[a-z0-9]{1,10}$")
+_EXT_ALIASES = {".jpeg": ".jpg", ".jpe": ".jpg", ".tif": ".tiff", ".htm": ".html", ".mpeg": ".mpg"}
+_SNIFF_BYTES = 12
+
+
+def safe_extension(filename: str) -> str:
+    """Lower-cased extension of the original name, or '' if it looks unsafe"""
+    ext = os.path.splitext(filename or "")[1].lower()
+    if not _EXT_RE.match(ext):
+        return ""
+    return _EXT_ALIASES.get(ext, ext)
+
+
+def sniff_extension(head: bytes) -> Optional[str]:
+    """Extension for the image type these leading bytes start, or None"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return ".gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+def upload_url(filename: str) -> str:
+    return f"{UPLOAD_BASE_URL}/{filename}"
+
+
+def _copy_chunks(source: BinaryIO, out: Optional[BinaryIO], digest) -> Tuple[int, bytes]:
+    """
+    Read source to the end, hashing each chunk and writing it to out if
+    given; returns the size and the first _SNIFF_BYTES bytes
+    """
+    size = 0
+    head = b""
+    while True:
+        chunk = source.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            return size, head
+        if len(head) < _SNIFF_BYTES:
+            head += chunk[:_SNIFF_BYTES - len(head)]
+        digest.update(chunk)
+        if out is not None:
+            out.write(chunk)
+        size += len(chunk)
+
+
+def store_stream(source: BinaryIO, original_name: str) -> Tuple[str, int, bool]:
+    """
+    Copy source into UPLOAD_DIR under its content hash.
+
+    Returns (filename, size, created); created is False when identical
+    content was already stored. Blocking, so run it in a worker thread.
+    """
+    ext = safe_extension(original_name)
+    if getattr(source, "seekable", lambda: False)():
+        start = source.tell()
+        digest = hashlib.sha256()
+        size, head = _copy_chunks(source, None, digest)
+        filename = digest.hexdigest() + (sniff_extension(head) or ext)
+        if os.path.exists(os.path.join(UPLOAD_DIR, filename)):
+            return filename, size, False
+        source.seek(start)
+
+    digest = hashlib.sha256()
+    tmp_path = os.path.join(UPLOAD_DIR, f".upload-{uuid.uuid4().hex}.part")
+    try:
+        with open(tmp_path, "wb") as out:
+            size, head = _copy_chunks(source, out, digest)
+
+        filename = digest.hexdigest() + (sniff_extension(head) or ext)
+        final_path = os.path.join(UPLOAD_DIR, filename)
+        if os.path.exists(final_path):
+            return filename, size, False
+        # Atomic; a concurrent upload of the same bytes just replaces it with an identical file
+        os.replace(tmp_path, final_path)
+        return filename, size, True
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,132 @@
+"""
+Mixed read/write SQLite benchmark
+
+Runs the same workload against a fresh database for each SQLITE_PROFILE.
+Writer threads insert posts and commit one at a time. Reader threads run the
+first-page query behind GET /api/posts. Reports throughput and read latency
+per profile.
+
+Usage (from backend/):
+    python benchmarks/db_concurrency.py
+    python benchmarks/db_concurrency.py --readers 16 --writers 4 --seconds 10 --read-engine
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILES = ["legacy", "wal"]
+
+
+def run_workload(readers: int, writers: int, seconds: float, seed_rows: int) -> dict:
+    """Runs inside a child process whose environment selects the profile"""
+    sys.path.insert(0, BACKEND_DIR)
+    from sqlalchemy.exc import OperationalError
+
+    from app.database import ReadSessionLocal, SessionLocal
+    from app.migrations import run_migrations
+    from app.models import Post
+    from app.pagination import DEFAULT_PAGE_SIZE, paginate
+
+    run_migrations()
+    db = SessionLocal()
+    db.bulk_insert_mappings(Post, [{"user_id": "bench", "body": f"seed {i}", "publish_status": "draft"} for i in range(seed_rows)])
+    db.commit()
+    db.close()
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    results = {"reads": 0, "writes": 0, "errors": 0, "read_latencies": []}
+
+    def reader():
+        latencies = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            session = ReadSessionLocal()
+            try:
+                paginate(session.query(Post).filter(Post.user_id == "bench"), Post.created_at, Post.id, None, DEFAULT_PAGE_SIZE)
+                latencies.append(time.perf_counter() - start)
+            except OperationalError:
+                with lock:
+                    results["errors"] += 1
+            finally:
+                session.close()
+        with lock:
+            results["reads"] += len(latencies)
+            results["read_latencies"].extend(latencies)
+
+    def writer():
+        count = 0
+        while not stop.is_set():
+            session = SessionLocal()
+            try:
+                session.add(Post(user_id="bench", body="x" * 200, publish_status="draft"))
+                session.commit()
+                count += 1
+            except OperationalError:
+                session.rollback()
+                with lock:
+                    results["errors"] += 1
+            finally:
+                session.close()
+        with lock:
+            results["writes"] += count
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)] + [threading.Thread(target=writer) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    latencies = sorted(results.pop("read_latencies"))
+    results["reads_per_sec"] = round(results["reads"] / seconds, 1)
+    results["writes_per_sec"] = round(results["writes"] / seconds, 1)
+    results["read_p50_ms"] = round(statistics.median(latencies) * 1000, 2) if latencies else None
+    results["read_p99_ms"] = round(latencies[int(len(latencies) * 0.99)] * 1000, 2) if latencies else None
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--seed-rows", type=int, default=5000)
+    parser.add_argument("--read-engine", action="store_true", help="use the separate read-only engine for readers")
+    parser.add_argument("--profiles", default=",".join(PROFILES))
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_workload(args.readers, args.writers, args.seconds, args.seed_rows)))
+        return
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s per profile")
+    for profile in args.profiles.split(","):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(
+                os.environ,
+                DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                SQLITE_PROFILE=profile,
+                DB_READ_ENGINE="1" if args.read_engine else "0",
+            )
+            child = [sys.executable, os.path.abspath(__file__), "--child",
+                     "--readers", str(args.readers), "--writers", str(args.writers),
+                     "--seconds", str(args.seconds), "--seed-rows", str(args.seed_rows)]
+            out = subprocess.run(child, env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(f"{profile:<7} reads/s={r['reads_per_sec']:<8} writes/s={r['writes_per_sec']:<7} "
+              f"read p50={r['read_p50_ms']}ms p99={r['read_p99_ms']}ms errors={r['errors']}")
+
+
+if __name__ == "__main__":
+    main()
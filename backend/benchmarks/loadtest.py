@@ -0,0 +1,384 @@
+"""
+Reproducible load test: seeded temporary database, stub upstreams, mixed traffic
+
+Steps:
+1. Seed a fresh SQLite database with --users users. Each user gets --posts
+   posts, --drafts drafts, --calendar calendar entries, --research research
+   results, and saved minimax/metricool keys.
+2. Start the Metricool/MiniMax stubs (upstream_stubs.py) with the given latency
+   and error rate, and the API under uvicorn, both as subprocesses.
+3. Run --concurrency virtual users for --duration seconds. Each one loops over
+   actions picked by weight from --mix:
+     dashboard   posts, drafts, calendar summary, hashtags and trends pages
+     search      full-text search for a vocabulary word
+     draft_edit  rewrite one of the user's drafts
+     publish     save a new draft and queue it for publishing
+     ai          generate a post (about half are cache hits)
+     channels    Metricool channel lookup through the proxy
+4. Print throughput and p50/p95/p99 per route. Optionally write the results
+   as JSON (--output), or compare them with an earlier file (--compare).
+   --compare exits 1 when a route's p95 regressed by more than --tolerance.
+
+Everything random comes from --seed, so two runs issue the same requests.
+
+Usage (from backend/):
+    python benchmarks/loadtest.py
+    python benchmarks/loadtest.py --users 20 --posts 2000 --concurrency 50 --duration 30
+    python benchmarks/loadtest.py --mix dashboard=60,draft_edit=20,publish=10,ai=10 --upstream-latency 0.2
+    python benchmarks/loadtest.py --output baseline.json
+    python benchmarks/loadtest.py --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import httpx
+
+from login_storm import BACKEND_DIR, free_port, percentile, start_server
+from upstream_stubs import upstream_env
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PASSWORD = "bench-password"
+WORDS = (
+    "launch", "dessert", "recipe", "pricing", "webinar", "hiring", "roadmap", "chocolate", "expo", "partner",
+    "summer", "holiday", "customer", "story", "team", "update", "release", "vegan", "catering", "award",
+)
+PLATFORMS = ("linkedin", "instagram", "twitter", "facebook")
+DEFAULT_MIX = "dashboard=50,search=10,draft_edit=15,publish=10,ai=10,channels=5"
+FORMAT_VERSION = 1
+
+
+# ============ Seeding ============
+
+def seed(db_path: str, args) -> dict:
+    """Fill a fresh database; returns {email: [draft ids]}. Imports the app with DATABASE_URL set."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    sys.path.insert(0, BACKEND_DIR)
+    from sqlalchemy import insert
+
+    from app.database import SessionLocal
+    from app.migrations import run_migrations
+    from app.models import AISettings, ContentCalendar, Post, PostHashtag, ResearchResult, User
+    from app.passwords import pwd_context
+    from app.post_index import backfill_rows
+
+    run_migrations()
+    rng = random.Random(args.seed)
+    password_hash = pwd_context.hash(PASSWORD)  # one bcrypt for every user
+    now = datetime.utcnow()
+    drafts = {}
+
+    def sentence(n=24):
+        return " ".join(rng.choice(WORDS) for _ in range(n))
+
+    db = SessionLocal()
+    try:
+        for u in range(args.users):
+            email = f"user{u}@bench.local"
+            db.add(User(email=email, name=f"Bench {u}", password_hash=password_hash))
+            db.add_all([
+                AISettings(user_id=email, provider="minimax", api_key="bench-minimax"),
+                AISettings(user_id=email, provider="metricool", api_key="bench-metricool"),
+            ])
+
+            rows = []
+            for i in range(args.posts + args.drafts):
+                is_draft = i >= args.posts
+                rows.append({
+                    "user_id": email,
+                    "body": sentence(),
+                    "page_name": rng.choice(PLATFORMS),
+                    "hashtags": ",".join(f"#{rng.choice(WORDS)}" for _ in range(3)),
+                    "publish_status": "draft" if is_draft else rng.choice(("approved", "published", "pending")),
+                    "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+                })
+            ids = db.execute(insert(Post).returning(Post.id, sort_by_parameter_order=True), rows).scalars().all()
+            tags = []
+            for post_id, row in zip(ids, rows):
+                tags.extend(backfill_rows(post_id, email, row["hashtags"], None)[0])
+            if tags:
+                db.execute(insert(PostHashtag), tags)
+            drafts[email] = ids[args.posts:]
+
+            if args.calendar:
+                db.execute(insert(ContentCalendar), [{
+                    "user_id": email, "post_content": sentence(12), "platform": rng.choice(PLATFORMS), "status": "planned",
+                    "scheduled_date": now + timedelta(hours=rng.randint(-24 * 30, 24 * 60)),
+                } for _ in range(args.calendar)])
+            if args.research:
+                db.execute(insert(ResearchResult), [{
+                    "user_id": email, "query": sentence(4), "result": sentence(120),
+                    "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+                } for _ in range(args.research)])
+            db.commit()
+    finally:
+        db.close()
+    return drafts
+
+
+# ============ Load ============
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.recording = False
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            response, failed = None, True
+        if self.recording:
+            self.latencies[label].append(time.perf_counter() - start)
+            if failed:
+                self.errors[label] += 1
+        return response
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ACTIONS:
+            raise SystemExit(f"Unknown action in --mix: {name!r} (choose from {', '.join(ACTIONS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+async def dashboard(vu):
+    await vu.call("GET /api/posts", "GET", "/api/posts")
+    await vu.call("GET /api/drafts", "GET", "/api/drafts")
+    await vu.call("GET /api/calendar/summary", "GET", "/api/calendar/summary")
+    await vu.call("GET /api/hashtags", "GET", "/api/hashtags")
+    await vu.call("GET /api/analytics/trends", "GET", "/api/analytics/trends")
+
+
+async def search(vu):
+    await vu.call("GET /api/search", "GET", "/api/search", params={"q": vu.rng.choice(WORDS)})
+
+
+async def draft_edit(vu):
+    if not vu.drafts:
+        return
+    draft_id = vu.rng.choice(vu.drafts)
+    body = {"content": " ".join(vu.rng.choice(WORDS) for _ in range(20)), "hashtags": f"#{vu.rng.choice(WORDS)}"}
+    await vu.call("PATCH /api/drafts/{draft_id}", "PATCH", f"/api/drafts/{draft_id}", json=body)
+
+
+async def publish(vu):
+    r = await vu.call("POST /api/drafts", "POST", "/api/drafts", json={"content": " ".join(vu.rng.choice(WORDS) for _ in range(20))})
+    if r is not None and r.status_code == 200:
+        post_id = r.json()["id"]
+        await vu.call("POST /api/posts/{post_id}/publish", "POST", f"/api/posts/{post_id}/publish", params={"api_key": "bench-metricool"})
+
+
+async def ai(vu):
+    # A small topic space, so roughly half the calls hit the response cache
+    topic = f"{vu.rng.choice(WORDS)} {vu.rng.randint(0, 10)}"
+    await vu.call("POST /api/ai/generate", "POST", "/api/ai/generate", json={"topic": topic, "platform": vu.rng.choice(PLATFORMS)})
+
+
+async def channels(vu):
+    await vu.call("GET /api/metricool/channels", "GET", "/api/metricool/channels", params={"api_key": f"key-{vu.rng.randint(0, 50)}"})
+
+
+ACTIONS = {"dashboard": dashboard, "search": search, "draft_edit": draft_edit, "publish": publish, "ai": ai, "channels": channels}
+
+
+class VirtualUser:
+    def __init__(self, client, recorder: Recorder, token: str, drafts: list, rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.drafts = drafts
+        self.rng = rng
+
+    def call(self, label: str, method: str, url: str, **kwargs):
+        return self.recorder.call(self.client, label, method, url, headers=self.headers, **kwargs)
+
+
+async def drive(url: str, drafts: dict, args) -> dict:
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as client:
+        tokens = {}
+        for email in drafts:
+            r = await client.post("/api/login", json={"username": email, "password": PASSWORD})
+            r.raise_for_status()
+            tokens[email] = r.json()["token"]
+
+        emails = list(drafts)
+        stop = asyncio.Event()
+
+        async def loop(n: int):
+            email = emails[n % len(emails)]
+            vu = VirtualUser(client, recorder, tokens[email], drafts[email], random.Random(args.seed * 1000 + n))
+            while not stop.is_set():
+                await ACTIONS[vu.rng.choices(names, weights)[0]](vu)
+
+        tasks = [asyncio.create_task(loop(n)) for n in range(args.concurrency)]
+        await asyncio.sleep(args.warmup)
+        recorder.recording = True
+        started = time.perf_counter()
+        await asyncio.sleep(args.duration)
+        recorder.recording = False
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    return summarize(recorder, elapsed)
+
+
+# ============ Reporting ============
+
+def route_stats(latencies: list, errors: int, elapsed: float) -> dict:
+    return {
+        "count": len(latencies),
+        "rps": round(len(latencies) / elapsed, 2),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    routes = {label: route_stats(values, recorder.errors[label], elapsed) for label, values in sorted(recorder.latencies.items())}
+    everything = [v for values in recorder.latencies.values() for v in values]
+    return {"elapsed_s": round(elapsed, 2), "total": route_stats(everything, sum(recorder.errors.values()), elapsed), "routes": routes}
+
+
+def print_table(results: dict):
+    print(f"{'route':<38}{'count':>8}{'req/s':>9}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    rows = list(results["routes"].items()) + [("TOTAL", results["total"])]
+    for label, r in rows:
+        print(f"{label:<38}{r['count']:>8}{r['rps']:>9}{r['errors']:>8}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}")
+
+
+def compare(results: dict, baseline: dict, tolerance: float, floor_ms: float) -> bool:
+    """Print p95 changes per route; True when any route regressed beyond tolerance"""
+    if baseline.get("config") != results.get("config"):
+        print("note: baseline was recorded with a different configuration")
+    regressed = False
+    print(f"\n{'route':<38}{'base p95':>10}{'now p95':>10}{'change':>9}")
+    for label, now in results["routes"].items():
+        before = baseline["routes"].get(label)
+        if not before:
+            print(f"{label:<38}{'-':>10}{now['p95_ms']:>10}{'new':>9}")
+            continue
+        change = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        worse = change > tolerance and now["p95_ms"] - before["p95_ms"] > floor_ms
+        regressed |= worse
+        print(f"{label:<38}{before['p95_ms']:>10}{now['p95_ms']:>10}{change:>+9.0%}{'  REGRESSED' if worse else ''}")
+    return regressed
+
+
+# ============ Main ============
+
+def start_stubs(port: int, args) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, "upstream_stubs.py"), "--port", str(port),
+         "--latency", str(args.upstream_latency), "--jitter", str(args.upstream_jitter), "--error-rate", str(args.upstream_error_rate),
+         "--rate-limit", str(args.upstream_rate_limit)],
+        stdout=subprocess.DEVNULL
+    )
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/workspaces", timeout=5)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("upstream stubs did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--posts", type=int, default=500, help="posts per user")
+    parser.add_argument("--drafts", type=int, default=50, help="drafts per user")
+    parser.add_argument("--calendar", type=int, default=100, help="calendar entries per user")
+    parser.add_argument("--research", type=int, default=50, help="research results per user")
+    parser.add_argument("--concurrency", type=int, default=20, help="virtual users")
+    parser.add_argument("--duration", type=float, default=20, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="unmeasured seconds before the measurement")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="action=weight,... (actions: %s)" % ", ".join(ACTIONS))
+    parser.add_argument("--upstream-latency", type=float, default=0.05)
+    parser.add_argument("--upstream-jitter", type=float, default=0.02)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--upstream-rate-limit", type=float, default=0.0, help="Metricool calls per second per key before the stubs answer 429")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative p95 increase")
+    parser.add_argument("--floor-ms", type=float, default=2.0, help="ignore p95 increases smaller than this")
+    args = parser.parse_args()
+
+    config = {k: getattr(args, k) for k in (
+        "users", "posts", "drafts", "calendar", "research", "concurrency", "duration", "mix",
+        "upstream_latency", "upstream_jitter", "upstream_error_rate", "upstream_rate_limit", "seed")}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        started = time.perf_counter()
+        drafts = seed(db_path, args)
+        print(f"seeded {args.users} users x ({args.posts} posts, {args.drafts} drafts, {args.calendar} calendar, "
+              f"{args.research} research) in {time.perf_counter() - started:.1f}s")
+
+        stub_port, api_port = free_port(), free_port()
+        stubs = start_stubs(stub_port, args)
+        upstream = f"http://127.0.0.1:{stub_port}"
+        server = start_server(api_port, db_path, {
+            **upstream_env(upstream),
+            "ANALYTICS_INGEST_INTERVAL": "0",
+            "UPLOAD_DIR": os.path.join(tmp, "uploads"),
+        })
+        try:
+            print(f"{args.concurrency} virtual users, {args.duration:g}s, mix {args.mix}, upstream latency {args.upstream_latency}s")
+            results = asyncio.run(drive(f"http://127.0.0.1:{api_port}", drafts, args))
+        finally:
+            server.terminate()
+            stubs.terminate()
+            server.wait()
+            stubs.wait()
+
+    results = {
+        "format": FORMAT_VERSION,
+        "recorded_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "config": config,
+        **results,
+    }
+    print()
+    print_table(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nwrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance, args.floor_ms):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Login storm benchmark
+
+Fires concurrent logins at the API while timing a cheap non-auth route, to
+show that bcrypt work no longer starves the rest of the server.
+
+Usage (from backend/):
+    python benchmarks/login_storm.py                  # starts its own server on a temp DB
+    python benchmarks/login_storm.py --url http://localhost:8000
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, db_path: str, extra_env: Optional[dict] = None) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", **(extra_env or {}))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("server did not start")
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def run(url: str, logins: int, concurrency: int):
+    email, password = f"bench-{int(time.time())}@example.com", "bench-password"
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        await client.post("/api/register", json={"email": email, "password": password})
+
+        counts = {"ok": 0, "rejected": 0, "error": 0}
+        probe_latencies = []
+        done = asyncio.Event()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def login():
+            async with semaphore:
+                r = await client.post("/api/login", json={"username": email, "password": password})
+            if r.status_code == 200:
+                counts["ok"] += 1
+            elif r.status_code == 503:
+                counts["rejected"] += 1
+            else:
+                counts["error"] += 1
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/")
+                probe_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        probe_task = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe_task
+
+    print(f"logins:        {logins} ({concurrency} concurrent) in {elapsed:.2f}s")
+    print(f"succeeded:     {counts['ok']} ({counts['ok'] / elapsed:.1f}/s)")
+    print(f"rejected 503:  {counts['rejected']}")
+    print(f"other errors:  {counts['error']}")
+    if probe_latencies:
+        print(f"GET / during storm: n={len(probe_latencies)} "
+              f"p50={statistics.median(probe_latencies) * 1000:.1f}ms "
+              f"p99={percentile(probe_latencies, 99) * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="benchmark a running server instead of starting one")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(run(args.url, args.logins, args.concurrency))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        proc = start_server(port, os.path.join(tmp, "bench.db"))
+        try:
+            asyncio.run(run(f"http://127.0.0.1:{port}", args.logins, args.concurrency))
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
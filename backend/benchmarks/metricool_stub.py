@@ -0,0 +1,138 @@
+"""
+Local stand-in for the Metricool post metrics endpoint
+
+Serves GET /workspaces/{id}/analytics/posts with deterministic synthetic data.
+--posts posts were published over the last --days days, and each has an hourly
+snapshot of growing counters up to the current hour. New snapshots therefore
+appear as time passes. The endpoint honours since/page/limit like the real one
+and returns snapshots oldest first.
+
+Usage (from backend/):
+    python benchmarks/metricool_stub.py --port 8765 --posts 200 --days 14
+    METRICOOL_API_BASE=http://127.0.0.1:8765 python -m app.analytics --api-key stub
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+HOUR = 3600
+NETWORKS = ("linkedin", "instagram", "facebook", "twitter")
+_METRICS_PATH = re.compile(r"^/workspaces/[^/]+/analytics/posts$")
+
+
+class MetricsFeed:
+    """Snapshot i is post (i % posts) at hour (i // posts) after the feed start"""
+
+    def __init__(self, posts: int, days: float, now=time.time):
+        self.posts = posts
+        self.now = now
+        self.start = (int(now()) // HOUR - int(days * 24)) * HOUR
+
+    def count(self) -> int:
+        hours = (int(self.now()) - self.start) // HOUR + 1
+        return hours * self.posts
+
+    def first_index(self, since: float) -> int:
+        """Index of the first snapshot taken at or after since"""
+        if since <= self.start:
+            return 0
+        return -(-(int(since) - self.start) // HOUR) * self.posts
+
+    def item(self, index: int) -> dict:
+        hour, post = divmod(index, self.posts)
+        published = self.start + (post % 24) * HOUR
+        age = max(0, hour - post % 24)  # hours since publishing
+        seed = post * 7 + 3
+        return {
+            "id": f"stub-{post}",
+            "network": NETWORKS[post % len(NETWORKS)],
+            "published_at": _iso(published),
+            "measured_at": _iso(self.start + hour * HOUR),
+            "impressions": age * (40 + seed % 60),
+            "reach": age * (25 + seed % 30),
+            "likes": age * (2 + seed % 5),
+            "comments": age // 3,
+            "shares": age // 5,
+            "clicks": age * (1 + seed % 3),
+        }
+
+    def page(self, since, page: int, limit: int) -> dict:
+        first = self.first_index(since) + (page - 1) * limit
+        last = min(first + limit, self.count())
+        items = [self.item(i) for i in range(first, last)]
+        return {"data": items, "next_page": page + 1 if last < self.count() else None}
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_since(value) -> float:
+    if not value:
+        return 0
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def make_handler(feed: MetricsFeed, state: dict):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _send(self, code: int, body: dict):
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            state["requests"] += 1
+            if not _METRICS_PATH.match(url.path):
+                return self._send(404, {"error": "not found"})
+            query = parse_qs(url.query)
+            since = parse_since(query.get("since", [None])[0])
+            page = int(query.get("page", ["1"])[0])
+            limit = min(int(query.get("limit", ["200"])[0]), 1000)
+            self._send(200, feed.page(since, page, limit))
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(port: int = 0, posts: int = 200, days: float = 14):
+    """Start the stub in a daemon thread; returns (server, base_url, state)"""
+    state = {"requests": 0}
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(MetricsFeed(posts, days), state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}", state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--days", type=float, default=14)
+    args = parser.parse_args()
+    server, url, _ = serve(args.port, args.posts, args.days)
+    print(f"Metricool metrics stub on {url} ({args.posts} posts, {args.days:g} days of hourly snapshots)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Local Metricool and MiniMax stand-ins with configurable latency and failures
+
+One threaded HTTP server answers every upstream route the backend calls:
+- Metricool app API: GET /api/v1/channels, POST /api/v2/scheduler/posts
+- Metricool REST API: /workspaces, /workspaces/{id}/channels, /workspaces/{id}/posts
+  and /workspaces/{id}/analytics/posts (the synthetic feed from metricool_stub)
+- MiniMax: POST /v1/text/chatcompletion_v2, plain and streamed
+
+Every response is delayed by latency +/- jitter seconds. error_rate of them
+are answered with a 500 instead. With rate_limit set, Metricool calls above
+that many per second per X-Mc-Auth key get a 429 with Retry-After, like the
+real API's throttling. The settings live in a dict that can be changed while
+the server runs.
+
+Usage (from backend/):
+    python benchmarks/upstream_stubs.py --port 8766 --latency 0.05
+    METRICOOL_BASE=http://127.0.0.1:8766 METRICOOL_API_BASE=http://127.0.0.1:8766 \\
+        MINIMAX_URL=http://127.0.0.1:8766/v1/text/chatcompletion_v2 uvicorn app.main:app
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from metricool_stub import MetricsFeed, parse_since
+
+CHANNELS = [
+    {"id": "linkedin_1", "name": "Bench LinkedIn", "platform": "linkedin"},
+    {"id": "instagram_1", "name": "@bench", "platform": "instagram"},
+    {"id": "twitter_1", "name": "@bench", "platform": "twitter"},
+]
+MINIMAX_PATH = "/v1/text/chatcompletion_v2"
+_ANALYTICS = re.compile(r"^/workspaces/[^/]+/analytics/posts$")
+_WORKSPACE_CHANNELS = re.compile(r"^/workspaces/[^/]+/channels$")
+_WORKSPACE_POSTS = re.compile(r"^/workspaces/[^/]+/posts(/[^/]+(/publish)?)?$")
+
+
+def default_config(latency: float = 0.05, jitter: float = 0.0, error_rate: float = 0.0, rate_limit: float = 0.0) -> dict:
+    return {"latency": latency, "jitter": jitter, "error_rate": error_rate, "rate_limit": rate_limit, "requests": 0, "errors": 0, "throttled": 0}
+
+
+def make_handler(config: dict, feed: MetricsFeed):
+    lock = threading.Lock()
+    counter = iter(range(1, 1 << 62))
+    windows = {}  # api key -> (second, calls in it)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _send(self, code: int, body: dict):
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _throttle(self) -> bool:
+            """Answer 429 once the caller's key went over rate_limit calls this second"""
+            if not config["rate_limit"]:
+                return False
+            now = time.time()
+            key = self.headers.get("X-Mc-Auth", "")
+            with lock:
+                second, calls = windows.get(key, (int(now), 0))
+                if second != int(now):
+                    second, calls = int(now), 0
+                windows[key] = (second, calls + 1)
+                throttled = calls >= config["rate_limit"]
+                if throttled:
+                    config["throttled"] += 1
+            if throttled:
+                data = b'{"error": "rate limit exceeded"}'
+                self.send_response(429)
+                self.send_header("Retry-After", f"{second + 1 - now:.2f}")
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            return throttled
+
+        def _delay_and_fail(self, metricool: bool = True) -> bool:
+            """Sleep the configured latency; True when this request was throttled or should fail"""
+            if metricool and self._throttle():
+                return True
+            delay = config["latency"] + random.uniform(-config["jitter"], config["jitter"])
+            if delay > 0:
+                time.sleep(delay)
+            with lock:
+                config["requests"] += 1
+                failed = random.random() < config["error_rate"]
+                if failed:
+                    config["errors"] += 1
+            if failed:
+                self._send(500, {"error": "stub failure"})
+            return failed
+
+        def _body(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            try:
+                return json.loads(raw or b"{}")
+            except ValueError:
+                return {}
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if self._delay_and_fail():
+                return
+            if url.path == "/api/v1/channels" or _WORKSPACE_CHANNELS.match(url.path):
+                return self._send(200, {"data": CHANNELS})
+            if url.path == "/workspaces":
+                return self._send(200, {"data": [{"id": "5704319", "name": "Bench workspace"}]})
+            if _ANALYTICS.match(url.path):
+                query = parse_qs(url.query)
+                since = parse_since(query.get("since", [None])[0])
+                page = int(query.get("page", ["1"])[0])
+                limit = min(int(query.get("limit", ["200"])[0]), 1000)
+                return self._send(200, feed.page(since, page, limit))
+            if _WORKSPACE_POSTS.match(url.path):
+                return self._send(200, {"data": []})
+            self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            body = self._body()
+            if self._delay_and_fail(metricool=url.path != MINIMAX_PATH):
+                return
+            if url.path == MINIMAX_PATH:
+                return self._minimax(body)
+            if url.path == "/api/v2/scheduler/posts" or _WORKSPACE_POSTS.match(url.path):
+                return self._send(200, {"data": {"id": next(counter), "status": "scheduled"}})
+            self._send(404, {"error": "not found"})
+
+        def do_DELETE(self):
+            if self._delay_and_fail():
+                return
+            self._send(200, {"data": {"deleted": True}})
+
+        def _minimax(self, body: dict):
+            prompt = (body.get("messages") or [{}])[-1].get("content", "")
+            reply = f"[stub] {prompt[:200]}"
+            if not body.get("stream"):
+                return self._send(200, {"choices": [{"message": {"role": "assistant", "content": reply}}]})
+            chunks = [word + " " for word in reply.split(" ")]
+            lines = [f"data: {json.dumps({'choices': [{'delta': {'content': c}}]})}\n\n" for c in chunks]
+            data = ("".join(lines) + "data: [DONE]\n\n").encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(port: int = 0, latency: float = 0.05, jitter: float = 0.0, error_rate: float = 0.0, posts: int = 200, days: float = 14, rate_limit: float = 0.0):
+    """Start the stubs in a daemon thread; returns (server, base_url, config)"""
+    config = default_config(latency, jitter, error_rate, rate_limit)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(config, MetricsFeed(posts, days)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}", config
+
+
+def upstream_env(base_url: str) -> dict:
+    """Environment pointing the backend at the stubs"""
+    return {
+        "METRICOOL_BASE": base_url,
+        "METRICOOL_API_BASE": base_url,
+        "MINIMAX_URL": base_url + MINIMAX_PATH,
+        "AI_PROVIDER": "minimax",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Metricool calls per second per API key before 429 (0 = unlimited)")
+    args = parser.parse_args()
+    server, url, _ = serve(args.port, args.latency, args.jitter, args.error_rate, rate_limit=args.rate_limit)
+    print(f"Upstream stubs on {url} (latency {args.latency}s, error rate {args.error_rate})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
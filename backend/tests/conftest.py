@@ -0,0 +1,28 @@
+import os
+import sys
+import tempfile
+
+# The app reads DATABASE_URL at import time: point it at a throwaway file first
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ.setdefault("ANALYTICS_INGEST_INTERVAL", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    from app.migrations import run_migrations
+    run_migrations()
+
+
+@pytest.fixture
+def db():
+    from app.database import Base, SessionLocal
+    session = SessionLocal()
+    yield session
+    session.rollback()
+    for table in reversed(Base.metadata.sorted_tables):
+        session.execute(table.delete())
+    session.commit()
+    session.close()
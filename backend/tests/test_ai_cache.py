@@ -0,0 +1,7 @@
+from app.ai import cache_key
+
+
+def test_stub_and_minimax_replies_are_cached_apart():
+    prompt = ("MiniMax-Text-01", "system", "user")
+    assert cache_key(*prompt, provider="stub") != cache_key(*prompt, provider="minimax")
+    assert cache_key(*prompt, provider="minimax") == cache_key(*prompt, provider="minimax")
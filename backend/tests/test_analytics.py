@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from app import analytics
+from app.models import AnalyticsIngestState, MetricSeries
+
+
+class FakeAsyncClient:
+    def __init__(self, pages):
+        self.pages = pages
+        self.since = []
+
+    async def iter_post_metrics(self, workspace_id, since=None, page_size=100):
+        self.since.append(since)
+        for page in self.pages:
+            yield page
+
+
+PAGES = [
+    [{"id": "a", "network": "linkedin", "measured_at": "2030-01-01T10:00:00Z", "likes": 3}],
+    [{"id": "a", "network": "linkedin", "measured_at": "2030-01-02T10:00:00Z", "likes": 5},
+     {"id": "b", "network": "linkedin", "measured_at": "2030-01-02T11:00:00Z", "likes": 1}],
+]
+
+
+def test_async_ingest_stores_pages_and_advances_the_watermark(db):
+    client = FakeAsyncClient(PAGES)
+    result = asyncio.run(analytics.aingest("admin", "key", "ws", client=client))
+
+    assert (result["pages"], result["stored"], result["watermark"]) == (2, 3, "2030-01-02T11:00:00")
+    assert db.query(MetricSeries).count() == 2
+
+    asyncio.run(analytics.aingest("admin", "key", "ws", client=client))
+    assert client.since == [None, "2030-01-02T11:00:00Z"]
+    assert db.query(AnalyticsIngestState).one().snapshots == 3
+
+
+def test_async_ingest_refuses_to_wait_for_a_running_ingest(db):
+    lock = analytics._run_lock("admin", "busy")
+    with lock:
+        with pytest.raises(analytics.IngestRunning):
+            asyncio.run(analytics.aingest("admin", "key", "busy", client=FakeAsyncClient(PAGES)))
@@ -0,0 +1,40 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.cache import AuthCache
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(main.app) as c:
+        yield c
+
+
+def restart(monkeypatch):
+    """A fresh process (or another worker): nothing revoked in memory"""
+    monkeypatch.setattr(main, "auth_cache", AuthCache())
+
+
+def auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_logout_survives_a_restart(client, monkeypatch):
+    token = client.post("/api/login", json={"username": "admin", "password": "admin123"}).json()["token"]
+    assert client.post("/api/logout", headers=auth(token)).status_code == 200
+
+    restart(monkeypatch)
+    assert client.get("/api/auth/cache/stats", headers=auth(token)).status_code == 401
+
+
+def test_password_change_rejects_tokens_from_the_same_second(client, monkeypatch):
+    client.post("/api/register", json={"email": "pw@example.com", "password": "old-password", "name": "pw"})
+    old = client.post("/api/login", json={"username": "pw@example.com", "password": "old-password"}).json()["token"]
+    resp = client.post("/api/password", json={"current_password": "old-password", "new_password": "new-password"}, headers=auth(old))
+    new = resp.json()["token"]
+
+    assert client.get("/api/auth/cache/stats", headers=auth(old)).status_code == 401
+    restart(monkeypatch)
+    assert client.get("/api/auth/cache/stats", headers=auth(old)).status_code == 401
+    assert client.get("/api/auth/cache/stats", headers=auth(new)).status_code == 200
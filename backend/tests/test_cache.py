@@ -0,0 +1,45 @@
+import asyncio
+
+from app.cache import TTLCache
+
+
+def test_cancelled_owner_does_not_fail_coalesced_waiters():
+    cache = TTLCache(ttl=60, stale_ttl=0)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def scenario():
+        owner = asyncio.create_task(cache.aget_or_load("k", loader))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(cache.aget_or_load("k", loader)) for _ in range(3)]
+        await asyncio.sleep(0)
+        owner.cancel()
+        results = await asyncio.gather(*waiters)
+        assert owner.cancelled()
+        return results
+
+    assert asyncio.run(scenario()) == ["value"] * 3
+    assert len(calls) == 1
+    assert cache.get_or_load("k", lambda: "reloaded") == "value"
+
+
+def test_cancelled_waiter_does_not_cancel_the_load():
+    cache = TTLCache(ttl=60, stale_ttl=0)
+
+    async def loader():
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def scenario():
+        owner = asyncio.create_task(cache.aget_or_load("k", loader))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.aget_or_load("k", loader))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        return await owner
+
+    assert asyncio.run(scenario()) == 42
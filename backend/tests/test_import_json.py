@@ -0,0 +1,33 @@
+import json
+
+from app.import_json import import_file
+from app.models import Post
+
+
+def write_store(tmp_path, posts):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps({"posts": posts, "api_keys": {}}))
+    return str(path)
+
+
+def test_reimport_without_created_at_inserts_nothing(db, tmp_path):
+    path = write_store(tmp_path, [
+        {"id": 1, "content": "dated", "status": "published", "created_at": "2026-02-17T13:39:15.497760"},
+        {"id": 2, "content": "undated", "status": "pending"},
+        {"id": 3, "content": "undated", "status": "pending"},
+    ])
+    assert import_file(path, "admin")["posts_inserted"] == 3
+
+    counts = import_file(path, "admin")
+    assert (counts["posts_inserted"], counts["posts_skipped"]) == (0, 3)
+    assert db.query(Post).count() == 3
+
+
+def test_posts_imported_before_legacy_ids_are_adopted(db, tmp_path):
+    path = write_store(tmp_path, [{"id": 7, "content": "old", "created_at": "2026-02-17T13:39:15"}])
+    import_file(path, "admin")
+    db.query(Post).update({Post.legacy_id: None})
+    db.commit()
+
+    assert import_file(path, "admin")["posts_inserted"] == 0
+    assert [p.legacy_id for p in db.query(Post)] == [7]
@@ -0,0 +1,23 @@
+import pytest
+
+from app.models import Post
+from app.pagination import paginate
+
+
+@pytest.mark.parametrize("descending", [True, False])
+def test_rows_without_a_sort_value_are_not_skipped(db, descending):
+    db.add_all([Post(user_id="admin", body=f"p{i}") for i in range(7)])
+    db.commit()
+    undated = [p.id for p in db.query(Post).order_by(Post.id).limit(3)]
+    db.query(Post).filter(Post.id.in_(undated)).update({Post.created_at: None})
+    db.commit()
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = paginate(db.query(Post), Post.created_at, Post.id, cursor, limit=2, descending=descending)
+        seen.extend(p.id for p in rows)
+        if not cursor:
+            break
+
+    assert sorted(seen) == sorted(p.id for p in db.query(Post))
+    assert len(seen) == len(set(seen))
@@ -0,0 +1,15 @@
+from fastapi.testclient import TestClient
+
+from app import main
+from app.models import Post
+
+
+def test_counts_cover_every_post_not_just_the_first_page(db):
+    db.add_all([Post(user_id="admin", body=f"p{i}", publish_status="published" if i % 2 else "pending") for i in range(120)])
+    db.commit()
+    with TestClient(main.app) as client:
+        headers = {"Authorization": f"Bearer {main.create_token('admin')}"}
+        page = client.get("/api/posts", headers=headers).json()
+        counts = client.get("/api/posts/counts", headers=headers).json()
+    assert len(page["posts"]) < 120 and page["next_cursor"]
+    assert counts == {"total": 120, "by_status": {"published": 60, "pending": 60}}
@@ -0,0 +1,38 @@
+import httpx
+import pytest
+
+from app.publish_queue import NEEDS_CHECK, PublishHTTPError, failure_status
+from app.ratelimit import RateLimitedError
+from app.resilience import CircuitOpenError, DeadlineExceeded
+
+
+@pytest.mark.parametrize("status_code", [429, 503])
+def test_refused_answers_are_retried(status_code):
+    assert failure_status(PublishHTTPError(status_code, "")) is None
+
+
+@pytest.mark.parametrize("status_code", [500, 502, 504])
+def test_other_5xx_may_have_published(status_code):
+    assert failure_status(PublishHTTPError(status_code, "")) == NEEDS_CHECK
+
+
+@pytest.mark.parametrize("status_code", [400, 401, 404, 422])
+def test_4xx_fails(status_code):
+    assert failure_status(PublishHTTPError(status_code, "")) == "failed"
+
+
+@pytest.mark.parametrize("error", [
+    httpx.ConnectError("refused"),
+    httpx.ConnectTimeout("slow connect"),
+    httpx.PoolTimeout("pool"),
+    CircuitOpenError("metricool", 5),
+    RateLimitedError("write", 1),
+    DeadlineExceeded(),
+])
+def test_errors_before_sending_are_retried(error):
+    assert failure_status(error) is None
+
+
+@pytest.mark.parametrize("error", [httpx.ReadTimeout("no answer"), httpx.RemoteProtocolError("dropped"), RuntimeError("?")])
+def test_errors_after_sending_need_a_check(error):
+    assert failure_status(error) == NEEDS_CHECK
@@ -0,0 +1,62 @@
+import types
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from app import ratelimit
+from app.ratelimit import TokenBucket, parse_retry_after
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_reservations_queue_behind_the_burst(clock):
+    bucket = TokenBucket(rate=2, burst=2)
+    assert bucket.reserve(0) == (True, 0.0)
+    assert bucket.reserve(0) == (True, 0.0)
+    assert bucket.reserve(1) == (True, 0.5)
+    assert bucket.reserve(1) == (True, 1.0)
+
+    clock[0] += 1
+    assert bucket.reserve(1) == (True, 0.5)
+
+
+def test_a_caller_that_will_not_wait_keeps_no_reservation(clock):
+    bucket = TokenBucket(rate=1, burst=1)
+    bucket.reserve(0)
+    assert bucket.reserve(0.5) == (False, 1.0)
+    assert bucket.reserve(0.5) == (False, 1.0)
+    assert bucket.reserve(1) == (True, 1.0)
+
+
+def test_429_pauses_and_slows_the_bucket_once_per_burst(clock):
+    bucket = TokenBucket(rate=4, burst=4)
+    reserved_at = clock[0]
+    bucket.reserve(0)
+    bucket.reserve(0)
+
+    clock[0] += 0.1
+    bucket.throttled(retry_after=2, reserved_at=reserved_at)
+    assert bucket.rate == 2
+    assert bucket.reserve(10) == (True, 2.5)
+
+    # A second 429 for a call paced at the old rate does not halve it again
+    bucket.throttled(retry_after=None, reserved_at=reserved_at)
+    assert bucket.rate == 2
+
+    bucket.accepted()
+    assert bucket.rate == pytest.approx(2.04)
+
+
+def test_retry_after_accepts_seconds_and_dates():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 25 < parse_retry_after(format_datetime(when, usegmt=True)) <= 30
@@ -0,0 +1,57 @@
+import types
+import uuid
+
+import httpx
+import pytest
+
+from app import resilience
+from app.metricool import MetricoolTransport
+from app.ratelimit import TokenBucket
+from app.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_half_open_admits_one_probe(clock):
+    breaker = CircuitBreaker("half-open.test", failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock[0] += 31
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    clock[0] += 31
+    breaker.before_call()
+    breaker.record_success()
+    assert (breaker.state, breaker.failures) == (CLOSED, 0)
+
+
+def test_429_neither_trips_the_breaker_nor_holds_the_probe(clock):
+    transport = MetricoolTransport(f"http://{uuid.uuid4().hex}.test")
+    breaker = transport.breaker
+    throttled = httpx.Response(429, headers={"Retry-After": "1"})
+    for _ in range(breaker.failure_threshold + 1):
+        breaker.before_call()
+        transport._settle("POST", "/x", transport.retry.retries + 1, clock[0] + 10, TokenBucket(10, 10), "write", 0.0, response=throttled)
+    assert (breaker.state, breaker.failures) == (CLOSED, 0)
+
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    clock[0] += breaker.reset_timeout + 1
+    breaker.before_call()
+    transport._settle("POST", "/x", transport.retry.retries + 1, clock[0] + 10, TokenBucket(10, 10), "write", 0.0, response=throttled)
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()  # the probe slot is free again
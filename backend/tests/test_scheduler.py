@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+from app import scheduler as scheduler_module
+from app.models import ContentCalendar, Post
+from app.scheduler import CALENDAR, POST, Scheduler
+
+
+def heap_ids(sched):
+    return sorted((kind, item_id) for _, kind, item_id in sched._heap)
+
+
+def refill_until_done(sched, now, limit=20):
+    for _ in range(limit):
+        sched._refill(now)
+        if not sched.backlogged:
+            return
+    raise AssertionError("refill never reached the horizon")
+
+
+def test_truncated_refill_keeps_rows_of_the_cut_off_source(db, monkeypatch):
+    monkeypatch.setattr(scheduler_module, "SCHEDULER_BATCH_SIZE", 3)
+    now = datetime(2030, 1, 1, 12, 0)
+    posts = [Post(body=f"p{i}", publish_status="scheduled", scheduled_at=now - timedelta(hours=6 - i)) for i in range(5)]
+    entry = ContentCalendar(user_id=1, post_content="c", platform="linkedin", status="scheduled", scheduled_date=now + timedelta(minutes=1))
+    db.add_all(posts + [entry])
+    db.commit()
+
+    sched = Scheduler()
+    refill_until_done(sched, now)
+
+    assert heap_ids(sched) == sorted([(POST, p.id) for p in posts] + [(CALENDAR, entry.id)])
+
+
+def test_rows_sharing_the_boundary_due_time_are_loaded_once(db, monkeypatch):
+    monkeypatch.setattr(scheduler_module, "SCHEDULER_BATCH_SIZE", 2)
+    now = datetime(2030, 1, 1, 12, 0)
+    due = now - timedelta(minutes=5)
+    posts = [Post(body=f"p{i}", publish_status="scheduled", scheduled_at=due) for i in range(5)]
+    entries = [ContentCalendar(user_id=1, post_content=f"c{i}", platform="linkedin", status="scheduled", scheduled_date=due) for i in range(3)]
+    db.add_all(posts + entries)
+    db.commit()
+
+    sched = Scheduler()
+    refill_until_done(sched, now)
+
+    assert heap_ids(sched) == sorted([(POST, p.id) for p in posts] + [(CALENDAR, e.id) for e in entries])
+
+
+def test_due_calendar_entry_goes_through_the_publish_queue(db, monkeypatch):
+    from app import publish_queue
+    from app.models import AISettings, PublishJob
+
+    monkeypatch.setattr(publish_queue, "publish_to_metricool", lambda text, payload: {"text": text})
+    due = datetime(2030, 1, 1, 12, 0)
+    entry = ContentCalendar(user_id=1, post_content="launch", platform="linkedin", status="scheduled", scheduled_date=due)
+    db.add_all([entry, AISettings(user_id=1, provider=scheduler_module.SCHEDULER_KEY_NAME, api_key="k")])
+    db.commit()
+
+    Scheduler()._fire(CALENDAR, entry.id, due)
+    db.expire_all()
+    job = db.query(PublishJob).filter(PublishJob.calendar_entry_id == entry.id).one()
+    assert (job.status, db.get(ContentCalendar, entry.id).status) == ("queued", "queued")
+
+    publish_queue.PublishWorkerPool().process(db, job)
+    assert (job.status, db.get(ContentCalendar, entry.id).status) == ("succeeded", "published")
+
+
+def test_a_failed_fire_leaves_nothing_queued_without_a_job(db, monkeypatch):
+    from app.models import PublishJob
+
+    def broken(self, db, owner, platforms):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(Scheduler, "_publish_payload", broken)
+    due = datetime(2030, 1, 1, 12, 0)
+    post = Post(user_id=1, body="p", publish_status="scheduled", scheduled_at=due)
+    entry = ContentCalendar(user_id=1, post_content="c", platform="linkedin", status="scheduled", scheduled_date=due)
+    db.add_all([post, entry])
+    db.commit()
+
+    Scheduler()._fire(POST, post.id, due)
+    Scheduler()._fire(CALENDAR, entry.id, due)
+    db.expire_all()
+    assert (db.get(Post, post.id).publish_status, db.get(ContentCalendar, entry.id).status) == ("scheduled", "scheduled")
+    assert db.query(PublishJob).count() == 0
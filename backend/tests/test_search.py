@@ -0,0 +1,20 @@
+from app.models import Post, ResearchResult
+from app.search import search
+
+
+def test_keyset_pages_match_a_single_page(db):
+    for i in range(12):
+        db.add(Post(user_id="admin", title="launch", body="product launch", publish_status="draft" if i % 3 else "published"))
+        db.add(ResearchResult(user_id="admin", query="launch", result="launch " * (i % 4 + 1)))
+    db.commit()
+
+    everything, more = search(db, "admin", "launch", limit=100)
+    assert more is None and len(everything) == 24
+
+    paged, after = [], None
+    while True:
+        page, after = search(db, "admin", "launch", after=after, limit=5)
+        paged.extend(page)
+        if after is None:
+            break
+    assert [(hit["type"], hit["id"]) for hit in paged] == [(hit["type"], hit["id"]) for hit in everything]
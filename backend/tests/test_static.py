@@ -0,0 +1,58 @@
+import hashlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.static import DEFAULT_CACHE_CONTROL, IMMUTABLE_CACHE_CONTROL
+
+BODY = b"0123456789"
+FILENAME = hashlib.sha256(BODY).hexdigest() + ".txt"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "UPLOAD_DIR", str(tmp_path))
+    (tmp_path / FILENAME).write_bytes(BODY)
+    (tmp_path / "1700000000_legacy.txt").write_bytes(BODY)
+    return TestClient(main.app)
+
+
+def test_content_addressed_files_are_immutable_and_revalidate(client):
+    response = client.get(f"/uploads/{FILENAME}")
+    etag = response.headers["etag"]
+    assert (response.status_code, response.content) == (200, BODY)
+    assert etag == f'"{FILENAME[:64]}"'
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+    assert client.get(f"/uploads/{FILENAME}", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(f"/uploads/{FILENAME}", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+
+
+def test_legacy_files_get_an_mtime_etag(client):
+    response = client.get("/uploads/1700000000_legacy.txt")
+    assert response.headers["cache-control"] == DEFAULT_CACHE_CONTROL
+    assert response.headers["etag"].count("-") == 1
+    assert client.get("/uploads/1700000000_legacy.txt", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+
+@pytest.mark.parametrize("header, status, content_range, body", [
+    ("bytes=2-5", 206, "bytes 2-5/10", b"2345"),
+    ("bytes=7-", 206, "bytes 7-9/10", b"789"),
+    ("bytes=-3", 206, "bytes 7-9/10", b"789"),
+    ("bytes=5-99", 206, "bytes 5-9/10", b"56789"),
+    ("bytes=10-", 416, "bytes */10", b""),
+    ("bytes=0-1,4-5", 200, None, BODY),
+    ("lines=1-2", 200, None, BODY),
+])
+def test_ranges(client, header, status, content_range, body):
+    response = client.get(f"/uploads/{FILENAME}", headers={"Range": header})
+    assert (response.status_code, response.headers.get("content-range"), response.content) == (status, content_range, body)
+
+
+def test_a_stale_if_range_gets_the_whole_file(client):
+    response = client.get(f"/uploads/{FILENAME}", headers={"Range": "bytes=0-1", "If-Range": '"stale"'})
+    assert (response.status_code, response.content) == (200, BODY)
+    etag = client.get(f"/uploads/{FILENAME}").headers["etag"]
+    response = client.get(f"/uploads/{FILENAME}", headers={"Range": "bytes=0-1", "If-Range": etag})
+    assert (response.status_code, response.content) == (206, b"01")
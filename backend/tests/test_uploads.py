@@ -0,0 +1,31 @@
+import io
+import os
+
+from app import uploads
+
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 64
+
+
+class Unseekable(io.BytesIO):
+    def seekable(self):
+        return False
+
+
+def test_same_bytes_are_stored_once_whatever_the_extension(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", str(tmp_path))
+
+    first = uploads.store_stream(io.BytesIO(JPEG), "a.JPEG")
+    again = uploads.store_stream(Unseekable(JPEG), "b.jpg")
+    mislabelled = uploads.store_stream(io.BytesIO(JPEG), "c.png")
+
+    assert first[0].endswith(".jpg") and first[2] is True
+    assert again == (first[0], len(JPEG), False)
+    assert mislabelled == (first[0], len(JPEG), False)
+    assert os.listdir(tmp_path) == [first[0]]
+
+
+def test_unrecognised_types_keep_a_folded_client_extension(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", str(tmp_path))
+
+    filename, _, _ = uploads.store_stream(io.BytesIO(b"II*\x00 tiff body"), "scan.TIF")
+    assert filename.endswith(".tiff")
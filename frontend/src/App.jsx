@@ -155,7 +155,10 @@ const PLATFORM_LOGOS = {
 function App() {
   const [view, setView] = useState('dashboard');
   const [posts, setPosts] = useState([]);
+  const [postsCursor, setPostsCursor] = useState(null);
+  const [postCounts, setPostCounts] = useState({ total: 0, by_status: {} });
   const [drafts, setDrafts] = useState([]);
+  const [draftsCursor, setDraftsCursor] = useState(null);
   const [apiKeys, setApiKeys] = useState([]);
   const [channels, setChannels] = useState([]);
   const [userId, setUserId] = useState(localStorage.getItem('metricool_userId') || '4421531');
@@ -189,6 +192,7 @@ function App() {
   const [researchResult, setResearchResult] = useState('');
   const [researchLoading, setResearchLoading] = useState(false);
   const [researchHistory, setResearchHistory] = useState([]);
+  const [researchCursor, setResearchCursor] = useState(null);
   const [aiApiKey, setAiApiKey] = useState('');
   const [savedMinimaxKey, setSavedMinimaxKey] = useState('');
   const [notification, setNotification] = useState({ message: '', type: '' });
@@ -222,11 +226,32 @@ function App() {
     'Authorization': 'Bearer ' + token
   });
 
+  // List routes are cursor-paginated: load the first page, and the next one on "Load more"
+  const fetchPage = async (path, field, cursor = null) => {
+    const params = new URLSearchParams();
+    if (cursor) params.set('cursor', cursor);
+    const res = await fetch(`${API_BASE}${path}?${params}`, { headers: authHeader() });
+    const data = await res.json();
+    return { items: data[field] || [], next: data.next_cursor || null };
+  };
+
   const fetchPosts = async () => {
     try {
-      const res = await fetch(`${API_BASE}/api/posts`, { headers: authHeader() });
-      const data = await res.json();
-      setPosts(data.posts || []);
+      const page = await fetchPage('/api/posts', 'posts');
+      setPosts(page.items);
+      setPostsCursor(page.next);
+      const res = await fetch(`${API_BASE}/api/posts/counts`, { headers: authHeader() });
+      setPostCounts(await res.json());
+    } catch (e) {
+      console.error('Failed to fetch posts:', e);
+    }
+  };
+
+  const loadMorePosts = async () => {
+    try {
+      const page = await fetchPage('/api/posts', 'posts', postsCursor);
+      setPosts(prev => [...prev, ...page.items]);
+      setPostsCursor(page.next);
     } catch (e) {
       console.error('Failed to fetch posts:', e);
     }
@@ -244,21 +269,34 @@ function App() {
 
   const fetchDrafts = async () => {
     try {
-      const res = await fetch(`${API_BASE}/api/drafts`, { headers: authHeader() });
-      const data = await res.json();
-      setDrafts(data.drafts || []);
+      const page = await fetchPage('/api/drafts', 'drafts');
+      setDrafts(page.items);
+      setDraftsCursor(page.next);
     } catch (e) {
       console.error('Failed to fetch drafts:', e);
     }
   };
 
+  const loadMoreDrafts = async () => {
+    try {
+      const page = await fetchPage('/api/drafts', 'drafts', draftsCursor);
+      setDrafts(prev => [...prev, ...page.items]);
+      setDraftsCursor(page.next);
+    } catch (e) {
+      console.error('Failed to fetch drafts:', e);
+    }
+  };
+
+  // Only the most recent page (20 results) is shown
   const fetchResearchHistory = async () => {
     try {
-      const res = await fetch(`${API_BASE}/api/ai/research`, { headers: authHeader() });
-      const data = await res.json();
-      setResearchHistory(data.results || []);
+      const page = await fetchPage('/api/ai/research', 'results');
+      setResearchHistory(page.items);
+      setResearchCursor(page.next);
+      return page.items;
     } catch (e) {
       console.error('Failed to fetch research history:', e);
+      return [];
     }
   };
 
@@ -421,9 +459,7 @@ IMPORTANT INSTRUCTIONS:
       if (data.result) {
         setResearchResult(data.result);
         // Refresh history
-        const historyRes = await fetch(`${API_BASE}/api/ai/research`, { headers: authHeader() });
-        const historyData = await historyRes.json();
-        setResearchHistory(historyData.results || []);
+        await fetchResearchHistory();
         showNotification('Research saved!');
       } else if (data.detail) {
         showNotification(data.detail, 'error');
@@ -459,12 +495,10 @@ IMPORTANT INSTRUCTIONS:
       
       if (res.ok) {
         // Refresh history
-        const historyRes = await fetch(`${API_BASE}/api/ai/research`, { headers: authHeader() });
-        const historyData = await historyRes.json();
-        setResearchHistory(historyData.results || []);
+        const history = await fetchResearchHistory();
         
         // Clear result if it was the deleted one
-        if (researchResult && !historyData.results?.find(r => r.result === researchResult)) {
+        if (researchResult && !history.find(r => r.result === researchResult)) {
           setResearchResult('');
           setResearchQuery('');
         }
@@ -784,19 +818,19 @@ IMPORTANT INSTRUCTIONS:
             <h2>📊 Overview</h2>
             <div className="stats">
               <div className="stat-card">
-                <h3>{posts.length}</h3>
+                <h3>{postCounts.total}</h3>
                 <p>Total Posts</p>
               </div>
               <div className="stat-card">
-                <h3>{posts.filter(p => p.status === 'pending').length}</h3>
+                <h3>{postCounts.by_status.pending || 0}</h3>
                 <p>Pending</p>
               </div>
               <div className="stat-card">
-                <h3>{posts.filter(p => p.status === 'approved').length}</h3>
+                <h3>{postCounts.by_status.approved || 0}</h3>
                 <p>Approved</p>
               </div>
               <div className="stat-card">
-                <h3>{posts.filter(p => p.status === 'published').length}</h3>
+                <h3>{postCounts.by_status.published || 0}</h3>
                 <p>Published</p>
               </div>
             </div>
@@ -946,7 +980,7 @@ IMPORTANT INSTRUCTIONS:
                     {post.media_urls && post.media_urls.length > 0 && (
                       <div className="post-media">
                         {post.media_urls.map((url, i) => (
-                          <img key={i} src={url} alt="Media" onError={(e) => e.target.style.display='none'} />
+                          <img key={i} src={post.thumbnail_urls?.[i] || url} alt="Media" loading="lazy" onError={(e) => e.target.style.display='none'} />
                         ))}
                       </div>
                     )}
@@ -963,6 +997,11 @@ IMPORTANT INSTRUCTIONS:
                 ))}
               </div>
             )}
+            {postsCursor && (
+              <div className="quick-actions">
+                <button onClick={loadMorePosts}>Load more</button>
+              </div>
+            )}
           </div>
         )}
 
@@ -988,6 +1027,11 @@ IMPORTANT INSTRUCTIONS:
                 ))}
               </div>
             )}
+            {draftsCursor && (
+              <div className="quick-actions">
+                <button onClick={loadMoreDrafts}>Load more</button>
+              </div>
+            )}
           </div>
         )}
 
@@ -1305,7 +1349,7 @@ IMPORTANT INSTRUCTIONS:
                   </div>
                 ))}
                 {researchHistory.length > 5 && (
-                  <p className="hint" style={{marginTop: '0.5rem'}}>+ {researchHistory.length - 5} more in history</p>
+                  <p className="hint" style={{marginTop: '0.5rem'}}>+ {researchHistory.length - 5}{researchCursor ? '+' : ''} more in history</p>
                 )}
               </div>
             )}
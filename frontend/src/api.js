@@ -4,6 +4,14 @@ function authHeader(token) {
   return { 'Authorization': 'Bearer ' + token };
 }
 
+// List routes are cursor-paginated: each call returns one page and its next_cursor;
+// pass that back as `cursor` to load the next one
+async function fetchPage(path, token, cursor = null, params = new URLSearchParams()) {
+  if (cursor) params.set('cursor', cursor);
+  const res = await fetch(`${API_URL}${path}?${params}`, { headers: authHeader(token) });
+  return res.json();
+}
+
 // ============ Auth ============
 export async function login(username, password, token) {
   const res = await fetch(`${API_URL}/api/login`, {
@@ -24,8 +32,12 @@ export async function register(email, password, name, token) {
 }
 
 // ============ Posts ============
-export async function getPosts(token) {
-  const res = await fetch(`${API_URL}/api/posts`, { headers: authHeader(token) });
+export async function getPosts(token, cursor = null) {
+  return fetchPage('/api/posts', token, cursor);
+}
+
+export async function getPostCounts(token) {
+  const res = await fetch(`${API_URL}/api/posts/counts`, { headers: authHeader(token) });
   return res.json();
 }
 
@@ -127,21 +139,35 @@ export async function researchTopic(query, token) {
   return res.json();
 }
 
-export async function getResearchHistory(token) {
-  const res = await fetch(`${API_URL}/api/ai/research`, { headers: authHeader(token) });
-  return res.json();
+export async function getResearchHistory(token, cursor = null) {
+  return fetchPage('/api/ai/research', token, cursor);
 }
 
 // ============ Content Calendar ============
-export async function getCalendar(startDate, endDate, token) {
+// Month views draw from the per-day counts and load a day's content when it is opened
+export async function getCalendarSummary(startDate, endDate, tz, token) {
   const params = new URLSearchParams();
   if (startDate) params.append('start_date', startDate);
   if (endDate) params.append('end_date', endDate);
-  
-  const res = await fetch(`${API_URL}/api/calendar?${params}`, { headers: authHeader(token) });
+  if (tz) params.append('tz', tz);
+  const res = await fetch(`${API_URL}/api/calendar/summary?${params}`, { headers: authHeader(token) });
   return res.json();
 }
 
+export async function getCalendarDay(day, tz, token) {
+  const params = new URLSearchParams();
+  if (tz) params.append('tz', tz);
+  const res = await fetch(`${API_URL}/api/calendar/day/${day}?${params}`, { headers: authHeader(token) });
+  return res.json();
+}
+
+export async function getCalendar(startDate, endDate, token, cursor = null) {
+  const params = new URLSearchParams();
+  if (startDate) params.append('start_date', startDate);
+  if (endDate) params.append('end_date', endDate);
+  return fetchPage('/api/calendar', token, cursor, params);
+}
+
 export async function scheduleContent(content, scheduledDate, platform, token) {
   const res = await fetch(`${API_URL}/api/calendar`, {
     method: "POST",